@@ -0,0 +1,108 @@
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Tuple
+from core.config import Config
+
+# Lower value is served first
+PRIORITY_INTERNAL = 0
+PRIORITY_NORMAL = 1
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed; `retry_after` is a suggested wait in seconds."""
+
+    def __init__(self, retry_after: int, detail: str = "Server is at capacity, please retry later."):
+        super().__init__(detail)
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+def estimate_retry_after(mean_seconds: float, ahead: int, concurrency: int) -> int:
+    """Seconds until a slot is likely free: the work ahead of the caller spread over the slots."""
+    return max(1, min(600, math.ceil(mean_seconds * (ahead + 1) / max(concurrency, 1))))
+
+
+class AdmissionController:
+    """
+    Global limit on concurrent pipeline runs with a bounded waiting line.
+
+    At most `max_concurrent` requests run and `max_queue` more wait; anything beyond
+    is rejected at once with Overloaded instead of joining a queue that would time
+    out anyway. Internal callers may use `internal_reserve` extra queue places and
+    are served before normal requests.
+    """
+
+    def __init__(self, max_concurrent: int = Config.ADMISSION_MAX_CONCURRENT,
+                 max_queue: int = Config.ADMISSION_MAX_QUEUE,
+                 internal_reserve: int = Config.ADMISSION_INTERNAL_RESERVE):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.internal_reserve = internal_reserve
+        self.running = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # Smoothed run time of admitted requests, for Retry-After
+        self.mean_seconds = 60.0
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def _check(self, priority: int):
+        limit = self.max_queue + (self.internal_reserve if priority == PRIORITY_INTERNAL else 0)
+        waiting = self.waiting
+        if self.running >= self.max_concurrent and waiting >= limit:
+            self.rejected += 1
+            raise Overloaded(estimate_retry_after(self.mean_seconds, waiting, self.max_concurrent))
+
+    async def _acquire(self, priority: int):
+        self._check(priority)
+        if self.running < self.max_concurrent and self.waiting == 0:
+            self._waiters.clear()  # Only abandoned entries are left
+            self.running += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        try:
+            await future  # The releasing request hands its slot over
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()  # Slot was handed over just as the client left
+            raise
+
+    def _release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.running -= 1
+
+    @asynccontextmanager
+    async def admit(self, priority: int = PRIORITY_NORMAL):
+        """Holds one run slot for the block; raises Overloaded if the line is full."""
+        await self._acquire(priority)
+        self.admitted += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mean_seconds = 0.8 * self.mean_seconds + 0.2 * (time.perf_counter() - started)
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "mean_seconds": round(self.mean_seconds, 1),
+        }
@@ -0,0 +1,526 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from core.config import Config
+from models.analysis_result import AnalysisResult
+from core.deadline import Deadline
+from models.job import JobStatus
+from api.admission import Overloaded, estimate_retry_after
+from services.youtube.downloader import extract_video_id
+
+# runner(video_url, emit, refresh, deadline)
+Runner = Callable[[str, Callable[[str, dict], None], bool, Optional[Deadline]], Awaitable[AnalysisResult]]
+
+
+def _worker_alive(pid: Optional[int]) -> bool:
+    """Whether the worker process that claimed a job still exists (all workers share one box)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, TypeError):
+        pass
+    return True
+
+
+def _deadline(seconds: Optional[float], submitted_at: float) -> Optional[Deadline]:
+    """The job's latency budget; it starts at submission, so queueing time counts."""
+    return Deadline.since(seconds, submitted_at) if seconds else None
+
+
+class Job:
+    """One submitted analysis, its progress events and, once finished, its result or error."""
+    __slots__ = ("job_id", "video_url", "refresh", "deadline_seconds", "status", "stage", "result", "error",
+                 "created_at", "started_at", "finished_at", "events", "_wake")
+
+    def __init__(self, video_url: str, refresh: bool = False, deadline_seconds: Optional[float] = None):
+        self.job_id = uuid.uuid4().hex
+        self.video_url = video_url
+        self.refresh = refresh
+        self.deadline_seconds = deadline_seconds
+        self.status = "queued"
+        self.stage: Optional[str] = None
+        self.result: Optional[AnalysisResult] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.events: List[Tuple[str, dict]] = []
+        self._wake = asyncio.Event()
+
+    def emit(self, event: str, data: dict):
+        """Appends a progress event and wakes every subscriber. Call on the event loop."""
+        if event == "stage":
+            self.stage = data.get("stage")
+        self.events.append((event, data))
+        wake, self._wake = self._wake, asyncio.Event()
+        wake.set()
+
+    async def wait_for_events(self, seen: int, timeout: float) -> bool:
+        """Waits until there are more than `seen` events or the job finished; False on timeout."""
+        if len(self.events) > seen or self.finished:
+            return True
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_status(self) -> JobStatus:
+        return JobStatus(
+            job_id=self.job_id, video_url=self.video_url, status=self.status, stage=self.stage,
+            error=self.error, created_at=self.created_at, started_at=self.started_at,
+            finished_at=self.finished_at,
+        )
+
+
+class JobStore:
+    """
+    In-process job queue and store for background analyses.
+
+    A fixed number of asyncio workers take jobs from the queue and run the pipeline,
+    independent of the HTTP connection that submitted them. Finished jobs stay
+    readable for `result_ttl` seconds (at most `max_jobs` of them). Submitting a
+    video that already has a queued or running job returns that job. Once
+    `max_queued` jobs are waiting, new submissions raise Overloaded.
+    """
+
+    def __init__(self, runner: Runner, workers: int = Config.JOB_WORKERS,
+                 max_jobs: int = Config.JOB_MAX_STORED, result_ttl: float = Config.JOB_RESULT_TTL,
+                 max_queued: int = Config.JOB_MAX_QUEUED):
+        self.runner = runner
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.result_ttl = result_ttl
+        self.max_queued = max_queued
+        self.rejected = 0
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # Held while the loop adds or drops jobs, so stats() can read them from another thread
+        self._lock = threading.Lock()
+        self._active_by_video: Dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    async def start(self):
+        """Starts the worker tasks; call once the event loop is running."""
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, video_url: str, refresh: bool = False, deadline_seconds: Optional[float] = None) -> Job:
+        video_key = extract_video_id(video_url) or video_url
+        active_id = self._active_by_video.get(video_key)
+        if active_id and active_id in self._jobs:
+            return self._jobs[active_id]
+        if self._queue.qsize() >= self.max_queued:
+            self.rejected += 1
+            raise Overloaded(estimate_retry_after(self._mean_run_seconds(), self._queue.qsize(), self.workers))
+
+        job = Job(video_url, refresh, deadline_seconds)
+        with self._lock:
+            self._evict()
+            self._jobs[job.job_id] = job
+        self._active_by_video[video_key] = job.job_id
+        self._queue.put_nowait(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+
+            try:
+                job.result = await self.runner(
+                    job.video_url, job.emit, job.refresh, _deadline(job.deadline_seconds, job.created_at)
+                )
+                job.status = "done"
+            except Exception as e:
+                job.status = "failed"
+                job.error = e.detail if isinstance(e, HTTPException) else str(e)
+                print(f"🔥 JOB {job.job_id} FAILED: {job.error}")
+                traceback.print_exc()
+            finally:
+                job.stage = None
+                job.finished_at = time.time()
+                self._active_by_video.pop(extract_video_id(job.video_url) or job.video_url, None)
+                # Final event, so event streams can close
+                if job.status == "done":
+                    job.emit("result", job.result.model_dump())
+                else:
+                    job.emit("error", {"detail": job.error})
+
+    def _mean_run_seconds(self) -> float:
+        runs = [job.finished_at - job.started_at for job in self._jobs.values()
+                if job.status == "done" and job.started_at]
+        return sum(runs) / len(runs) if runs else 60.0
+
+    def _evict(self):
+        """Drops expired finished jobs, then the oldest finished ones beyond max_jobs (hold _lock)."""
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(self._jobs) - self.max_jobs + 1
+        for job in finished:
+            if now - job.finished_at > self.result_ttl or excess > 0:
+                del self._jobs[job.job_id]
+                excess -= 1
+
+    def stats(self) -> Dict[str, int]:
+        """Job counts by status; safe to call off the loop (health check and metrics do)."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in jobs:
+            counts[job.status] += 1
+        counts["rejected"] = self.rejected
+        return counts
+
+
+class StoredJob:
+    """
+    A job of the SharedJobStore as read from SQLite. Offers the same attributes as
+    Job; wait_for_events() polls the database for events written by any worker.
+    """
+
+    def __init__(self, store: "SharedJobStore", row: tuple, events: List[Tuple[str, dict]]):
+        self._store = store
+        self.events = events
+        self._apply(row)
+
+    def _apply(self, row: tuple):
+        (self.job_id, self.video_url, self.refresh, self.status, self.stage, self.error,
+         self._result_json, self.created_at, self.started_at, self.finished_at) = row
+        self.refresh = bool(self.refresh)
+
+    @property
+    def result(self) -> Optional[AnalysisResult]:
+        return AnalysisResult.model_validate_json(self._result_json) if self._result_json else None
+
+    async def refresh_state(self):
+        """Re-reads the row and appends events written since the last read."""
+        row, events = await self._store._call(self._store._read, self.job_id, len(self.events))
+        if row is not None:
+            self._apply(row)
+        self.events.extend(events)
+
+    async def wait_for_events(self, seen: int, timeout: float) -> bool:
+        """Polls until there are more than `seen` events or the job finished; False on timeout."""
+        give_up_at = time.monotonic() + timeout
+        while True:
+            await self.refresh_state()
+            if len(self.events) > seen or self.finished:
+                return True
+            if time.monotonic() >= give_up_at:
+                return False
+            await asyncio.sleep(self._store.poll_interval)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_status(self) -> JobStatus:
+        return Job.to_status(self)
+
+
+class SharedJobStore:
+    """
+    JobStore whose queue, status and events live in SQLite, so several API worker
+    processes share one job queue: any worker may accept a job, whichever has a free
+    worker task claims it, and status, result and event stream are readable from
+    all of them. Same interface and limits as JobStore.
+
+    All SQLite work runs on one dedicated thread per process, in submission order,
+    so a busy database never stalls the event loop.
+    """
+
+    _COLUMNS = "job_id, video_url, refresh, status, stage, error, result, created_at, started_at, finished_at"
+
+    def __init__(self, runner: Runner, db_path: str = Config.JOB_STORE_PATH, workers: int = Config.JOB_WORKERS,
+                 max_jobs: int = Config.JOB_MAX_STORED, result_ttl: float = Config.JOB_RESULT_TTL,
+                 max_queued: int = Config.JOB_MAX_QUEUED, poll_interval: float = Config.JOB_POLL_INTERVAL):
+        self.runner = runner
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.result_ttl = result_ttl
+        self.max_queued = max_queued
+        self.poll_interval = poll_interval
+        self.rejected = 0
+        self._db = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-db")
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks = []
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+        # Autocommit; multi-statement updates use explicit BEGIN IMMEDIATE transactions.
+        # Only ever used from the job-db thread (and here, before it exists).
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                video_key TEXT NOT NULL,
+                video_url TEXT NOT NULL,
+                refresh INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                stage TEXT,
+                error TEXT,
+                result TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                worker_pid INTEGER,
+                deadline_seconds REAL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+            CREATE TABLE IF NOT EXISTS job_events (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            );
+        """)
+        # Job files created before per-job deadlines
+        if "deadline_seconds" not in {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN deadline_seconds REAL")
+
+    async def _call(self, fn: Callable, *args):
+        """Runs `fn` on the job-db thread and waits for it without blocking the loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._db, fn, *args)
+
+    def _call_later(self, fn: Callable, *args):
+        """Queues `fn` on the job-db thread without waiting; errors are printed."""
+        def _report(future):
+            if future.exception():
+                print(f"⚠️ Job store write failed: {future.exception()}")
+        self._db.submit(fn, *args).add_done_callback(_report)
+
+    def _transaction(self, fn: Callable, *args):
+        """Runs `fn` inside BEGIN IMMEDIATE ... COMMIT (rolled back if it raises)."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            value = fn(*args)
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return value
+
+    async def start(self):
+        """Fails jobs left running by dead workers, then starts this process's dispatcher (which keeps checking)."""
+        await self._call(self._fail_orphaned)
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._dispatch())]
+
+    def _fail_orphaned(self):
+        """Fails the running jobs whose worker process is gone (a plain read when there are none)."""
+        running = self._conn.execute("SELECT job_id, worker_pid FROM jobs WHERE status = 'running'").fetchall()
+        orphaned = [(job_id, pid) for job_id, pid in running if not _worker_alive(pid)]
+        if not orphaned:
+            return
+
+        def _fail_all():
+            for job_id, pid in orphaned:
+                self._fail_orphan(job_id, pid)
+        self._transaction(_fail_all)
+
+    def _fail_orphan(self, job_id: str, pid: Optional[int]):
+        """Fails a job left running by a stopped worker, unless it finished meanwhile (in a transaction)."""
+        status = self._conn.execute("SELECT status FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if status is None or status[0] != "running":
+            return
+        print(f"⚠️ Job {job_id} was left running by a stopped worker (pid {pid})")
+        self._write_final(job_id, None, "The worker running this job stopped.")
+
+    async def submit(self, video_url: str, refresh: bool = False,
+                     deadline_seconds: Optional[float] = None) -> StoredJob:
+        job_id = await self._call(self._transaction, self._insert, video_url, refresh, deadline_seconds)
+        if self._wake is not None:
+            self._wake.set()
+        return await self.get(job_id)
+
+    def _insert(self, video_url: str, refresh: bool, deadline_seconds: Optional[float]) -> str:
+        """The queued or running job of the video, else a new queued one (in a transaction)."""
+        video_key = extract_video_id(video_url) or video_url
+        active = self._conn.execute(
+            "SELECT job_id, status, worker_pid FROM jobs WHERE video_key = ? AND status IN ('queued', 'running')",
+            (video_key,),
+        ).fetchone()
+        if active is not None:
+            job_id, status, pid = active
+            if status == "queued" or _worker_alive(pid):
+                return job_id
+            # Its worker died: fail it and queue the video again
+            self._fail_orphan(job_id, pid)
+        queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        if queued >= self.max_queued:
+            self.rejected += 1
+            raise Overloaded(estimate_retry_after(self._mean_run_seconds(), queued, self.workers))
+
+        self._evict()
+        job_id = uuid.uuid4().hex
+        self._conn.execute(
+            "INSERT INTO jobs (job_id, video_key, video_url, refresh, status, created_at, deadline_seconds) "
+            "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+            (job_id, video_key, video_url, int(refresh), time.time(), deadline_seconds),
+        )
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[StoredJob]:
+        row, events = await self._call(self._read, job_id, 0)
+        return StoredJob(self, row, events) if row is not None else None
+
+    def _read(self, job_id: str, after: int) -> Tuple[Optional[tuple], List[Tuple[str, dict]]]:
+        """The job's row and its events from sequence number `after` on."""
+        row = self._conn.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        events = self._conn.execute(
+            "SELECT name, data FROM job_events WHERE job_id = ? AND seq >= ? ORDER BY seq", (job_id, after)
+        ).fetchall()
+        return row, [(name, json.loads(data)) for name, data in events]
+
+    def _append_event(self, job_id: str, event: str, data: dict):
+        """Appends an event at the end of the job's log (inside a transaction)."""
+        self._conn.execute(
+            "INSERT INTO job_events (job_id, seq, name, data) "
+            "SELECT ?, COALESCE(MAX(seq) + 1, 0), ?, ? FROM job_events WHERE job_id = ?",
+            (job_id, event, json.dumps(data), job_id),
+        )
+
+    def _write_event(self, job_id: str, event: str, data: dict):
+        self._append_event(job_id, event, data)
+        if event == "stage":
+            self._conn.execute("UPDATE jobs SET stage = ? WHERE job_id = ?", (data.get("stage"), job_id))
+
+    def _emitter(self, job_id: str) -> Callable[[str, dict], None]:
+        def emit(event: str, data: dict):
+            # Queued, not awaited: the pipeline never waits for the database
+            self._call_later(self._transaction, self._write_event, job_id, event, data)
+
+        return emit
+
+    def _claim(self) -> Optional[tuple]:
+        """
+        Moves the oldest queued job to running for this process; None if nothing is
+        queued. Also fails jobs whose worker died since, so they do not look in flight.
+        """
+        self._fail_orphaned()
+        # A plain read first: idle workers poll without taking the write lock
+        if self._conn.execute("SELECT 1 FROM jobs WHERE status = 'queued' LIMIT 1").fetchone() is None:
+            return None
+        return self._transaction(self._claim_oldest)
+
+    def _claim_oldest(self) -> Optional[tuple]:
+        # Another process may have claimed it since the read above
+        row = self._conn.execute(
+            "SELECT job_id, video_url, refresh, deadline_seconds, created_at FROM jobs "
+            "WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+        ).fetchone()
+        if row is not None:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, worker_pid = ? WHERE job_id = ?",
+                (time.time(), os.getpid(), row[0]),
+            )
+        return row
+
+    def _finish(self, job_id: str, result: Optional[AnalysisResult], error: Optional[str]):
+        """
+        Appends the final "result" or "error" event and sets the final status in one
+        transaction, so no reader sees one without the other.
+        """
+        self._transaction(self._write_final, job_id, result, error)
+
+    def _write_final(self, job_id: str, result: Optional[AnalysisResult], error: Optional[str]):
+        if result is not None:
+            self._append_event(job_id, "result", result.model_dump())
+        else:
+            self._append_event(job_id, "error", {"detail": error})
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, stage = NULL, result = ?, error = ?, finished_at = ? WHERE job_id = ?",
+            ("failed" if result is None else "done", result.model_dump_json() if result else None,
+             error, time.time(), job_id),
+        )
+
+    async def _dispatch(self):
+        """Claims queued jobs while fewer than `workers` run in this process."""
+        slots = asyncio.Semaphore(self.workers)
+        while True:
+            await slots.acquire()
+            claimed = await self._call(self._claim)
+            if claimed is None:
+                slots.release()
+                # Woken at once by submissions to this process; other processes' are polled
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            task = asyncio.create_task(self._run(*claimed))
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _run(self, job_id: str, video_url: str, refresh: int, deadline_seconds: Optional[float],
+                   created_at: float):
+        emit = self._emitter(job_id)
+        result, error = None, None
+        try:
+            result = await self.runner(video_url, emit, bool(refresh), _deadline(deadline_seconds, created_at))
+        except asyncio.CancelledError:
+            error = "The worker stopped before the job finished."
+            raise
+        except Exception as e:
+            error = e.detail if isinstance(e, HTTPException) else str(e)
+            print(f"🔥 JOB {job_id} FAILED: {error}")
+            traceback.print_exc()
+        finally:
+            # After the job's queued events, on the same thread
+            self._call_later(self._finish, job_id, result, error)
+
+    def _mean_run_seconds(self) -> float:
+        mean = self._conn.execute(
+            "SELECT AVG(finished_at - started_at) FROM jobs WHERE status = 'done' AND started_at IS NOT NULL"
+        ).fetchone()[0]
+        return mean or 60.0
+
+    def _evict(self):
+        """Drops expired finished jobs, then the oldest finished ones beyond max_jobs."""
+        finished = "status IN ('done', 'failed')"
+        expired = [row[0] for row in self._conn.execute(
+            f"SELECT job_id FROM jobs WHERE {finished} AND finished_at < ?", (time.time() - self.result_ttl,)
+        )]
+        excess = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] - len(expired) - self.max_jobs + 1
+        if excess > 0:
+            expired += [row[0] for row in self._conn.execute(
+                f"SELECT job_id FROM jobs WHERE {finished} AND finished_at >= ? ORDER BY finished_at LIMIT ?",
+                (time.time() - self.result_ttl, excess),
+            )]
+        for job_id in expired:
+            self._conn.execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def _count(self) -> Dict[str, int]:
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for status, count in self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    def stats(self) -> Dict[str, int]:
+        """Job counts by status; blocks the calling thread (health check and metrics run off the loop)."""
+        counts = self._db.submit(self._count).result()
+        counts["rejected"] = self.rejected
+        return counts
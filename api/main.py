@@ -1,14 +1,34 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+from typing import Callable, Optional, Tuple
+from pydantic import BaseModel, Field
 import os
+import hmac
+import json
 import asyncio
+import functools
+import time
 import traceback
 from core.config import Config
+from core.deadline import Deadline
+from core.log import log_stats
+from core.metrics import ANALYSES, PIPELINE_SECONDS, skip_sample, timed
+from core.tracing import in_context, trace
 from models.analysis_result import AnalysisResult, VideoMetadata
-from services.youtube.downloader import YouTubeDownloader
+from models.job import JobStatus
+from api.admission import AdmissionController, Overloaded, PRIORITY_INTERNAL, PRIORITY_NORMAL
+from api.jobs import JobStore, SharedJobStore
+from api.metrics import ServiceCollector
+from api.planning import argument_count, audio_window, expected, gather_within
+from api.results import ResultStore, is_storable
+from api.stages import Stage, StagedPipeline
+from services.youtube.downloader import YouTubeDownloader, extract_video_id
 from services.audio.transcription import TranscriptionService
-from services.reasoning.generator import ReasoningEngine
+from services.reasoning.generator import COUNTER_ARGUMENT_TYPES, ReasoningEngine
 from services.search.youtube_search import SearchService
+from services.youtube.thumbnails import ThumbnailCache, ThumbnailError, is_allowed_thumbnail_url
+from services.youtube.prefetch import Prefetcher
 
 app = FastAPI(title="EchoBreaker API", version="2.2.0")
 
@@ -18,23 +38,290 @@ app = FastAPI(title="EchoBreaker API", version="2.2.0")
 try:
     print("🚀 Initializing EchoBreaker Local Services...")
     yt_downloader = YouTubeDownloader()
-    transcriber = TranscriptionService() # Loads local Whisper model
+    transcriber = TranscriptionService() # Loads local Whisper model (or connects to the model server)
     reasoner = ReasoningEngine()         # Connects to local Ollama/Llama 3
     search_service = SearchService()     # YouTube search integration
+    thumbnail_cache = ThumbnailCache()   # Card-sized thumbnails served by /thumbnail
+    # Finished analyses by video ID, pipeline version and model config
+    result_store = ResultStore() if Config.RESULT_STORE_ENABLED else None
+    # Warms caches for the suggested videos users tend to analyze next
+    prefetcher = Prefetcher(yt_downloader, transcriber) if Config.PREFETCH_ENABLED else None
+    # Per-stage concurrency limits and bounded queues; videos overlap across stages
+    pipeline = StagedPipeline({
+        "download": Stage("download", Config.STAGE_DOWNLOAD_CONCURRENCY, Config.STAGE_DOWNLOAD_QUEUE),
+        # Whisper runs on the transcriber's own single worker thread
+        "transcribe": Stage("transcribe", Config.STAGE_TRANSCRIBE_CONCURRENCY, Config.STAGE_TRANSCRIBE_QUEUE, blocking=False),
+        "analyze": Stage("analyze", Config.STAGE_ANALYZE_CONCURRENCY, Config.STAGE_ANALYZE_QUEUE),
+    })
     print("✅ All services initialized successfully.")
 except Exception as e:
     print(f"❌ Critical Error during service initialization: {e}")
     traceback.print_exc()
 
+@app.on_event("startup")
+async def warm_up_models():
+    """
+    Loads the LLMs and caches their static prompt prefixes without delaying startup.
+    api.serve does this once for all workers and turns it off here.
+    """
+    if Config.WARM_UP_ON_STARTUP:
+        asyncio.get_running_loop().run_in_executor(None, reasoner.warm_up)
+
 class AnalyzeRequest(BaseModel):
     video_url: str
+    refresh: bool = False  # Re-run the pipeline even if a stored analysis exists
+    # Latency budget: when short, the pipeline degrades instead of running over
+    deadline_seconds: Optional[float] = Field(None, gt=0)
+
+# =============================================================================
+# PIPELINE HELPERS
+# =============================================================================
+
+# Progress events: emit(event_name, json_serializable_data). Must be called on the event loop.
+Emit = Callable[[str, dict], None]
+
+def _no_emit(event: str, data: dict):
+    pass
+
+def verify_video(argument, video) -> Tuple[float, bool]:
+    """
+    Blocking: the LLM relevance check of one search result, as (score, accepted).
+    The verdict is also recorded in the channel index, here on the worker thread, so
+    its SQLite write never blocks the event loop.
+    """
+    verification = reasoner.verify_relevance(
+        counter_argument_content=argument.content,
+        video_title=video.title,
+        video_description=video.description or ""
+    )
+    score = verification.get('score', 0.5)
+    verdict = verification.get('verdict', 'reject')
+
+    # LOGIC: Accept if AI says "accept" OR if score is high enough (>=0.6)
+    accepted = verdict == 'accept' or score >= 0.6
+    if not verification.get('fallback'):
+        # relevance_score still holds the authority score from the search here
+        search_service.record_verification(video, accepted, video.relevance_score or 0.5)
+    return score, accepted
+
+async def verify_suggestions(argument, raw_suggestions, emit: Emit = _no_emit,
+                             deadline: Optional[Deadline] = None):
+    """
+    Verifies search results against one counter-argument and attaches the best ones.
+    Once there is no time left for another LLM verification, the remaining results
+    are kept with the search's authority scores instead.
+    """
+    loop = asyncio.get_running_loop()
+    verified_videos = []
+    for index, video in enumerate(raw_suggestions):
+        if deadline and not deadline.allows(expected("verify")):
+            deadline.degrade("heuristic_verification")
+            for unchecked in raw_suggestions[index:]:
+                verified_videos.append(unchecked)
+                emit("video_verified", {"argument_type": argument.type, "video": unchecked.model_dump(), "heuristic": True})
+            break
+
+        # AI-powered Relevance Check (blocking LLM call, kept off the event loop)
+        with timed("verify"):
+            score, accepted = await loop.run_in_executor(
+                None, in_context(functools.partial(verify_video, argument, video))
+            )
+        if accepted:
+            video.relevance_score = score
+            verified_videos.append(video)
+            emit("video_verified", {"argument_type": argument.type, "video": video.model_dump()})
+    
+    # FALLBACK MECHANISM:
+    # If the AI was too strict and rejected everything, but we found videos,
+    # we keep the #1 search result so the UI isn't empty.
+    if not verified_videos and raw_suggestions:
+        print(f"    ⚠️ [Fallback] AI was too strict for '{argument.type}'. Adding top search result.")
+        fallback = raw_suggestions[0]
+        fallback.relevance_score = 0.5 # Default neutral score
+        verified_videos.append(fallback)
+        emit("video_verified", {"argument_type": argument.type, "video": fallback.model_dump(), "fallback": True})
+
+    # Final sorting and assignment
+    verified_videos.sort(key=lambda v: v.relevance_score or 0, reverse=True)
+    argument.suggested_videos = verified_videos[:2] # Return top 2 videos
+    print(f"    ✅ Found {len(argument.suggested_videos)} video(s) for {argument.type}")
+
+async def process_counter_argument(argument, claimed: set = None, emit: Emit = _no_emit,
+                                   deadline: Optional[Deadline] = None):
+    """
+    Searches YouTube for one counter-argument and attaches verified videos.
+    `claimed` is shared by all arguments of one analysis: videos another argument
+    already took are replaced by the next search results, so each video is
+    verified only once and no argument is left without candidates.
+    """
+    query = argument.youtube_query
+    if not query:
+        return
+
+    try:
+        print(f"  🔍 Searching for '{argument.type}': {query}")
+        # Get raw search results
+        with timed("search"):
+            if claimed is None:
+                raw_suggestions = await search_service.search_videos(query, limit=3, query_type=argument.type)
+            else:
+                raw_suggestions = await search_service.search_unclaimed(query, 3, claimed, query_type=argument.type)
+        await verify_suggestions(argument, raw_suggestions, emit, deadline)
+
+    except Exception as sx:
+        print(f"  ❌ Search task failed: {sx}")
+
+async def process_counter_arguments(arguments, exclude_ids=None, emit: Emit = _no_emit,
+                                    deadline: Optional[Deadline] = None):
+    """Searches all counter-arguments in one deduplicated batch, then verifies each."""
+    try:
+        for argument in arguments:
+            print(f"  🔍 Searching for '{argument.type}': {argument.youtube_query}")
+        with timed("search"):
+            batches = await search_service.search_many(
+                [a.youtube_query or "" for a in arguments], limit=3, exclude_ids=exclude_ids,
+                query_types=[a.type for a in arguments]
+            )
+    except Exception as sx:
+        print(f"  ❌ Search task failed: {sx}")
+        return
+
+    async def _verify(argument, raw_suggestions):
+        try:
+            await verify_suggestions(argument, raw_suggestions, emit, deadline)
+        except Exception as sx:
+            print(f"  ❌ Verification failed for '{argument.type}': {sx}")
+
+    await asyncio.gather(*(_verify(arg, raw) for arg, raw in zip(arguments, batches)))
+
+async def analysis_events_within(analysis_events, transcript: str, video_url: str,
+                                 deadline: Optional[Deadline] = None):
+    """
+    Yields the events of a streamed LLM analysis as the worker thread produces them.
+    If the deadline passes first, yields ("deadline", None) and stops; the model then
+    finishes in the background.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def _produce():
+        try:
+            for event in analysis_events(transcript, video_url):
+                loop.call_soon_threadsafe(events.put_nowait, event)
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, None)
+
+    producer = loop.run_in_executor(None, in_context(_produce))
+    while True:
+        try:
+            event = await asyncio.wait_for(events.get(), timeout=deadline.remaining() if deadline else None)
+        except asyncio.TimeoutError:
+            yield ("deadline", None)
+            return
+        if event is None:
+            break
+        yield event
+    await producer
+
+def partial_result(partial: dict, arguments: list, transcript: str, deadline: Deadline) -> AnalysisResult:
+    """What the analysis produced before the deadline passed, with the transcript it was given."""
+    deadline.degrade("partial_analysis")
+    skip_sample()
+    return AnalysisResult(**partial, counter_arguments=arguments, transcript=transcript)
+
+PARTIAL_ANALYSIS = {"topic": "Unknown Topic", "primary_claim": "The analysis did not finish in time."}
+
+async def analysis_within(transcript: str, video_url: str, deadline: Deadline) -> AnalysisResult:
+    """
+    The single-mode analysis under a deadline: the same request, streamed, so that when
+    the deadline passes the topic, claim and counter-arguments finished so far are
+    returned instead of nothing.
+    """
+    partial = dict(PARTIAL_ANALYSIS)
+    arguments = []
+    result = None
+    async for kind, value in analysis_events_within(reasoner.stream_analysis, transcript, video_url, deadline):
+        if kind == "deadline":
+            result = partial_result(partial, arguments, transcript, deadline)
+        elif kind == "counter_argument":
+            arguments.append(value)
+        elif kind == "result":
+            result = value
+        else:
+            partial[kind] = value
+    return result
+
+async def stream_analysis_with_search(transcript: str, video_url: str, source_video_id: str = None,
+                                      emit: Emit = _no_emit, deadline: Optional[Deadline] = None) -> AnalysisResult:
+    """
+    Runs the streamed ("stream" or "parallel" mode) LLM analysis in a worker thread and
+    starts the YouTube search for each counter-argument as soon as it is complete.
+    With a deadline, only the first argument_count() arguments are kept, and when it
+    passes the analysis so far is returned instead of waiting for the model.
+    """
+    max_arguments = argument_count(deadline)
+
+    if Config.ANALYSIS_MODE == "parallel":
+        analysis_events = functools.partial(
+            reasoner.stream_parallel_analysis, argument_types=COUNTER_ARGUMENT_TYPES[:max_arguments]
+        )
+    else:
+        analysis_events = reasoner.stream_analysis
+
+    search_tasks = []
+    started = []
+    # Video IDs already assigned to a counter-argument (never suggest the video itself)
+    claimed = {source_video_id} if source_video_id else set()
+    partial = dict(PARTIAL_ANALYSIS)
+    result = None
+    timed_out = False
+
+    def _search(argument):
+        if deadline and len(started) >= max_arguments:
+            return
+        emit("counter_argument", argument.model_dump(exclude={"suggested_videos"}))
+        started.append(argument)
+        search_tasks.append(asyncio.create_task(process_counter_argument(argument, claimed, emit, deadline)))
+
+    # Only the model's part is timed; the searches record their own "search" and "verify" samples
+    with timed("analyze"):
+        async for kind, value in analysis_events_within(analysis_events, transcript, video_url, deadline):
+            if kind == "deadline":
+                # Out of time: keep what has been generated
+                result = partial_result(partial, started, transcript, deadline)
+                timed_out = True
+            elif kind == "counter_argument":
+                print(f"  🧠 Counter-argument ready: {value.type}")
+                _search(value)
+            elif kind == "result":
+                result = value
+            else:
+                print(f"  🧠 {kind} ready: {value}")
+                partial[kind] = value
+                emit(kind, {kind: value})
+
+    if not timed_out:
+        # Arguments recovered by the final full parse were never streamed
+        for argument in result.counter_arguments:
+            if all(argument is not s for s in started):
+                _search(argument)
+        result.counter_arguments = [a for a in result.counter_arguments if any(a is s for s in started)]
+
+    await gather_within(search_tasks, deadline)
+    return result
 
 # =============================================================================
 # API ENDPOINTS
 # =============================================================================
 
-@app.post("/analyze", response_model=AnalysisResult)
-async def analyze_video(request: AnalyzeRequest):
+def top_suggested_urls(result: AnalysisResult, count: int) -> list:
+    """URLs of the highest-relevance suggested videos across all counter-arguments."""
+    videos = [v for arg in result.counter_arguments for v in arg.suggested_videos]
+    videos.sort(key=lambda v: v.relevance_score or 0, reverse=True)
+    return [v.url for v in videos[:count]]
+
+async def run_pipeline(video_url: str, emit: Optional[Emit] = None,
+                       deadline: Optional[Deadline] = None) -> AnalysisResult:
     """
     Orchestrates the full EchoBreaker pipeline:
     1. Download audio and extract metadata via yt-dlp.
@@ -42,96 +329,144 @@ async def analyze_video(request: AnalyzeRequest):
     3. Analyze topic, claims, and generate counter-perspectives using Llama 3.
     4. Search YouTube for videos matching those counter-perspectives.
     5. Verify video relevance using AI fallback logic.
+
+    In "stream" and "parallel" analysis modes steps 3-5 overlap: each counter-argument
+    is searched and verified as soon as the model has finished generating it.
+    `emit` receives progress events as the pipeline produces them: each stage,
+    the source metadata, transcript segments, topic and claim, every counter-argument
+    and every verified video. Once done, the top suggested videos are queued for
+    prefetching.
+
+    With a `deadline` each step checks the time left against the recent duration of
+    the remaining steps and degrades when it is short: the video's captions replace
+    download and Whisper, a shorter audio window is transcribed, fewer counter-arguments
+    are generated and searched, heuristic scores replace LLM verification, and finally
+    whatever is ready when the deadline passes is returned. The applied steps are
+    listed in `result.degradations`.
     """
+    emit = emit or _no_emit
+    loop = asyncio.get_running_loop()
     temp_file = None
+    captions = max_audio_seconds = None
+    transcribe_ticket = analyze_ticket = None
+    download_ticket = await pipeline["download"].admit()
+    if prefetcher:
+        prefetcher.enter_foreground()
     try:
         # STEP 1: DOWNLOAD & METADATA
-        print(f"\n--- [Step 1] Processing Video: {request.video_url} ---")
-        # Returns (absolute_path, metadata_dictionary)
-        temp_file, meta_dict = yt_downloader.download_audio_with_metadata(request.video_url)
+        async with download_ticket:
+            print(f"\n--- [Step 1] Processing Video: {video_url} ---")
+            emit("stage", {"stage": "download"})
+            if deadline and not deadline.allows(expected("download", "transcribe", "analyze", "search", "verify")):
+                # No time for download + Whisper; the video's own captions need neither
+                with timed("captions"):
+                    captions, meta_dict = await pipeline["download"].run_blocking(
+                        yt_downloader.fetch_captions, video_url
+                    )
+                if captions:
+                    deadline.degrade("captions_instead_of_asr")
+            if not captions:
+                max_audio_seconds = audio_window(deadline)
+                # Returns (absolute_path, metadata_dictionary)
+                with timed("download"):
+                    temp_file, meta_dict = await pipeline["download"].run_blocking(
+                        yt_downloader.download_audio_with_metadata, video_url, max_audio_seconds
+                    )
+            video_metadata = VideoMetadata(
+                video_title=meta_dict.get('title', 'Unknown Title'),
+                channel_name=meta_dict.get('channel', 'Unknown Channel'),
+                duration=meta_dict.get('duration_formatted', '00:00'),
+                view_count=str(meta_dict.get('view_count', '0')),
+                upload_date=meta_dict.get('upload_date', 'Unknown'),
+                thumbnail=meta_dict.get('thumbnail'),
+                description=meta_dict.get('description', '')[:500] # Limit desc length
+            )
+            emit("metadata", video_metadata.model_dump())
+            # Keep the download slot until the next stage has room (backpressure)
+            if captions:
+                transcript = captions
+                analyze_ticket = await pipeline["analyze"].admit()
+            else:
+                transcribe_ticket = await pipeline["transcribe"].admit()
         
         # STEP 2: TRANSCRIPTION
-        print("--- [Step 2] Transcribing with Local Whisper ---")
-        transcript = await transcriber.transcribe_file(temp_file)
-        if not transcript:
-            raise HTTPException(status_code=400, detail="Transcription failed. Audio might be silent.")
+        if transcribe_ticket:
+            async with transcribe_ticket:
+                print("--- [Step 2] Transcribing with Local Whisper ---")
+                emit("stage", {"stage": "transcribe"})
+                on_segment = None
+                if emit is not _no_emit:
+                    # Segments arrive on the Whisper worker thread
+                    on_segment = lambda segment: loop.call_soon_threadsafe(emit, "transcript_segment", segment)
+                with timed("transcribe"):
+                    if max_audio_seconds:
+                        # A shortened window would understate the full window's duration
+                        skip_sample()
+                    transcript = await transcriber.transcribe_file(
+                        temp_file, cache_key=meta_dict.get('video_id'), on_segment=on_segment,
+                        max_seconds=max_audio_seconds
+                    )
+                if not transcript:
+                    raise HTTPException(status_code=400, detail="Transcription failed. Audio might be silent.")
+                analyze_ticket = await pipeline["analyze"].admit()
+        if not max_audio_seconds:
+            # Later analyses can find this video locally instead of on YouTube
+            search_service.add_to_corpus(meta_dict, transcript)
 
         # STEP 3: REASONING & ANALYSIS
-        print("--- [Step 3] Generating Insights with Llama 3 ---")
-        # Result contains topic, primary_claim, and counter_arguments list
-        result = reasoner.generate_analysis(transcript, request.video_url)
+        async with analyze_ticket:
+            print("--- [Step 3] Generating Insights with Llama 3 ---")
+            emit("stage", {"stage": "analyze"})
+            if Config.ANALYSIS_MODE in ("stream", "parallel"):
+                # STEP 4 runs inside: searches start per streamed counter-argument
+                result = await stream_analysis_with_search(
+                    transcript, video_url, source_video_id=meta_dict.get('video_id'), emit=emit,
+                    deadline=deadline
+                )
+            else:
+                # Result contains topic, primary_claim, and counter_arguments list
+                with timed("analyze"):
+                    if deadline:
+                        result = await analysis_within(transcript, video_url, deadline)
+                    else:
+                        result = await pipeline["analyze"].run_blocking(reasoner.generate_analysis, transcript, video_url)
+                if deadline:
+                    result.counter_arguments = result.counter_arguments[:argument_count(deadline)]
+                emit("topic", {"topic": result.topic})
+                emit("primary_claim", {"primary_claim": result.primary_claim})
+                for argument in result.counter_arguments:
+                    emit("counter_argument", argument.model_dump(exclude={"suggested_videos"}))
+
+                # STEP 4: SEARCH & VERIFICATION
+                print("--- [Step 4] Searching for Diverse Perspectives ---")
+                emit("stage", {"stage": "search"})
+                # Run all category searches (Ethical, Empirical, Logical) concurrently,
+                # deduplicated so a video shared by several queries is verified once
+                if result.counter_arguments:
+                    await gather_within([asyncio.create_task(process_counter_arguments(
+                        result.counter_arguments, exclude_ids=[meta_dict.get('video_id')], emit=emit,
+                        deadline=deadline
+                    ))], deadline)
         
         # Inject metadata for the Frontend UI
-        result.video_metadata = VideoMetadata(
-            video_title=meta_dict.get('title', 'Unknown Title'),
-            channel_name=meta_dict.get('channel', 'Unknown Channel'),
-            duration=meta_dict.get('duration_formatted', '00:00'),
-            view_count=str(meta_dict.get('view_count', '0')),
-            upload_date=meta_dict.get('upload_date', 'Unknown'),
-            thumbnail=meta_dict.get('thumbnail'),
-            description=meta_dict.get('description', '')[:500] # Limit desc length
-        )
-        
-        # STEP 4: SEARCH & VERIFICATION
-        print("--- [Step 4] Searching for Diverse Perspectives ---")
-        
-        async def process_counter_argument(argument):
-            query = argument.youtube_query
-            if not query:
-                return
+        result.video_metadata = video_metadata
+        if deadline:
+            result.degradations = list(deadline.degradations)
+
+        if prefetcher:
+            # Runs on the prefetcher's own small thread budget, alongside analyses
+            prefetcher.submit(top_suggested_urls(result, Config.PREFETCH_TOP_N))
 
-            try:
-                print(f"  🔍 Searching for '{argument.type}': {query}")
-                # Get raw search results
-                raw_suggestions = await search_service.search_videos(query, limit=3)
-                
-                verified_videos = []
-                for video in raw_suggestions:
-                    # AI-powered Relevance Check
-                    verification = reasoner.verify_relevance(
-                        counter_argument_content=argument.content,
-                        video_title=video.title,
-                        video_description=video.description or ""
-                    )
-                    
-                    score = verification.get('score', 0.5)
-                    verdict = verification.get('verdict', 'reject')
-                    
-                    # LOGIC: Accept if AI says "accept" OR if score is high enough (>=0.6)
-                    if verdict == 'accept' or score >= 0.6:
-                        video.relevance_score = score
-                        verified_videos.append(video)
-                
-                # FALLBACK MECHANISM:
-                # If the AI was too strict and rejected everything, but we found videos,
-                # we keep the #1 search result so the UI isn't empty.
-                if not verified_videos and raw_suggestions:
-                    print(f"    ⚠️ [Fallback] AI was too strict for '{argument.type}'. Adding top search result.")
-                    fallback = raw_suggestions[0]
-                    fallback.relevance_score = 0.5 # Default neutral score
-                    verified_videos.append(fallback)
-
-                # Final sorting and assignment
-                verified_videos.sort(key=lambda v: v.relevance_score or 0, reverse=True)
-                argument.suggested_videos = verified_videos[:2] # Return top 2 videos
-                print(f"    ✅ Found {len(argument.suggested_videos)} video(s) for {argument.type}")
-
-            except Exception as sx:
-                print(f"  ❌ Search task failed: {sx}")
-
-        # Run all category searches (Ethical, Empirical, Logical) concurrently
-        if result.counter_arguments:
-            await asyncio.gather(*(process_counter_argument(arg) for arg in result.counter_arguments))
-        
         print("--- [Final] Pipeline Complete. Returning results. ---\n")
         return result
-
-    except Exception as e:
-        print(f"🔥 PIPELINE CRASH: {e}")
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
     
     finally:
+        # Queue places taken for stages that never ran (no-op for used tickets)
+        for ticket in (download_ticket, transcribe_ticket, analyze_ticket):
+            if ticket:
+                ticket.release()
+        if prefetcher:
+            prefetcher.exit_foreground()
         # Cleanup temporary audio files
         if temp_file and os.path.exists(temp_file):
             try:
@@ -140,6 +475,210 @@ async def analyze_video(request: AnalyzeRequest):
             except Exception as cleanup_err:
                 print(f"⚠️ Cleanup failed: {cleanup_err}")
 
+def stored_analysis(video_url: str) -> Optional[AnalysisResult]:
+    """The stored analysis of the video for the current pipeline version and models."""
+    if not result_store:
+        return None
+    stored = result_store.get(extract_video_id(video_url))
+    if stored is not None:
+        ANALYSES.labels("stored", "ok").inc()
+        print(f"💾 Stored analysis found for {video_url}, skipping the pipeline.")
+    return stored
+
+async def run_and_store(video_url: str, emit: Optional[Emit] = None,
+                        deadline: Optional[Deadline] = None) -> AnalysisResult:
+    """Runs the pipeline and stores the result if it is complete and successful (see is_storable)."""
+    started = time.perf_counter()
+    try:
+        with trace("analysis", video_url=video_url):
+            result = await run_pipeline(video_url, emit, deadline)
+    except Exception:
+        PIPELINE_SECONDS.labels("error").observe(time.perf_counter() - started)
+        ANALYSES.labels("pipeline", "error").inc()
+        raise
+    PIPELINE_SECONDS.labels("ok").observe(time.perf_counter() - started)
+    ANALYSES.labels("pipeline", "ok").inc()
+    if result_store and is_storable(result):
+        result_store.put(extract_video_id(video_url), video_url, result)
+    elif result_store:
+        print(f"⚠️ Not storing the analysis of {video_url}: incomplete or failed ({result.error or 'degraded or no videos'})")
+    return result
+
+async def analyze_with_store(video_url: str, emit: Optional[Emit] = None, refresh: bool = False,
+                             deadline: Optional[Deadline] = None) -> AnalysisResult:
+    """Returns the stored analysis unless `refresh` is set; otherwise runs and stores a new one."""
+    stored = None if refresh else stored_analysis(video_url)
+    return stored or await run_and_store(video_url, emit, deadline)
+
+# With JOB_STORE_PATH every worker process shares one job queue, status and event log
+job_store = SharedJobStore(analyze_with_store) if Config.JOB_STORE_PATH else JobStore(analyze_with_store)
+# Sheds /analyze requests beyond the configured concurrency and queue length
+admission = AdmissionController()
+
+service_collector = ServiceCollector(
+    caches={
+        "search_queries": lambda: search_service.cache_stats()["queries"],
+        "search_videos": lambda: search_service.cache_stats()["videos"],
+        "video_info": yt_downloader.cache_stats,
+        "transcripts": transcriber.cache_stats,
+        "thumbnails": thumbnail_cache.stats,
+        **({"analysis_results": result_store.stats} if result_store else {}),
+    },
+    search_service=search_service, prefetcher=prefetcher, job_store=job_store,
+    pipeline=pipeline, admission=admission, router=reasoner.router,
+)
+REGISTRY.register(service_collector)
+
+def _priority(internal_token: Optional[str]) -> int:
+    expected = Config.ADMISSION_INTERNAL_TOKEN
+    if expected and internal_token and hmac.compare_digest(internal_token, expected):
+        return PRIORITY_INTERNAL
+    return PRIORITY_NORMAL
+
+def _overloaded(e: Overloaded) -> HTTPException:
+    return HTTPException(status_code=429, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+
+@app.on_event("startup")
+async def start_job_workers():
+    await job_store.start()
+
+@app.post("/analyze", response_model=AnalysisResult)
+async def analyze_video(request: AnalyzeRequest, x_internal_token: Optional[str] = Header(None)):
+    """
+    Returns the stored analysis of the video if there is one (unless `refresh` is set),
+    otherwise runs the whole pipeline while the connection stays open.
+    New runs go through admission control: 429 with Retry-After when at capacity.
+    With `deadline_seconds` (or DEADLINE_DEFAULT_SECONDS) the pipeline degrades to
+    answer in time; the result's `degradations` lists what it skipped.
+    Prefer POST /jobs for long videos: the work survives client disconnects.
+    """
+    stored = None if request.refresh else stored_analysis(request.video_url)
+    if stored is not None:
+        return stored
+    # The budget starts now: time spent waiting for admission counts against it
+    seconds = request.deadline_seconds or Config.DEADLINE_DEFAULT_SECONDS
+    deadline = Deadline(seconds) if seconds else None
+    try:
+        async with admission.admit(_priority(x_internal_token)):
+            return await run_and_store(request.video_url, deadline=deadline)
+    except Overloaded as e:
+        raise _overloaded(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"🔥 PIPELINE CRASH: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(request: AnalyzeRequest):
+    """
+    Queues an analysis and returns its job ID immediately; poll GET /jobs/{job_id}.
+    429 with Retry-After when too many jobs are already queued.
+    `deadline_seconds` (or DEADLINE_DEFAULT_SECONDS) counts from submission, as for
+    POST /analyze.
+    """
+    try:
+        job = await job_store.submit(
+            request.video_url, request.refresh, request.deadline_seconds or Config.DEADLINE_DEFAULT_SECONDS or None
+        )
+        return job.to_status()
+    except Overloaded as e:
+        raise _overloaded(e)
+
+@app.get("/analyses/{video_id}", response_model=AnalysisResult)
+async def get_stored_analysis(video_id: str):
+    """The stored analysis of a video for the current pipeline version and models."""
+    result = result_store.get(video_id) if result_store else None
+    if result is None:
+        raise HTTPException(status_code=404, detail="No stored analysis for this video.")
+    return result
+
+async def _get_job(job_id: str):
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job ID.")
+    return job
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job_status(job_id: str):
+    """Current status and pipeline stage of a job."""
+    return (await _get_job(job_id)).to_status()
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-sent events for a job, replayed from the start (or after Last-Event-ID):
+    stage, metadata, transcript_segment, topic, primary_claim, counter_argument,
+    video_verified, and finally result or error. Comment lines keep idle
+    connections open.
+    """
+    job = await _get_job(job_id)
+    start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    async def event_source():
+        index = start
+        while True:
+            if not await job.wait_for_events(index, timeout=15):
+                yield ": keep-alive\n\n"
+                continue
+            while index < len(job.events):
+                name, data = job.events[index]
+                yield f"id: {index}\nevent: {name}\ndata: {json.dumps(data)}\n\n"
+                index += 1
+            if job.finished and index >= len(job.events):
+                return
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/jobs/{job_id}/result", response_model=AnalysisResult)
+async def get_job_result(job_id: str):
+    """The finished analysis; 202 while the job is still queued or running."""
+    job = await _get_job(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {job.error}")
+    if job.status != "done":
+        return JSONResponse(status_code=202, content=job.to_status().model_dump())
+    return job.result
+
+@app.get("/thumbnail")
+async def get_thumbnail(url: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Serves a resized, disk-cached copy of a YouTube thumbnail so the frontends don't
+    hit the CDN for every card on every rerun. Only YouTube image hosts are proxied.
+    """
+    if not is_allowed_thumbnail_url(url):
+        raise HTTPException(status_code=400, detail="Only YouTube thumbnail URLs can be proxied.")
+    try:
+        loop = asyncio.get_running_loop()
+        data, media_type, etag = await loop.run_in_executor(None, thumbnail_cache.get, url)
+    except ThumbnailError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    # A URL's cached image never changes, so browsers may keep it for a week without revalidating
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=604800, immutable"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=media_type, headers=headers)
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus metrics: stage latency histograms, cache hits/misses, queue depths, in-flight work.
+    Under api.serve (PROMETHEUS_MULTIPROC_DIR set) histograms and counters are summed over
+    all workers; the gauges and cache counters are those of the worker that answered.
+    """
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(service_collector)
+    return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/")
 def health_check():
     """Returns the current status and configuration of the API."""
@@ -147,5 +686,18 @@ def health_check():
         "status": "online",
         "service": "EchoBreaker API",
         "version": "2.2.0",
-        "llm_model": Config.OLLAMA_MODEL
+        "llm_model": Config.OLLAMA_MODEL,
+        "llm_backends": reasoner.router.stats(),
+        "llm_tasks": reasoner.get_task_stats(),
+        "search_cache": search_service.cache_stats(),
+        "search_pool": search_service.pool_stats(),
+        "video_info_cache": yt_downloader.cache_stats(),
+        "transcript_cache": transcriber.cache_stats(),
+        "thumbnail_cache": thumbnail_cache.stats(),
+        "prefetch": prefetcher.stats() if prefetcher else None,
+        "admission": admission.stats(),
+        "jobs": job_store.stats(),
+        "result_store": result_store.stats() if result_store else None,
+        "stages": pipeline.stats(),
+        "logging": log_stats()
     }
\ No newline at end of file
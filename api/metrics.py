@@ -0,0 +1,64 @@
+from typing import Callable, Dict, Iterator
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+CacheStats = Dict[str, Callable[[], dict]]
+
+
+class ServiceCollector:
+    """
+    Reads the services' own counters at scrape time (cache hits and misses, queue
+    depths, in-flight work), so nothing on the request path has to update them twice.
+    """
+
+    def __init__(self, caches: CacheStats, search_service, prefetcher, job_store, pipeline, admission, router):
+        self.caches = caches
+        self.search_service = search_service
+        self.prefetcher = prefetcher
+        self.job_store = job_store
+        self.pipeline = pipeline
+        self.admission = admission
+        self.router = router
+
+    def collect(self) -> Iterator:
+        hits = CounterMetricFamily("echobreaker_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("echobreaker_cache_misses", "Cache misses", labels=["cache"])
+        for name, stats in self.caches.items():
+            values = stats()
+            hits.add_metric([name], values["hits"])
+            misses.add_metric([name], values["misses"])
+        yield hits
+        yield misses
+
+        depth = GaugeMetricFamily("echobreaker_queue_depth", "Requests waiting in a queue", labels=["queue"])
+        in_flight = GaugeMetricFamily("echobreaker_in_flight", "Requests currently being worked on", labels=["component"])
+        rejected = CounterMetricFamily("echobreaker_rejected", "Requests shed for lack of capacity", labels=["queue"])
+
+        for name, stage in self.pipeline.stats().items():
+            depth.add_metric([f"stage_{name}"], stage["waiting"])
+            in_flight.add_metric([f"stage_{name}"], stage["running"])
+
+        admission = self.admission.stats()
+        depth.add_metric(["admission"], admission["waiting"])
+        in_flight.add_metric(["admission"], admission["running"])
+        rejected.add_metric(["admission"], admission["rejected"])
+
+        jobs = self.job_store.stats()
+        depth.add_metric(["jobs"], jobs["queued"])
+        in_flight.add_metric(["jobs"], jobs["running"])
+        rejected.add_metric(["jobs"], jobs["rejected"])
+
+        if self.prefetcher:
+            depth.add_metric(["prefetch"], self.prefetcher.stats()["pending"])
+
+        pool = self.search_service.pool_stats()
+        in_flight.add_metric(["search_pool"], pool["active"])
+        for backend in self.router.stats():
+            in_flight.add_metric([f"llm:{backend['url']}"], backend["in_flight"])
+
+        yield depth
+        yield in_flight
+        yield rejected
+
+        throttled = CounterMetricFamily("echobreaker_search_throttled", "YouTube searches throttled (HTTP 429 and similar)")
+        throttled.add_metric([], pool["throttled"])
+        yield throttled
@@ -0,0 +1,56 @@
+"""
+Planning within a request deadline: the recent duration of the remaining stages
+decides which cheaper variant of a step still fits (see run_pipeline).
+"""
+import asyncio
+from typing import Optional
+from core.config import Config
+from core.deadline import Deadline
+from core.metrics import expected_seconds
+from services.reasoning.generator import COUNTER_ARGUMENT_TYPES
+from services.youtube.downloader import AUDIO_WINDOW_SECONDS
+
+
+# Typical stage durations (seconds) until measured; deadlines are planned with these
+STAGE_DEFAULT_SECONDS = {"download": 20, "transcribe": 60, "analyze": 60, "search": 8, "verify": 4}
+
+
+def expected(*stages: str) -> float:
+    return sum(expected_seconds(stage, STAGE_DEFAULT_SECONDS[stage]) for stage in stages)
+
+
+def audio_window(deadline: Optional[Deadline]) -> Optional[int]:
+    """Seconds of audio to transcribe so the later stages still fit; None for the full window."""
+    if deadline is None:
+        return None
+    spare = deadline.remaining() - expected("download", "analyze", "search", "verify")
+    fraction = spare / expected("transcribe")
+    if fraction >= 1:
+        return None
+    seconds = max(Config.DEADLINE_MIN_AUDIO_SECONDS, int(AUDIO_WINDOW_SECONDS * fraction))
+    deadline.degrade(f"shortened_audio_{seconds}s")
+    return seconds
+
+
+def argument_count(deadline: Optional[Deadline]) -> int:
+    """How many counter-arguments to generate, search and verify in the time left."""
+    count = len(COUNTER_ARGUMENT_TYPES)
+    if deadline is None or deadline.allows(expected("analyze", "search", "verify")):
+        return count
+    deadline.degrade("fewer_counter_arguments")
+    return 2 if deadline.allows(expected("analyze")) else 1
+
+
+async def gather_within(tasks: list, deadline: Optional[Deadline]):
+    """Awaits the tasks; those still running when the deadline passes are cancelled."""
+    if not tasks:
+        return
+    if deadline is None:
+        await asyncio.gather(*tasks)
+        return
+    _, pending = await asyncio.wait(tasks, timeout=max(deadline.remaining(), 0))
+    if pending:
+        deadline.degrade("partial_search")
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+from core.config import Config
+from models.analysis_result import AnalysisResult
+
+# Bump whenever a pipeline change makes earlier stored analyses stale
+PIPELINE_VERSION = "2.2"
+
+
+def current_model_config() -> Dict[str, str]:
+    """The settings that shape an analysis; a change to any of them is a cache miss."""
+    return {
+        "analysis_mode": Config.ANALYSIS_MODE,
+        "analysis_model": Config.OLLAMA_ANALYSIS_MODEL,
+        "extraction_model": Config.OLLAMA_EXTRACTION_MODEL,
+        "verify_model": Config.OLLAMA_VERIFY_MODEL,
+        "whisper_model": "tiny",
+    }
+
+
+def is_storable(result: AnalysisResult) -> bool:
+    """
+    Only complete, successful analyses are stored: no LLM error, no deadline
+    shortcuts, and every counter-argument came back with suggested videos (an empty
+    list usually means its search or verification failed).
+    """
+    return (
+        result.error is None
+        and not result.degradations
+        and bool(result.counter_arguments)
+        and all(argument.suggested_videos for argument in result.counter_arguments)
+    )
+
+
+class ResultStore:
+    """
+    Finished analyses on disk (SQLite), keyed by video ID, pipeline version and a
+    hash of the model configuration. Re-analyzing a known video becomes a lookup.
+    Entries older than `ttl` seconds are ignored (0 keeps them forever), since the
+    suggested videos age even when the analysis does not.
+    """
+
+    def __init__(self, db_path: str = Config.RESULT_STORE_PATH, ttl: float = Config.RESULT_STORE_TTL,
+                 pipeline_version: str = PIPELINE_VERSION, model_config: Optional[Dict[str, str]] = None):
+        self.ttl = ttl
+        self.pipeline_version = pipeline_version
+        self.model_config = model_config or current_model_config()
+        self.config_key = hashlib.sha1(
+            json.dumps(self.model_config, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                video_id TEXT NOT NULL,
+                pipeline_version TEXT NOT NULL,
+                config_key TEXT NOT NULL,
+                model_config TEXT NOT NULL,
+                video_url TEXT,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (video_id, pipeline_version, config_key)
+            );
+        """)
+        self._conn.commit()
+
+    def get(self, video_id: str) -> Optional[AnalysisResult]:
+        """The stored analysis for the current pipeline and models, or None."""
+        if not video_id:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM analyses WHERE video_id = ? AND pipeline_version = ? AND config_key = ?",
+                (video_id, self.pipeline_version, self.config_key),
+            ).fetchone()
+        result = None
+        if row is not None and not (self.ttl and time.time() - row[1] > self.ttl):
+            result = AnalysisResult.model_validate_json(row[0])
+        # Failed analyses stored before is_storable() existed are treated as missing
+        if result is None or not is_storable(result):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, video_id: str, video_url: str, result: AnalysisResult):
+        if not video_id:
+            return
+        row = (
+            video_id,
+            self.pipeline_version,
+            self.config_key,
+            json.dumps(self.model_config, sort_keys=True),
+            video_url,
+            result.model_dump_json(),
+            time.time(),
+        )
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stored = self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        return {
+            "stored": stored,
+            "hits": self.hits,
+            "misses": self.misses,
+            "pipeline_version": self.pipeline_version,
+            "config_key": self.config_key,
+        }
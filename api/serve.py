@@ -0,0 +1,95 @@
+"""
+Runs the API with several worker processes on one box:
+
+    python -m api.serve --workers 4 --port 8000
+
+Whisper is loaded once, in a dedicated model server process, instead of once per
+worker; caches and the job queue live in shared SQLite files under data/; the LLMs
+are warmed once; /metrics sums histograms and counters over all workers.
+Admission control and the per-stage limits still apply per worker.
+"""
+import os
+import sys
+import shutil
+import secrets
+import argparse
+import threading
+import multiprocessing
+from core.config import Config, PROJECT_ROOT
+
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+
+
+def _start_model_server(address: str, authkey: str) -> multiprocessing.Process:
+    from services.audio.model_server import connect, serve
+    # Spawned, so the model server starts clean (CUDA does not survive fork)
+    process = multiprocessing.get_context("spawn").Process(
+        target=serve, args=(address, authkey), name="whisper-server", daemon=True
+    )
+    process.start()
+    print(f"⏳ Waiting for the Whisper model server on {address}...")
+    connect(address, authkey, timeout=Config.WHISPER_SERVER_CONNECT_TIMEOUT)
+    return process
+
+
+def _shared_environment(workers: int) -> dict:
+    """Settings every worker inherits: the shared stores, metrics dir and no per-worker warm-up."""
+    env = {
+        "SHARED_CACHE_PATH": Config.SHARED_CACHE_PATH or os.path.join(DATA_DIR, "shared_cache.sqlite"),
+        "JOB_STORE_PATH": Config.JOB_STORE_PATH or os.path.join(DATA_DIR, "jobs.sqlite"),
+        "WARM_UP_ON_STARTUP": "false",
+    }
+    if workers > 1:
+        env["PROMETHEUS_MULTIPROC_DIR"] = os.environ.get(
+            "PROMETHEUS_MULTIPROC_DIR", os.path.join(DATA_DIR, "prometheus")
+        )
+    return env
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the EchoBreaker API with shared models and caches.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--no-model-server", action="store_true",
+                        help="Use the model server at WHISPER_SERVER_ADDRESS instead of starting one")
+    args = parser.parse_args(argv)
+
+    env = _shared_environment(args.workers)
+    # Stale files from a previous run would be summed into the new one's metrics
+    metrics_dir = env.get("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir)
+
+    model_server = None
+    address = Config.WHISPER_SERVER_ADDRESS or "127.0.0.1:50070"
+    # Connections to the model server are unpickled: never run it with a guessable key
+    authkey = Config.WHISPER_SERVER_AUTHKEY or secrets.token_hex(32)
+    if not args.no_model_server:
+        model_server = _start_model_server(address, authkey)
+    elif not (Config.WHISPER_SERVER_ADDRESS and Config.WHISPER_SERVER_AUTHKEY):
+        sys.exit("--no-model-server needs WHISPER_SERVER_ADDRESS and WHISPER_SERVER_AUTHKEY")
+    env.update({"WHISPER_SERVER_ADDRESS": address, "WHISPER_SERVER_AUTHKEY": authkey})
+    # Spawned workers read these from the environment; a single worker runs in this
+    # process, whose Config is already loaded
+    os.environ.update(env)
+    for key in ("SHARED_CACHE_PATH", "JOB_STORE_PATH", "WHISPER_SERVER_ADDRESS", "WHISPER_SERVER_AUTHKEY"):
+        setattr(Config, key, env[key])
+    Config.WARM_UP_ON_STARTUP = False
+
+    # The Ollama models are shared by all workers anyway; load them once
+    from services.reasoning.generator import ReasoningEngine
+    threading.Thread(target=ReasoningEngine().warm_up, name="llm-warm-up", daemon=True).start()
+
+    import uvicorn
+    print(f"🚀 Starting {args.workers} API workers on {args.host}:{args.port}")
+    try:
+        uvicorn.run("api.main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        if model_server is not None:
+            model_server.terminate()
+
+
+if __name__ == "__main__":
+    main()
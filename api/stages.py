@@ -0,0 +1,116 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from core.metrics import STAGE_WAIT_SECONDS
+from core.tracing import in_context, record_span
+
+
+class StageTicket:
+    """
+    A place in one stage's bounded queue. `async with ticket:` waits for one of the
+    stage's worker slots and holds it for the block; leaving the block frees both.
+    """
+
+    def __init__(self, stage: "Stage"):
+        self.stage = stage
+        self._released = False
+        self._admitted_ns = time.perf_counter_ns()
+        self._started = 0.0
+
+    async def __aenter__(self) -> "StageTicket":
+        stage = self.stage
+        try:
+            await stage._slots.acquire()
+        except BaseException:
+            self.release()
+            raise
+        stage.waiting -= 1
+        stage.running += 1
+        self._started = time.perf_counter()
+        STAGE_WAIT_SECONDS.labels(stage.name).observe((time.perf_counter_ns() - self._admitted_ns) / 1e9)
+        record_span(f"{stage.name} queue", self._admitted_ns)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        stage = self.stage
+        stage.running -= 1
+        stage.completed += 1
+        stage.busy_seconds += time.perf_counter() - self._started
+        stage._slots.release()
+        self._released = True
+        stage._admitted.release()
+
+    def release(self):
+        """Gives the queue place back without running (e.g. the request failed in between)."""
+        if not self._released:
+            self._released = True
+            self.stage.waiting -= 1
+            self.stage._admitted.release()
+
+
+class Stage:
+    """
+    One pipeline stage with its own concurrency limit, bounded queue and (for
+    blocking work) its own thread pool.
+
+    At most `concurrency` requests run the stage and `queue_size` more wait for it.
+    A request takes its ticket for the next stage *before* leaving the current one,
+    so when a downstream stage is full, upstream workers stop taking new work.
+    That is backpressure; without it, finished downloads would pile up in memory
+    in front of a slow transcriber. Different videos still overlap across stages:
+    video B downloads while video A is transcribed.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, blocking: bool = True):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        # Created on first use, inside the server's event loop
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._admitted: Optional[asyncio.Semaphore] = None
+        self._executor = (
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"stage-{name}")
+            if blocking else None
+        )
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.busy_seconds = 0.0
+
+    async def admit(self) -> StageTicket:
+        """Waits for a place in this stage's queue."""
+        if self._admitted is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._admitted = asyncio.Semaphore(self.concurrency + self.queue_size)
+        await self._admitted.acquire()
+        self.waiting += 1
+        return StageTicket(self)
+
+    async def run_blocking(self, fn: Callable[..., Any], *args) -> Any:
+        """Runs a blocking call on this stage's thread pool (call inside `async with ticket`)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, in_context(fn), *args)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "mean_seconds": round(self.busy_seconds / self.completed, 2) if self.completed else None,
+        }
+
+
+class StagedPipeline:
+    """The ordered stages of the analysis pipeline."""
+
+    def __init__(self, stages: Dict[str, Stage]):
+        self.stages = stages
+
+    def __getitem__(self, name: str) -> Stage:
+        return self.stages[name]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stage.stats() for name, stage in self.stages.items()}
@@ -0,0 +1,92 @@
+"""
+Micro-benchmark: legacy per-entry title/authority checks vs. the compiled batch rules.
+
+Usage (from the project root):
+    python -m benchmarks.bench_search_rules [number_of_entries]
+"""
+import sys
+import random
+import timeit
+from services.search.quality import QualityRules
+
+WORDS = ["climate", "policy", "debate", "economics", "lecture", "analysis", "history",
+         "science", "explained", "documentary", "interview", "review", "ethics", "data"]
+DECORATIONS = ["", "", "", " SHOCKING", " (MUST WATCH)", " you won't believe", " 🔥🔥🔥🔥", " 😀"]
+CHANNELS = ["Stanford University", "DW News", "RandomVlogs", "Khan Academy", "Max Planck Institute",
+            "gamer123", "The Research Hub", "daily clips"]
+CATEGORIES = [["Education"], ["Entertainment"], ["News"], ["People & Blogs"], ["Science & Technology"], []]
+
+
+def legacy_is_quality_title(title: str) -> bool:
+    if not title:
+        return False
+    clickbait_terms = ['SHOCKING', 'YOU WON\'T BELIEVE', 'MUST WATCH', 'GONE WRONG']
+    title_upper = title.upper()
+    for term in clickbait_terms:
+        if term in title_upper:
+            return False
+    emoji_count = sum(1 for c in title if ord(c) > 0x1F300)
+    if emoji_count > 3:
+        return False
+    caps_ratio = sum(1 for c in title if c.isupper()) / max(len(title), 1)
+    if caps_ratio > 0.7 and len(title) > 10:
+        return False
+    return True
+
+
+def legacy_authority_score(entry: dict) -> float:
+    score = 0.5
+    categories = entry.get('categories', [])
+    if categories:
+        if any(cat in ['News', 'Education', 'Documentary', 'Science & Technology'] for cat in categories):
+            score += 0.3
+    uploader = (entry.get('uploader') or entry.get('channel') or '').lower()
+    if any(term in uploader for term in ['university', 'institute', 'news', 'academy', 'research']):
+        score += 0.2
+    return min(score, 1.0)
+
+
+def make_entries(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    entries = []
+    for _ in range(n):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 9))) + rng.choice(DECORATIONS)
+        if rng.random() < 0.05:
+            title = title.upper()
+        entries.append({
+            "title": title,
+            "uploader": rng.choice(CHANNELS),
+            "categories": rng.choice(CATEGORIES),
+        })
+    return entries
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    entries = make_entries(n)
+    titles = [e["title"] for e in entries]
+    rules = QualityRules()
+
+    def legacy():
+        return [legacy_is_quality_title(t) for t in titles], [legacy_authority_score(e) for e in entries]
+
+    def compiled():
+        return rules.check_titles(titles), rules.authority_scores(entries)
+
+    legacy_titles, legacy_scores = legacy()
+    batch_titles, batch_scores = compiled()
+    # Best of several runs to keep scheduler noise out of the comparison
+    legacy_s = min(timeit.repeat(legacy, number=1, repeat=7))
+    batch_s = min(timeit.repeat(compiled, number=1, repeat=7))
+
+    assert legacy_titles == batch_titles, "title verdicts differ from the legacy rules"
+    assert legacy_scores == batch_scores, "authority scores differ from the legacy rules"
+
+    print(f"entries:  {n}")
+    print(f"legacy:   {legacy_s * 1000:8.1f} ms  ({legacy_s / n * 1e6:.2f} us/entry)")
+    print(f"compiled: {batch_s * 1000:8.1f} ms  ({batch_s / n * 1e6:.2f} us/entry)")
+    print(f"speedup:  {legacy_s / batch_s:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,138 @@ import os
 
 load_dotenv()
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class Config:
     OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3:8b")
+    # Per-task model tiers, e.g. llama3.2:1b for verification and extraction (pull it first);
+    # unset or empty uses OLLAMA_MODEL
+    OLLAMA_ANALYSIS_MODEL = os.getenv("OLLAMA_ANALYSIS_MODEL") or OLLAMA_MODEL
+    OLLAMA_EXTRACTION_MODEL = os.getenv("OLLAMA_EXTRACTION_MODEL") or OLLAMA_MODEL
+    OLLAMA_VERIFY_MODEL = os.getenv("OLLAMA_VERIFY_MODEL") or OLLAMA_MODEL
+    # Comma-separated Ollama instances for the LLM router (defaults to OLLAMA_BASE_URL)
+    OLLAMA_BACKENDS = [u.strip() for u in os.getenv("OLLAMA_BACKENDS", OLLAMA_BASE_URL).split(",") if u.strip()]
+    OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "300"))  # Seconds per request before failover
+    OLLAMA_BACKEND_COOLDOWN = float(os.getenv("OLLAMA_BACKEND_COOLDOWN", "30"))  # Seconds a failed backend is skipped
+    # Keep models resident between requests; a constant num_ctx avoids reloads that drop the prompt cache
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "8192"))
+
+    # "stream" parses the LLM token stream incrementally so searches start per argument,
+    # "parallel" extracts topic/claim first and generates each argument type concurrently,
+    # "single" waits for the complete JSON response before searching.
+    ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "stream")
+    # Concurrent counter-argument requests in "parallel" mode (match OLLAMA_NUM_PARALLEL)
+    ANALYSIS_PARALLELISM = int(os.getenv("ANALYSIS_PARALLELISM", "3"))
+
+    # Two-phase YouTube search: flat results page first, full metadata only for quality survivors
+    SEARCH_FLAT_EXTRACTION = os.getenv("SEARCH_FLAT_EXTRACTION", "true").lower() == "true"
+    # Search result caching (normalized query -> raw entries, video ID -> full metadata)
+    SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+    SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))  # Seconds
+    VIDEO_METADATA_CACHE_SIZE = int(os.getenv("VIDEO_METADATA_CACHE_SIZE", "4096"))
+    VIDEO_METADATA_CACHE_TTL = float(os.getenv("VIDEO_METADATA_CACHE_TTL", "86400"))  # Seconds
+    # Shared yt-dlp search pool: max concurrency, token-bucket rate limit and HTTP 429 backoff
+    SEARCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_MAX_CONCURRENCY", "4"))
+    SEARCH_RATE_PER_SECOND = float(os.getenv("SEARCH_RATE_PER_SECOND", "3"))
+    SEARCH_RATE_BURST = int(os.getenv("SEARCH_RATE_BURST", "6"))
+    SEARCH_MAX_RETRIES = int(os.getenv("SEARCH_MAX_RETRIES", "3"))
+    SEARCH_BACKOFF_BASE = float(os.getenv("SEARCH_BACKOFF_BASE", "2"))  # Seconds, doubled per retry
+    # Clickbait terms, emoji/caps thresholds and authority boosts for search results
+    SEARCH_RULES_PATH = os.getenv("SEARCH_RULES_PATH", os.path.join(PROJECT_ROOT, "core", "search_rules.json"))
+    # Persistent channel ID -> authority/category index, seeded from CHANNEL_SEED_PATH and
+    # refined by verification outcomes. CHANNEL_PRIOR_WEIGHT = verifications the prior is worth.
+    CHANNEL_INDEX_PATH = os.getenv("CHANNEL_INDEX_PATH", os.path.join(PROJECT_ROOT, "data", "channel_index.sqlite"))
+    CHANNEL_SEED_PATH = os.getenv("CHANNEL_SEED_PATH", os.path.join(PROJECT_ROOT, "core", "channel_seed.json"))
+    CHANNEL_PRIOR_WEIGHT = float(os.getenv("CHANNEL_PRIOR_WEIGHT", "4"))
+    # Local full-text corpus of analyzed videos, searched before YouTube.
+    # LOCAL_CORPUS_MIN_MATCH = fraction of query terms a local hit must contain.
+    LOCAL_CORPUS_ENABLED = os.getenv("LOCAL_CORPUS_ENABLED", "true").lower() == "true"
+    LOCAL_CORPUS_PATH = os.getenv("LOCAL_CORPUS_PATH", os.path.join(PROJECT_ROOT, "data", "local_corpus.sqlite"))
+    LOCAL_CORPUS_MIN_MATCH = float(os.getenv("LOCAL_CORPUS_MIN_MATCH", "0.5"))
+    # Consume search results as yt-dlp yields them and stop once enough pass the quality filter
+    SEARCH_STREAMING = os.getenv("SEARCH_STREAMING", "true").lower() == "true"
+    # Raw results requested per wanted result, learned per query type from the rejection rate
+    SEARCH_OVERFETCH_INITIAL = float(os.getenv("SEARCH_OVERFETCH_INITIAL", "2"))
+    SEARCH_OVERFETCH_MIN = float(os.getenv("SEARCH_OVERFETCH_MIN", "1.2"))
+    SEARCH_OVERFETCH_MAX = float(os.getenv("SEARCH_OVERFETCH_MAX", "4"))
+    SEARCH_OVERFETCH_ALPHA = float(os.getenv("SEARCH_OVERFETCH_ALPHA", "0.2"))  # EWMA weight of the latest search
+    # Disk cache behind GET /thumbnail: card-sized copies of YouTube thumbnails
+    THUMBNAIL_CACHE_DIR = os.getenv("THUMBNAIL_CACHE_DIR", os.path.join(PROJECT_ROOT, "data", "thumbnails"))
+    THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", "480"))  # Pixels; needs Pillow, otherwise original size
+    THUMBNAIL_CACHE_MAX_MB = int(os.getenv("THUMBNAIL_CACHE_MAX_MB", "200"))
+    # Background prefetch of the top suggested videos after each analysis (low priority,
+    # bounded queue). Audio and transcript prefetch cost bandwidth and Whisper time.
+    PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+    PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", "3"))
+    PREFETCH_QUEUE_SIZE = int(os.getenv("PREFETCH_QUEUE_SIZE", "16"))
+    # Prefetch threads; they run alongside analyses, so keep this small
+    PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "1"))
+    PREFETCH_AUDIO = os.getenv("PREFETCH_AUDIO", "false").lower() == "true"
+    PREFETCH_TRANSCRIPT = os.getenv("PREFETCH_TRANSCRIPT", "false").lower() == "true"
+    PREFETCH_INFO_CACHE_SIZE = int(os.getenv("PREFETCH_INFO_CACHE_SIZE", "64"))
+    PREFETCH_INFO_TTL = float(os.getenv("PREFETCH_INFO_TTL", "1800"))  # Seconds; stream URLs expire
+    AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join(PROJECT_ROOT, "data", "audio_cache"))
+    AUDIO_CACHE_MAX_FILES = int(os.getenv("AUDIO_CACHE_MAX_FILES", "20"))
+    TRANSCRIPT_CACHE_SIZE = int(os.getenv("TRANSCRIPT_CACHE_SIZE", "256"))
+    TRANSCRIPT_CACHE_TTL = float(os.getenv("TRANSCRIPT_CACHE_TTL", "86400"))  # Seconds
+    # Background job API (POST /jobs): jobs in flight and result retention.
+    # The per-stage limits below bound the actual work, so this can exceed them.
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+    JOB_MAX_STORED = int(os.getenv("JOB_MAX_STORED", "500"))
+    JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "86400"))  # Seconds a finished job stays readable
+    # Whisper window for streamed transcription (GET /jobs/{id}/events emits one segment per window)
+    TRANSCRIBE_CHUNK_SECONDS = int(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "60"))
+    # Staged pipeline: concurrent requests per stage and how many more may queue for it
+    STAGE_DOWNLOAD_CONCURRENCY = int(os.getenv("STAGE_DOWNLOAD_CONCURRENCY", "2"))
+    STAGE_DOWNLOAD_QUEUE = int(os.getenv("STAGE_DOWNLOAD_QUEUE", "4"))
+    STAGE_TRANSCRIBE_CONCURRENCY = int(os.getenv("STAGE_TRANSCRIBE_CONCURRENCY", "1"))
+    STAGE_TRANSCRIBE_QUEUE = int(os.getenv("STAGE_TRANSCRIBE_QUEUE", "2"))
+    STAGE_ANALYZE_CONCURRENCY = int(os.getenv("STAGE_ANALYZE_CONCURRENCY", "2"))
+    STAGE_ANALYZE_QUEUE = int(os.getenv("STAGE_ANALYZE_QUEUE", "4"))
+    # Persistent analysis results: /analyze answers from disk unless refresh is requested
+    RESULT_STORE_ENABLED = os.getenv("RESULT_STORE_ENABLED", "true").lower() == "true"
+    RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", os.path.join(PROJECT_ROOT, "data", "results.sqlite"))
+    RESULT_STORE_TTL = float(os.getenv("RESULT_STORE_TTL", "2592000"))  # Seconds; 0 keeps results forever
+    # Admission control for /analyze: concurrent pipeline runs and how many more may wait.
+    # Beyond that requests get 429 + Retry-After. Callers sending ADMISSION_INTERNAL_TOKEN
+    # in X-Internal-Token get priority and ADMISSION_INTERNAL_RESERVE extra queue places.
+    ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "4"))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "8"))
+    ADMISSION_INTERNAL_RESERVE = int(os.getenv("ADMISSION_INTERNAL_RESERVE", "4"))
+    ADMISSION_INTERNAL_TOKEN = os.getenv("ADMISSION_INTERNAL_TOKEN", "")
+    JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "32"))  # Queued jobs before POST /jobs answers 429
+    # Per-request trace spans, written as one JSON file per analysis to TRACE_DIR.
+    # "chrome": trace-event format (chrome://tracing, ui.perfetto.dev); "otlp": OTLP/JSON.
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+    TRACE_DIR = os.getenv("TRACE_DIR", os.path.join(PROJECT_ROOT, "data", "traces"))
+    TRACE_FORMAT = os.getenv("TRACE_FORMAT", "chrome")
+    TRACE_MAX_FILES = int(os.getenv("TRACE_MAX_FILES", "200"))
+    # Structured logging: a background thread writes JSON lines to LOG_FILE in batches
+    # (empty disables the file). Records beyond LOG_QUEUE_SIZE are dropped, never waited on.
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FILE = os.getenv("LOG_FILE", os.path.join(PROJECT_ROOT, "data", "logs", "echobreaker.jsonl"))
+    LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "50"))
+    LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "2"))  # Seconds
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Per-request deadlines (POST /analyze "deadline_seconds"; 0 = none by default).
+    # Under a tight budget the pipeline uses captions instead of Whisper, shortens the audio,
+    # scores videos heuristically instead of by LLM and returns fewer counter-arguments.
+    DEADLINE_DEFAULT_SECONDS = float(os.getenv("DEADLINE_DEFAULT_SECONDS", "0"))
+    DEADLINE_MIN_AUDIO_SECONDS = int(os.getenv("DEADLINE_MIN_AUDIO_SECONDS", "30"))
+    CAPTION_LANGUAGES = [l.strip() for l in os.getenv("CAPTION_LANGUAGES", "en").split(",") if l.strip()]
+    # Multi-worker deployment (python -m api.serve --workers N sets these for its workers).
+    # WHISPER_SERVER_ADDRESS: host:port of the shared Whisper model server; empty loads Whisper in-process.
+    # SHARED_CACHE_PATH / JOB_STORE_PATH: SQLite files holding the caches and the job queue
+    # shared by all workers on the box; empty keeps them in process memory.
+    WHISPER_SERVER_ADDRESS = os.getenv("WHISPER_SERVER_ADDRESS", "")
+    # Shared secret of the model server (it unpickles what clients send); api.serve generates one
+    WHISPER_SERVER_AUTHKEY = os.getenv("WHISPER_SERVER_AUTHKEY", "")
+    WHISPER_SERVER_CONNECT_TIMEOUT = float(os.getenv("WHISPER_SERVER_CONNECT_TIMEOUT", "120"))  # Seconds
+    SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "")
+    JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "")
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))  # Seconds between shared queue/event polls
+    WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "true").lower() == "true"
+    # Extra searches a query may make for the videos other queries of the same analysis took
+    SEARCH_REFILL_ROUNDS = int(os.getenv("SEARCH_REFILL_ROUNDS", "2"))
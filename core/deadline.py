@@ -0,0 +1,34 @@
+import time
+from typing import List
+
+
+class Deadline:
+    """
+    Latency budget of one request. Pipeline steps check remaining() against their
+    expected cost and, when it is short, pick a cheaper variant and record it with
+    degrade(); the degradations are returned with the result.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.degradations: List[str] = []
+
+    @classmethod
+    def since(cls, seconds: float, started_at: float) -> "Deadline":
+        """A budget of `seconds` that began at wall-clock time `started_at`, e.g. a job's submission."""
+        deadline = cls(seconds)
+        deadline.expires_at -= max(0.0, time.time() - started_at)
+        return deadline
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def allows(self, seconds: float) -> bool:
+        """Whether `seconds` of work still fit into the budget."""
+        return self.remaining() >= seconds
+
+    def degrade(self, name: str):
+        if name not in self.degradations:
+            self.degradations.append(name)
+            print(f"⏱️ Deadline: {name} ({self.remaining():.1f}s of {self.seconds:.0f}s left)")
@@ -0,0 +1,150 @@
+import os
+import json
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from typing import List, Optional
+from core.config import Config
+from core.tracing import current_trace_id
+
+ROOT_LOGGER = "echobreaker"
+
+_setup_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, trace ID and the record's `data`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": int(record.created * 1000),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "trace_id", None):
+            entry["trace_id"] = record.trace_id
+        if getattr(record, "data", None) is not None:
+            entry["data"] = record.data
+        return json.dumps(entry, default=str)
+
+
+class BatchedFileHandler(logging.Handler):
+    """
+    Appends formatted records to a file in batches: a write happens once `batch_size`
+    records are buffered or `flush_interval` seconds have passed. No fsync; the OS
+    decides when the data reaches the disk.
+    """
+
+    def __init__(self, path: str, batch_size: int, flush_interval: float):
+        super().__init__()
+        log_dir = os.path.dirname(path)
+        if log_dir and not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+        self._file = open(path, 'a', encoding='utf-8')
+        self.batch_size = batch_size
+        self._buffer: List[str] = []
+        self._stopping = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, args=(flush_interval,), name="log-flush", daemon=True
+        )
+        self._flusher.start()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self._buffer.append(self.format(record))
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        # emit() already holds the handler lock; it is reentrant
+        with self.lock:
+            if self._buffer and not self._file.closed:
+                self._file.write("\n".join(self._buffer) + "\n")
+                self._file.flush()
+                self._buffer.clear()
+
+    def _flush_periodically(self, interval: float):
+        while not self._stopping.wait(interval):
+            self.flush()
+
+    def close(self):
+        self._stopping.set()
+        self.flush()
+        with self.lock:
+            self._file.close()
+        super().close()
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: when the queue is full the record is dropped and counted."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Read on the calling thread; the listener thread has no trace context
+        record.trace_id = current_trace_id()
+        return super().prepare(record)
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+def setup_logging():
+    """
+    Routes the `echobreaker` loggers through a bounded queue to a background thread,
+    which writes to the console and, if LOG_FILE is set, to a JSON lines file in
+    batches. Idempotent; get_logger() calls it.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter("[%(levelname)s] %(name)s: %(message)s"))
+        handlers: List[logging.Handler] = [console]
+        if Config.LOG_FILE:
+            file_handler = BatchedFileHandler(Config.LOG_FILE, Config.LOG_BATCH_SIZE, Config.LOG_FLUSH_INTERVAL)
+            file_handler.setFormatter(JSONFormatter())
+            handlers.append(file_handler)
+
+        log_queue: queue.Queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(Config.LOG_LEVEL.upper())
+        root.addHandler(_DroppingQueueHandler(log_queue))
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Drains the queue and flushes the file; registered with atexit."""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """A logger under `echobreaker` (e.g. get_logger(__name__)) with the async pipeline set up."""
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def log_stats() -> dict:
+    return {"dropped": _DroppingQueueHandler.dropped}
@@ -0,0 +1,71 @@
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Optional
+from prometheus_client import Counter, Histogram
+from core.tracing import span
+
+# Pipeline stages run from seconds to many minutes; searches and verifications are sub-second to tens of seconds
+_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1200)
+
+STAGE_SECONDS = Histogram(
+    "echobreaker_stage_duration_seconds",
+    "Time spent running one pipeline step (download, transcribe, analyze, search, verify)",
+    ["stage"], buckets=_BUCKETS,
+)
+STAGE_WAIT_SECONDS = Histogram(
+    "echobreaker_stage_wait_seconds",
+    "Time a request waited in a stage's queue before a worker slot was free",
+    ["stage"], buckets=_BUCKETS,
+)
+PIPELINE_SECONDS = Histogram(
+    "echobreaker_pipeline_duration_seconds",
+    "End-to-end time of one pipeline run",
+    ["outcome"], buckets=_BUCKETS,
+)
+ANALYSES = Counter(
+    "echobreaker_analyses",
+    "Analyses served, by source (stored result or pipeline run) and outcome",
+    ["source", "outcome"],
+)
+
+# Smoothed recent duration per stage, for planning within a request deadline
+_recent_seconds: Dict[str, float] = {}
+# The innermost running timed() block's sample; follows asyncio tasks, and threads via in_context()
+_sample: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("echobreaker_sample", default=None)
+
+
+def expected_seconds(stage: str, default: float) -> float:
+    """How long the stage has recently taken (`default` until it has run)."""
+    return _recent_seconds.get(stage, default)
+
+
+def skip_sample():
+    """
+    Keeps the running timed() block out of expected_seconds(): a cache hit or a step
+    cut short by the deadline says nothing about how long the stage takes.
+    """
+    sample = _sample.get()
+    if sample is not None:
+        sample["skip"] = True
+
+
+@contextmanager
+def timed(stage: str):
+    """
+    Records the duration of the block in STAGE_SECONDS and expected_seconds() (also
+    fine around awaits) and as a span of the current trace.
+    """
+    started = time.perf_counter()
+    sample = {"skip": False}
+    token = _sample.set(sample)
+    try:
+        with span(stage):
+            yield
+    finally:
+        _sample.reset(token)
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        if not sample["skip"]:
+            previous = _recent_seconds.get(stage)
+            _recent_seconds[stage] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
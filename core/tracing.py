@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from core.config import Config
+
+# The span new spans attach to; follows asyncio tasks, and threads via in_context()
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("echobreaker_span", default=None)
+
+
+def _lane() -> str:
+    """Timeline row of the caller: its asyncio task on the event loop, else its thread."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return task.get_name() if task else threading.current_thread().name
+
+
+class Trace:
+    """All spans of one analysis; written to TRACE_DIR when the root span ends."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List["Span"] = []
+        self._lock = threading.Lock()
+        # Wall clock anchor, so spans can use the monotonic perf counter
+        self._wall_ns = time.time_ns()
+        self._perf_ns = time.perf_counter_ns()
+
+    def to_unix_ns(self, perf_ns: int) -> int:
+        return self._wall_ns + perf_ns - self._perf_ns
+
+    def add(self, span: "Span"):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_chrome(self) -> Dict[str, Any]:
+        """Chrome trace-event format (chrome://tracing, ui.perfetto.dev)."""
+        lanes: Dict[str, int] = {}
+        events = []
+        for span in sorted(self.spans, key=lambda s: s.start_ns):
+            tid = lanes.setdefault(span.lane, len(lanes) + 1)
+            events.append({
+                "name": span.name, "cat": "echobreaker", "ph": "X", "pid": 1, "tid": tid,
+                "ts": self.to_unix_ns(span.start_ns) / 1000, "dur": (span.end_ns - span.start_ns) / 1000,
+                "args": span.attributes,
+            })
+        for lane, tid in lanes.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": lane}})
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"trace_id": self.trace_id}}
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON (the body of an OTLP HTTP export), loadable by Jaeger and similar tools."""
+        spans = [{
+            "traceId": self.trace_id,
+            "spanId": span.span_id,
+            "parentSpanId": span.parent_id or "",
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.to_unix_ns(span.start_ns)),
+            "endTimeUnixNano": str(self.to_unix_ns(span.end_ns)),
+            "attributes": [{"key": k, "value": {"stringValue": str(v)}} for k, v in span.attributes.items()],
+            "status": {"code": 2 if "error" in span.attributes else 1},
+        } for span in self.spans]
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "echobreaker"}}]},
+            "scopeSpans": [{"scope": {"name": "echobreaker"}, "spans": spans}],
+        }]}
+
+    def export(self, trace_dir: str = Config.TRACE_DIR, fmt: str = Config.TRACE_FORMAT) -> Optional[str]:
+        """Writes the trace as one JSON file and drops the oldest files beyond TRACE_MAX_FILES."""
+        try:
+            if not os.path.exists(trace_dir):
+                os.makedirs(trace_dir)
+            path = os.path.join(trace_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.name}-{self.trace_id[:8]}.{fmt}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_otlp() if fmt == "otlp" else self.to_chrome(), f)
+
+            files = sorted(
+                (entry for entry in os.scandir(trace_dir) if entry.name.endswith(".json")),
+                key=lambda entry: entry.stat().st_mtime,
+            )
+            for entry in files[:max(0, len(files) - Config.TRACE_MAX_FILES)]:
+                os.remove(entry.path)
+            return path
+        except OSError as e:
+            print(f"⚠️ Could not write trace {self.trace_id}: {e}")
+            return None
+
+
+class Span:
+    """One timed operation within a trace."""
+    __slots__ = ("trace", "name", "span_id", "parent_id", "attributes", "lane", "start_ns", "end_ns")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict[str, Any],
+                 start_ns: Optional[int] = None):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.lane = _lane()
+        self.start_ns = start_ns if start_ns is not None else time.perf_counter_ns()
+        self.end_ns = 0
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None):
+        if self.end_ns:
+            return
+        if error is not None:
+            self.attributes["error"] = f"{type(error).__name__}: {error}"
+        self.end_ns = time.perf_counter_ns()
+        self.trace.add(self)
+
+
+def start_span(name: str, **attributes) -> Optional[Span]:
+    """
+    Starts a child of the current span without making it current; the caller must
+    end() it. For work that outlives the calling block, e.g. a streamed LLM response.
+    None when no trace is active.
+    """
+    parent = _current.get()
+    if parent is None:
+        return None
+    return Span(parent.trace, name, parent.span_id, attributes)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Times the block as a child of the current span (a no-op outside a trace)."""
+    current = start_span(name, **attributes)
+    if current is None:
+        yield None
+        return
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(e)
+        raise
+    finally:
+        _current.reset(token)
+        current.end()
+
+
+def record_span(name: str, started_ns: int, **attributes):
+    """
+    Adds an already finished span that began at `started_ns` (perf_counter_ns) and ends
+    now, e.g. a queue wait. It gets its own timeline row, since it may straddle spans.
+    """
+    parent = _current.get()
+    if parent is not None:
+        finished = Span(parent.trace, name, parent.span_id, attributes, start_ns=started_ns)
+        finished.lane = f"{finished.lane} (waits)"
+        finished.end()
+
+
+@contextmanager
+def trace(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Starts a new trace with a root span and exports it when the block ends (if TRACING_ENABLED)."""
+    if not Config.TRACING_ENABLED:
+        yield None
+        return
+    new_trace = Trace(name)
+    root = Span(new_trace, name, None, attributes)
+    token = _current.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.end(e)
+        raise
+    finally:
+        _current.reset(token)
+        root.end()
+        path = new_trace.export()
+        if path:
+            print(f"🧭 Trace {new_trace.trace_id} written to {path}")
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current.get()
+    return span.trace.trace_id if span else None
+
+
+def in_context(fn: Callable) -> Callable:
+    """
+    Binds `fn` to a copy of the caller's context. Wrap callables handed to thread pools
+    (run_in_executor does not carry contextvars over), so their spans join the trace.
+    """
+    return functools.partial(contextvars.copy_context().run, fn)
@@ -1,8 +1,9 @@
 import streamlit as st
+import html
 import requests
 import json
 from datetime import datetime
-from typing import Optional
+from client import STAGE_LABELS, STAGE_ORDER, run_analysis_job, thumbnail_src
 
 # =============================================================================
 # PAGE CONFIGURATION
@@ -475,37 +476,49 @@ if analyze_button:
     if not video_url:
         st.error("⚠️ Please enter a valid YouTube URL.")
     else:
-        stages = [
-            ("🎬 Extracting audio", "Downloading content from YouTube"),
-            ("🎤 Transcribing speech", "Whisper AI processing"),
-            ("🧠 Analyzing arguments", "Extracting claims and viewpoints"),
-            ("🔍 Generating counter-perspectives", "Ethical, Empirical, Logical dimensions"),
-            ("🌐 Discovering sources", "Searching for authoritative counter-content"),
-            ("✅ Verifying quality", "Dual-pass relevance checking"),
-        ]
-        
         progress_bar = st.progress(0)
         status_placeholder = st.empty()
         
+        live_placeholder = st.empty()
+        live_lines = []
+        
+        def show_stage(stage, detail=None):
+            # `detail` is transcript text: escape it, this markdown renders HTML
+            stage_title, stage_desc = STAGE_LABELS.get(stage, (stage, ""))
+            status_placeholder.markdown(f"""
+            <div class="processing-stage">
+                <div class="stage-title">{stage_title}</div>
+                <div class="stage-desc">{html.escape(detail or stage_desc)}</div>
+            </div>
+            """, unsafe_allow_html=True)
+            if stage in STAGE_ORDER:
+                progress_bar.progress((STAGE_ORDER.index(stage) + 1) / len(STAGE_ORDER))
+        
+        def show_event(event, data):
+            # Real pipeline events: partial results appear long before the final report
+            if event == "stage":
+                show_stage(data["stage"])
+            elif event == "transcript_segment":
+                show_stage("transcribe", f"“{data['text'][:160]}…”")
+            elif event == "metadata":
+                live_lines.append(f"📺 **{data['video_title']}** · {data['channel_name']}")
+            elif event == "topic":
+                live_lines.append(f"📝 **Topic:** {data['topic']}")
+            elif event == "primary_claim":
+                live_lines.append(f"💬 **Claim:** {data['primary_claim']}")
+            elif event == "counter_argument":
+                live_lines.append(f"🧠 **{data['type']}:** {data['title']}")
+            elif event == "video_verified":
+                live_lines.append(f"✅ {data['argument_type']} source: {data['video']['title']}")
+            if live_lines:
+                live_placeholder.markdown("\n\n".join(live_lines))
+        
         try:
-            for i, (stage_title, stage_desc) in enumerate(stages):
-                status_placeholder.markdown(f"""
-                <div class="processing-stage">
-                    <div class="stage-title">{stage_title}</div>
-                    <div class="stage-desc">{stage_desc}</div>
-                </div>
-                """, unsafe_allow_html=True)
-                progress_bar.progress((i + 1) / len(stages))
-                
-                if i == 0:
-                    response = requests.post(
-                        "http://localhost:8000/analyze",
-                        json={"video_url": video_url},
-                        timeout=1200
-                    )
+            response = run_analysis_job(video_url, show_event)
             
             progress_bar.empty()
             status_placeholder.empty()
+            live_placeholder.empty()
             
             if response.status_code == 200:
                 data = response.json()
@@ -634,7 +647,7 @@ if analyze_button:
                                 else:
                                     views_str = str(views)
                                 
-                                thumbnail = video.get('thumbnail', '')
+                                thumbnail = thumbnail_src(video.get('thumbnail'))
                                 
                                 st.markdown(f"""
                                 <div class="video-card">
@@ -0,0 +1,62 @@
+"""
+Talks to the EchoBreaker API for the Streamlit frontends (app.py, ui.py and
+minimal_app.py): thumbnail URLs and analysis jobs with their progress events.
+"""
+import json
+from typing import Optional
+from urllib.parse import quote
+import requests
+
+# =============================================================================
+# THUMBNAILS
+# =============================================================================
+def thumbnail_src(url: Optional[str]) -> str:
+    """Routes a YouTube thumbnail through the API's resized, browser-cacheable proxy."""
+    if not url:
+        return ''
+    return f"http://localhost:8000/thumbnail?url={quote(url, safe='')}"
+
+# =============================================================================
+# ANALYSIS JOBS
+# =============================================================================
+STAGE_LABELS = {
+    "queued": ("⏳ Queued", "Waiting for a free analysis worker"),
+    "download": ("🎬 Extracting audio", "Downloading content from YouTube"),
+    "transcribe": ("🎤 Transcribing speech", "Whisper AI processing"),
+    "analyze": ("🧠 Analyzing arguments", "Claims, counter-perspectives and source discovery"),
+    "search": ("🌐 Discovering sources", "Searching and verifying counter-content"),
+}
+STAGE_ORDER = list(STAGE_LABELS)
+
+def _iter_sse(response: requests.Response):
+    """Yields (event, data) pairs from a server-sent events response."""
+    event, data = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+        # Lines starting with ':' are keep-alive comments
+
+def run_analysis_job(video_url: str, on_event) -> requests.Response:
+    """
+    Submits the video as a background job and follows its server-sent events,
+    calling on_event(event, data) as the pipeline produces them. Returns the
+    response of the result endpoint.
+    """
+    submitted = requests.post("http://localhost:8000/jobs", json={"video_url": video_url}, timeout=10)
+    if submitted.status_code != 202:
+        return submitted
+    job_id = submitted.json()["job_id"]
+    on_event("stage", {"stage": "queued"})
+    # The server sends a keep-alive every 15s, so a 60s read timeout means it is gone
+    with requests.get(f"http://localhost:8000/jobs/{job_id}/events", stream=True, timeout=(10, 60)) as events:
+        for event, data in _iter_sse(events):
+            if event in ("result", "error"):
+                break
+            on_event(event, data)
+    return requests.get(f"http://localhost:8000/jobs/{job_id}/result", timeout=30)
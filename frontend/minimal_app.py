@@ -2,7 +2,7 @@ import streamlit as st
 import requests
 import json
 from datetime import datetime
-from typing import Optional
+from client import STAGE_LABELS, run_analysis_job, thumbnail_src
 
 # =============================================================================
 # PAGE CONFIGURATION
@@ -290,11 +290,18 @@ if analyze_button:
         status_placeholder.info("🧠 Initializing AI Pipeline... (This involves downloading and transcribing, please wait)")
         
         try:
-            response = requests.post(
-                "http://localhost:8000/analyze",
-                json={"video_url": video_url},
-                timeout=600 
-            )
+            def show_event(event, data):
+                if event == "stage":
+                    title, desc = STAGE_LABELS.get(data["stage"], (data["stage"], ""))
+                    status_placeholder.info(f"{title}: {desc}")
+                elif event == "topic":
+                    status_placeholder.info(f"🧠 Topic: {data['topic']}")
+                elif event == "counter_argument":
+                    status_placeholder.info(f"🧠 {data['type']} counter-argument ready: {data['title']}")
+                elif event == "video_verified":
+                    status_placeholder.info(f"📺 Verified source for {data['argument_type']}: {data['video']['title']}")
+
+            response = run_analysis_job(video_url, show_event)
             
             status_placeholder.empty()
             
@@ -309,7 +316,7 @@ if analyze_button:
                         m_col1, m_col2 = st.columns([1, 2])
                         with m_col1:
                             if meta.get('thumbnail'):
-                                st.image(meta.get('thumbnail'))
+                                st.image(thumbnail_src(meta.get('thumbnail')))
                         with m_col2:
                             st.write(f"**Title:** {meta.get('video_title')}")
                             st.write(f"**Channel:** {meta.get('channel_name')}")
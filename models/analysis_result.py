@@ -28,9 +28,11 @@ class VideoSuggestion(BaseModel):
     """A video suggested as a counter-perspective."""
     title: str
     url: str
+    video_id: Optional[str] = None
     thumbnail: Optional[str] = None
     duration: Optional[int] = None
     channel_name: Optional[str] = None
+    channel_id: Optional[str] = None
     view_count: Optional[str] = None  # String format (e.g., "1.5M")
     relevance_score: Optional[float] = None
     description: Optional[str] = None
@@ -59,4 +61,7 @@ class AnalysisResult(BaseModel):
     
     counter_arguments: List[CounterArgument] = []
     confidence_score: float = 0.0
-    processed_at: Optional[str] = None
\ No newline at end of file
+    processed_at: Optional[str] = None
+    degradations: List[str] = Field([], description="Shortcuts taken to meet the request deadline")
+    error: Optional[str] = Field(None, description="Set when the LLM analysis failed or came back incomplete")
+    transcript: Optional[str] = Field(None, description="The transcript, included when the analysis did not finish before the deadline")
\ No newline at end of file
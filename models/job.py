@@ -0,0 +1,13 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class JobStatus(BaseModel):
+    """State of a background analysis job."""
+    job_id: str
+    video_url: str
+    status: str = Field(..., description="queued, running, done or failed")
+    stage: Optional[str] = Field(None, description="Pipeline stage currently running")
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
@@ -0,0 +1,60 @@
+import time
+from multiprocessing.managers import BaseManager
+from typing import Optional, Tuple
+from core.config import Config
+
+
+class ModelManager(BaseManager):
+    """Serves the Whisper model to every API worker on the box over a local socket."""
+
+
+def _authkey(authkey: Optional[str]) -> bytes:
+    """The explicit key, else WHISPER_SERVER_AUTHKEY; there is deliberately no default."""
+    authkey = authkey or Config.WHISPER_SERVER_AUTHKEY
+    if not authkey:
+        raise ValueError("The Whisper model server needs WHISPER_SERVER_AUTHKEY (api.serve generates one)")
+    return authkey.encode()
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def serve(address: Optional[str] = None, authkey: Optional[str] = None):
+    """
+    Loads Whisper once and serves it until the process is stopped. Requests from
+    all workers are handled one at a time by the model, as in a single process.
+    Defaults to WHISPER_SERVER_ADDRESS and WHISPER_SERVER_AUTHKEY.
+    """
+    address = address or Config.WHISPER_SERVER_ADDRESS
+    key = _authkey(authkey)
+    from services.audio.whisper_model import WhisperModel
+    model = WhisperModel()
+    ModelManager.register("whisper", callable=lambda: model)
+    server = ModelManager(address=parse_address(address), authkey=key).get_server()
+    print(f"🎙️ Whisper model server listening on {address}")
+    server.serve_forever()
+
+
+def connect(address: Optional[str] = None, authkey: Optional[str] = None, timeout: float = 0):
+    """
+    A proxy to the served WhisperModel (same methods). Retries for up to `timeout`
+    seconds while the server is still loading the model.
+    """
+    address = address or Config.WHISPER_SERVER_ADDRESS
+    ModelManager.register("whisper")
+    manager = ModelManager(address=parse_address(address), authkey=_authkey(authkey))
+    give_up_at = time.monotonic() + timeout
+    while True:
+        try:
+            manager.connect()
+            return manager.whisper()
+        except (ConnectionRefusedError, FileNotFoundError):
+            if time.monotonic() >= give_up_at:
+                raise
+            time.sleep(0.5)
+
+
+if __name__ == "__main__":
+    serve()
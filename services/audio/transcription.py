@@ -1,33 +1,108 @@
 import os
-import whisper
 import asyncio
+from typing import Callable, Optional
 from concurrent.futures import ThreadPoolExecutor
+from core.config import Config
+from core.metrics import skip_sample
+from core.tracing import in_context
+from services.search.cache import make_cache
 
 class TranscriptionService:
-    def __init__(self):
-        # Load the model once at initialization
-        # Use CUDA if available, otherwise fallback to CPU
-        import torch
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Loading Whisper model (tiny) on {device}...")
-        self.model = whisper.load_model("tiny", device=device)
+    def __init__(self, model=None):
+        # With WHISPER_SERVER_ADDRESS the model lives in the shared model server and this
+        # process never imports whisper or torch; otherwise it is loaded here, once
+        if model is None and Config.WHISPER_SERVER_ADDRESS:
+            from services.audio.model_server import connect
+            print(f"Connecting to Whisper model server at {Config.WHISPER_SERVER_ADDRESS}...")
+            model = connect(timeout=Config.WHISPER_SERVER_CONNECT_TIMEOUT)
+        elif model is None:
+            from services.audio.whisper_model import WhisperModel
+            model = WhisperModel("tiny")
+        self.model = model
         self._executor = ThreadPoolExecutor(max_workers=1)
+        # Transcripts by video ID, filled by analyses and by the background prefetcher
+        self._transcripts = make_cache("transcripts", Config.TRANSCRIPT_CACHE_SIZE, Config.TRANSCRIPT_CACHE_TTL)
 
-    async def transcribe_file(self, audio_file_path: str) -> str:
+    def _transcribe(self, audio_file_path: str, cache_key: Optional[str], max_seconds: Optional[int] = None) -> str:
+        text = self.model.transcribe(audio_file_path, max_seconds)
+        if cache_key and text:
+            self._transcripts.set(cache_key, text)
+        return text
+
+    def _transcribe_segments(self, audio_file_path: str, cache_key: Optional[str],
+                             on_segment: Callable[[dict], None], max_seconds: Optional[int] = None) -> str:
+        """
+        Transcribes in TRANSCRIBE_CHUNK_SECONDS windows and reports each one as soon as
+        it is done. The tail of the previous text is passed as the initial prompt so
+        the chunks keep their context across boundaries.
+        """
+        texts = []
+        index = 0
+        while True:
+            previous = " ".join(texts)[-200:]
+            segment = self.model.transcribe_chunk(
+                audio_file_path, index, Config.TRANSCRIBE_CHUNK_SECONDS, max_seconds, previous or None
+            )
+            if segment is None:
+                break
+            index += 1
+            if not segment["text"]:
+                continue
+            texts.append(segment["text"])
+            on_segment(segment)
+
+        text = " ".join(texts)
+        if cache_key and text:
+            self._transcripts.set(cache_key, text)
+        return text
+
+    def prefetch_file(self, audio_file_path: str, cache_key: str):
+        """
+        Transcribes a prefetched file into the cache. Blocks the calling (background)
+        thread; runs on the same single Whisper worker as foreground requests.
+        """
+        if self._transcripts.get(cache_key) is None:
+            self._executor.submit(self._transcribe, audio_file_path, cache_key).result()
+
+    async def transcribe_file(self, audio_file_path: str, cache_key: Optional[str] = None,
+                              on_segment: Optional[Callable[[dict], None]] = None,
+                              max_seconds: Optional[int] = None) -> str:
         """
         Transcribes an audio file locally using Whisper.
         Runs the blocking Whisper call in a separate thread to avoid blocking the asyncio loop.
+        With a `cache_key` (the video ID) a cached transcript is returned without running Whisper.
+        With `on_segment` the audio is transcribed in chunks and each finished chunk is
+        passed to it (from the Whisper worker thread).
+        With `max_seconds` only the start of the audio is transcribed (a cached full
+        transcript is still used, and the shortened one is not cached).
         """
+        cached = self._transcripts.get(cache_key) if cache_key else None
+        if cached:
+            print(f"DEBUG: Transcript cache hit for {cache_key}")
+            skip_sample()
+            return cached
+
         if not os.path.exists(audio_file_path):
             raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
 
         loop = asyncio.get_running_loop()
+        if max_seconds:
+            cache_key = None
         
         # Whisper transcribe is blocking, run in executor
-        result = await loop.run_in_executor(
+        if on_segment is not None:
+            return await loop.run_in_executor(
+                self._executor, in_context(self._transcribe_segments),
+                audio_file_path, cache_key, on_segment, max_seconds
+            )
+        return await loop.run_in_executor(
             self._executor, 
-            self.model.transcribe, 
-            audio_file_path
+            in_context(self._transcribe), 
+            audio_file_path,
+            cache_key,
+            max_seconds
         )
-        
-        return result["text"]
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the transcript cache."""
+        return self._transcripts.stats()
@@ -0,0 +1,67 @@
+import threading
+import whisper
+from collections import OrderedDict
+from typing import Optional
+
+# Decoded audio of the files currently being transcribed chunk by chunk
+_MAX_LOADED_FILES = 4
+
+
+class WhisperModel:
+    """
+    The Whisper model and the few audio files it is working on. Runs one
+    transcription at a time; used in-process by TranscriptionService or shared by
+    all API workers through the model server.
+    """
+
+    def __init__(self, name: str = "tiny"):
+        # Use CUDA if available, otherwise fallback to CPU
+        import torch
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        print(f"Loading Whisper model ({name}) on {device}...")
+        self.model = whisper.load_model(name, device=device)
+        self._lock = threading.Lock()
+        self._loaded: "OrderedDict[tuple, object]" = OrderedDict()
+
+    def _samples(self, audio_file_path: str, max_seconds: Optional[int]):
+        """Decoded audio (its first `max_seconds` if set), kept while its chunks are transcribed."""
+        key = (audio_file_path, max_seconds)
+        audio = self._loaded.get(key)
+        if audio is None:
+            audio = whisper.load_audio(audio_file_path)
+            if max_seconds:
+                audio = audio[:max_seconds * whisper.audio.SAMPLE_RATE]
+            self._loaded[key] = audio
+            while len(self._loaded) > _MAX_LOADED_FILES:
+                self._loaded.popitem(last=False)
+        return audio
+
+    def transcribe(self, audio_file_path: str, max_seconds: Optional[int] = None) -> str:
+        """Text of the whole file, or of its first `max_seconds`."""
+        with self._lock:
+            audio = self._samples(audio_file_path, max_seconds) if max_seconds else audio_file_path
+            text = self.model.transcribe(audio)["text"]
+            self._loaded.pop((audio_file_path, max_seconds), None)
+            return text
+
+    def transcribe_chunk(self, audio_file_path: str, index: int, chunk_seconds: int,
+                         max_seconds: Optional[int] = None, initial_prompt: Optional[str] = None) -> Optional[dict]:
+        """
+        Transcribes the `index`-th window of `chunk_seconds`; None once past the end
+        of the audio. Returns index, start, end (seconds) and the stripped text.
+        """
+        with self._lock:
+            audio = self._samples(audio_file_path, max_seconds)
+            sample_rate = whisper.audio.SAMPLE_RATE
+            step = chunk_seconds * sample_rate
+            offset = index * step
+            if offset >= len(audio):
+                self._loaded.pop((audio_file_path, max_seconds), None)
+                return None
+            result = self.model.transcribe(audio[offset:offset + step], initial_prompt=initial_prompt)
+            return {
+                "index": index,
+                "start": offset / sample_rate,
+                "end": min(offset + step, len(audio)) / sample_rate,
+                "text": result["text"].strip(),
+            }
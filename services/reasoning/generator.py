@@ -1,60 +1,20 @@
-import os
 import json
-import ollama
+import time
 import urllib.parse
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from core.config import Config
+from core.log import get_logger
+from core.tracing import in_context
 from models.analysis_result import AnalysisResult, CounterArgument
 from pydantic import ValidationError
+from services.reasoning.stream_parser import IncrementalJSONParser
+from services.reasoning.router import LLMRouter
+from services.reasoning.task_stats import TaskLatencyStats
 
-# #region agent log
-LOG_PATH = r"e:\3. projects\EchoBreaker\.cursor\debug.log"
-
-def _log(session_id, run_id, hypothesis_id, location, message, data):
-    try:
-        import time
-        log_entry = {
-            "sessionId": session_id, 
-            "runId": run_id, 
-            "hypothesisId": hypothesis_id, 
-            "location": location, 
-            "message": message, 
-            "data": data, 
-            "timestamp": int(time.time() * 1000)
-        }
-        if os.path.exists(os.path.dirname(LOG_PATH)):
-            with open(LOG_PATH, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(log_entry) + "\n")
-                f.flush()
-                os.fsync(f.fileno())
-        
-        print(f"[DEBUG LOG] {location}: {message}")
-    except Exception as ex:
-        print(f"[DEBUG LOG ERROR] Failed to write log: {ex}")
-# #endregion
-
-class ReasoningEngine:
-    def __init__(self):
-        self.model = Config.OLLAMA_MODEL
+log = get_logger(__name__)
 
-    def _extract_json(self, content: str) -> str:
-        """Extracts JSON object from potential LLM conversational filler."""
-        try:
-            start = content.find('{')
-            end = content.rfind('}')
-            if start != -1 and end != -1:
-                return content[start : end + 1]
-            return content
-        except Exception:
-            return content
-
-    def generate_analysis(self, transcript: str, video_url: str) -> AnalysisResult:
-        """
-        Analyzes transcripts to generate diametrically opposed counter-arguments.
-        Synchronized with AnalysisResult Pydantic model.
-        """
-        
-        system_prompt = """
+ANALYSIS_SYSTEM_PROMPT = """
 You are EchoBreaker, an AI specialized in breaking algorithmic echo chambers.
 Analyze the transcript and provide high-quality, intellectually diverse counter-perspectives.
 
@@ -87,6 +47,167 @@ to find results (e.g., 'critique of [topic]' or '[topic] alternative view').
 4. Return ONLY the raw JSON object. No markdown, no preamble.
 """
 
+COUNTER_ARGUMENT_TYPES = ["Ethical", "Empirical", "Logical"]
+
+EXTRACTION_SYSTEM_PROMPT = """
+You are EchoBreaker, an AI specialized in breaking algorithmic echo chambers.
+Read the transcript and extract only what the video argues.
+
+**MANDATORY JSON STRUCTURE**:
+{
+  "topic": "3-5 words summarizing the core subject",
+  "primary_claim": "2-3 sentences summarizing the video's main argument",
+  "confidence_score": 0.0 to 1.0
+}
+Return ONLY the raw JSON object. No markdown, no preamble.
+"""
+
+COUNTER_ARGUMENT_SYSTEM_PROMPT = """
+You are EchoBreaker, an AI specialized in breaking algorithmic echo chambers.
+Write ONE high-quality counter-argument of the requested type against the video's thesis.
+
+**MANDATORY JSON STRUCTURE**:
+{
+  "title": "Clear title of the opposing view",
+  "content": "2-3 sentences explaining why this perspective contradicts the video",
+  "youtube_query": "Search terms for finding opposing documentaries/debates",
+  "academic_search_query": "Specific terminology for Google Scholar",
+  "academic_insight": "150-word sophisticated academic analysis with theoretical references"
+}
+Generate a 'youtube_query' that is broad enough to find results
+(e.g., 'critique of [topic]' or '[topic] alternative view').
+
+**RULES**:
+1. The counter-argument must be diametrically opposed to the video's thesis.
+2. ACADEMIC_INSIGHT must be a cohesive paragraph (no bullets) and cite a theoretical framework (e.g., Ref: Rawls' Theory of Justice).
+3. Return ONLY the raw JSON object. No markdown, no preamble.
+"""
+
+VERIFICATION_SYSTEM_PROMPT = """
+Check if the video is a valid COUNTER-PERSPECTIVE for the target argument.
+
+Return JSON:
+{
+  "score": 0.0 to 1.0,
+  "verdict": "accept" or "reject",
+  "reason": "1 sentence explanation"
+}
+"""
+
+# Static system prompt per task. Keeping them byte-identical between calls (and putting
+# every variable part after them) lets Ollama reuse the evaluated prefix from its KV cache.
+TASK_SYSTEM_PROMPTS = {
+    "analysis": ANALYSIS_SYSTEM_PROMPT,
+    "extraction": EXTRACTION_SYSTEM_PROMPT,
+    "verification": VERIFICATION_SYSTEM_PROMPT,
+}
+
+class ReasoningEngine:
+    def __init__(self):
+        # Model tier per task: the cheap, high-volume calls can use a much smaller model
+        self.models = {
+            "analysis": Config.OLLAMA_ANALYSIS_MODEL,
+            "extraction": Config.OLLAMA_EXTRACTION_MODEL,
+            "verification": Config.OLLAMA_VERIFY_MODEL,
+        }
+        self.model = self.models["analysis"]
+        self.router = LLMRouter(Config.OLLAMA_BACKENDS)
+        self.task_stats = TaskLatencyStats()
+        # One request per counter-argument type; Ollama serves them concurrently
+        # when started with OLLAMA_NUM_PARALLEL >= ANALYSIS_PARALLELISM.
+        self._executor = ThreadPoolExecutor(max_workers=Config.ANALYSIS_PARALLELISM)
+
+    def _chat(self, task: str, prefix_key: Optional[str] = None, **kwargs) -> Any:
+        """
+        Runs a chat call on the model tier configured for `task` and records its latency.
+        Every call carries the same keep_alive and num_ctx, so Ollama neither unloads the
+        model between requests nor reloads it because the context size changed, and the
+        cached prompt prefix stays valid. `prefix_key` pins calls sharing a prefix to the
+        backend that already holds it.
+        """
+        options = {'num_ctx': Config.OLLAMA_NUM_CTX}
+        options.update(kwargs.pop('options', None) or {})
+        prompt_chars = sum(len(m.get('content', '')) for m in kwargs.get('messages', []))
+
+        started = time.perf_counter()
+        try:
+            response = self.router.chat(
+                model=self.models[task],
+                keep_alive=Config.OLLAMA_KEEP_ALIVE,
+                options=options,
+                prefix_key=prefix_key or task,
+                **kwargs
+            )
+        except Exception:
+            self.task_stats.record(task, time.perf_counter() - started, ok=False)
+            raise
+        if kwargs.get('stream'):
+            return self._timed_stream(task, started, response, prompt_chars)
+        self.task_stats.record(task, time.perf_counter() - started)
+        self._record_prompt_eval(task, response, prompt_chars)
+        return response
+
+    def _timed_stream(self, task: str, started: float, stream: Iterator, prompt_chars: int) -> Iterator:
+        ok = False
+        last = None
+        try:
+            for chunk in stream:
+                last = chunk
+                yield chunk
+            ok = True
+        finally:
+            self.task_stats.record(task, time.perf_counter() - started, ok=ok)
+            if ok and last is not None:
+                # Ollama reports prompt evaluation counters on the final chunk
+                self._record_prompt_eval(task, last, prompt_chars)
+
+    def _record_prompt_eval(self, task: str, response: Any, prompt_chars: int):
+        try:
+            eval_count = response.get('prompt_eval_count')
+            eval_ns = response.get('prompt_eval_duration')
+        except Exception:
+            return
+        if eval_count is not None and eval_ns is not None:
+            self.task_stats.record_prompt_eval(task, prompt_chars, eval_count, eval_ns)
+
+    def warm_up(self):
+        """
+        Loads every configured model on every backend and evaluates each task's static
+        system prompt once, so the first real request starts from a cached prefix.
+        """
+        for task, model in self.models.items():
+            for backend in self.router.backends:
+                try:
+                    backend.client.chat(
+                        model=model,
+                        messages=[
+                            {'role': 'system', 'content': TASK_SYSTEM_PROMPTS[task]},
+                            {'role': 'user', 'content': 'Ready?'},
+                        ],
+                        keep_alive=Config.OLLAMA_KEEP_ALIVE,
+                        options={'num_ctx': Config.OLLAMA_NUM_CTX, 'num_predict': 1},
+                    )
+                    print(f"🔥 Warmed {model} ({task}) on {backend.url}")
+                except Exception as e:
+                    print(f"⚠️ Warm-up of {model} on {backend.url} failed: {e}")
+
+    def get_task_stats(self) -> Dict[str, Any]:
+        """Per-task model and latency percentiles, for comparing model tiers."""
+        return self.task_stats.snapshot(self.models)
+
+    def _extract_json(self, content: str) -> str:
+        """Extracts JSON object from potential LLM conversational filler."""
+        try:
+            start = content.find('{')
+            end = content.rfind('}')
+            if start != -1 and end != -1:
+                return content[start : end + 1]
+            return content
+        except Exception:
+            return content
+
+    def _build_analysis_messages(self, transcript: str, video_url: str) -> List[Dict[str, str]]:
+        """Builds the chat messages shared by the blocking and streaming analysis modes."""
         user_prompt = f"""
 Transcript:
 {transcript[:20000]} 
@@ -95,87 +216,272 @@ Video URL: {video_url}
 
 Generate the analysis following the mandatory JSON structure. Ensure the 'topic' and 'primary_claim' are accurately extracted from the content provided.
 """
+        return [
+            {'role': 'system', 'content': ANALYSIS_SYSTEM_PROMPT},
+            {'role': 'user', 'content': user_prompt},
+        ]
 
+    def _normalize_counter_argument(self, ca: Dict[str, Any]) -> Dict[str, Any]:
+        """Fills missing search queries and attaches the Google Scholar link."""
+        # Ensure queries exist for the Search Service
+        if not ca.get("youtube_query"):
+            ca["youtube_query"] = f"{ca.get('title', 'Opposing view')} debate"
+        
+        if not ca.get("academic_search_query"):
+            ca["academic_search_query"] = ca.get("title", "academic research")
+
+        # Generate Google Scholar link for the UI
+        query_term = ca.get("academic_search_query")
+        safe_query = urllib.parse.quote(query_term)
+        ca["source_reference"] = f"https://scholar.google.com/scholar?q={safe_query}"
+        return ca
+
+    def _build_counter_argument(self, ca: Any) -> Optional[CounterArgument]:
+        """Validates a single streamed counter-argument object."""
+        if not isinstance(ca, dict):
+            return None
         try:
-            _log("analysis", "gen", "1", "generator.py", "Requesting LLM analysis", {"model": self.model})
+            return CounterArgument(**self._normalize_counter_argument(ca))
+        except ValidationError as e:
+            log.warning("Invalid counter-argument", extra={"data": {"error": str(e)}})
+            return None
+
+    def _apply_field_fallbacks(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Ensures the fields the UI depends on are never empty."""
+        # Ensure 'topic' is present (prevents "Analysis pending" in UI)
+        if not data.get("topic") or data.get("topic") == "Analysis pending":
+            data["topic"] = "General Topic Analysis"
+        
+        # Ensure 'primary_claim' is present
+        if not data.get("primary_claim"):
+            data["primary_claim"] = "The video presents an argument regarding the topic mentioned above."
+        return data
+
+    def _error_result(self, error: str) -> AnalysisResult:
+        # Ultimate Fallback to prevent UI crash; `error` keeps it out of the result store
+        return AnalysisResult(
+            topic="Error in Analysis",
+            primary_claim="The system encountered an error while processing the transcript.",
+            counter_arguments=[],
+            confidence_score=0.0,
+            error=error
+        )
+
+    def generate_analysis(self, transcript: str, video_url: str) -> AnalysisResult:
+        """
+        Analyzes transcripts to generate diametrically opposed counter-arguments.
+        Synchronized with AnalysisResult Pydantic model.
+        """
+        try:
+            log.info("Requesting LLM analysis", extra={"data": {"mode": "single", "model": self.model}})
             
-            response = ollama.chat(model=self.model, messages=[
-                {'role': 'system', 'content': system_prompt},
-                {'role': 'user', 'content': user_prompt},
-            ], format='json')
+            response = self._chat(
+                "analysis",
+                messages=self._build_analysis_messages(transcript, video_url),
+                format='json'
+            )
 
             content = response['message']['content']
             json_str = self._extract_json(content)
             data = json.loads(json_str)
             
             # --- Field Synchronization & Fallbacks ---
-            # Ensure 'topic' is present (prevents "Analysis pending" in UI)
-            if not data.get("topic") or data.get("topic") == "Analysis pending":
-                data["topic"] = "General Topic Analysis"
-            
-            # Ensure 'primary_claim' is present
-            if not data.get("primary_claim"):
-                data["primary_claim"] = "The video presents an argument regarding the topic mentioned above."
+            data = self._apply_field_fallbacks(data)
 
             # Process Counter-Arguments
             if "counter_arguments" in data:
-                for idx, ca in enumerate(data["counter_arguments"]):
-                    # Ensure queries exist for the Search Service
-                    if not ca.get("youtube_query"):
-                        ca["youtube_query"] = f"{ca.get('title', 'Opposing view')} debate"
-                    
-                    if not ca.get("academic_search_query"):
-                        ca["academic_search_query"] = ca.get("title", "academic research")
-
-                    # Generate Google Scholar link for the UI
-                    query_term = ca.get("academic_search_query")
-                    safe_query = urllib.parse.quote(query_term)
-                    ca["source_reference"] = f"https://scholar.google.com/scholar?q={safe_query}"
+                for ca in data["counter_arguments"]:
+                    self._normalize_counter_argument(ca)
 
             # Validate against Pydantic Model
             result = AnalysisResult(**data)
             return result
 
         except Exception as e:
-            _log("analysis", "gen", "error", "generator.py", "Critical LLM Error", {"error": str(e)})
-            # Ultimate Fallback to prevent UI crash
-            return AnalysisResult(
-                topic="Error in Analysis",
-                primary_claim="The system encountered an error while processing the transcript.",
-                counter_arguments=[],
-                confidence_score=0.0
+            log.error("Critical LLM error", extra={"data": {"mode": "single", "error": str(e)}})
+            return self._error_result(str(e))
+
+    def stream_analysis(self, transcript: str, video_url: str) -> Iterator[Tuple[str, Any]]:
+        """
+        Streaming variant of generate_analysis.
+        Consumes Ollama's token stream and yields ("topic", str), ("primary_claim", str)
+        and ("counter_argument", CounterArgument) events as soon as each value is complete,
+        so downstream searches can start while the model is still writing.
+        Always finishes with a ("result", AnalysisResult) event whose counter_arguments
+        are the same objects that were yielded earlier.
+        """
+        parser = IncrementalJSONParser()
+        data: Dict[str, Any] = {}
+        counter_arguments: List[CounterArgument] = []
+
+        try:
+            log.info("Requesting streamed LLM analysis", extra={"data": {"mode": "stream", "model": self.model}})
+
+            stream = self._chat(
+                "analysis",
+                messages=self._build_analysis_messages(transcript, video_url),
+                format='json',
+                stream=True
             )
 
-    def verify_relevance(self, video_data: Any, argument_content: str) -> dict:
+            for chunk in stream:
+                for event in parser.feed(chunk['message']['content']):
+                    if event.kind == "item" and event.key == "counter_arguments":
+                        argument = self._build_counter_argument(event.value)
+                        if argument:
+                            counter_arguments.append(argument)
+                            yield ("counter_argument", argument)
+                    elif event.kind == "field" and event.key != "counter_arguments":
+                        data[event.key] = event.value
+                        if event.key in ("topic", "primary_claim") and event.value:
+                            yield (event.key, event.value)
+
+            # The incremental parser only sees well-formed objects; fall back to a
+            # full parse if the stream ended without producing the core fields.
+            if not parser.done or not data.get("topic"):
+                try:
+                    full = json.loads(self._extract_json(parser.text))
+                except json.JSONDecodeError:
+                    full = {}
+                for key, value in full.items():
+                    data.setdefault(key, value)
+                if not counter_arguments:
+                    for ca in full.get("counter_arguments") or []:
+                        argument = self._build_counter_argument(ca)
+                        if argument:
+                            counter_arguments.append(argument)
+
+            data = self._apply_field_fallbacks(data)
+            data.pop("counter_arguments", None)
+            result = AnalysisResult(**data, counter_arguments=counter_arguments)
+
+        except Exception as e:
+            log.error("Critical LLM error", extra={"data": {"mode": "stream", "error": str(e)}})
+            result = self._error_result(str(e))
+            result.counter_arguments = counter_arguments
+
+        yield ("result", result)
+
+    def _extract_topic_and_claim(self, transcript: str, video_url: str) -> Dict[str, Any]:
+        """Short first pass of the parallel mode: topic, primary claim and confidence only."""
+        user_prompt = f"""
+Transcript:
+{transcript[:20000]} 
+
+Video URL: {video_url}
+
+Extract the topic and primary claim following the mandatory JSON structure.
+"""
+        response = self._chat("extraction", messages=[
+            {'role': 'system', 'content': EXTRACTION_SYSTEM_PROMPT},
+            {'role': 'user', 'content': user_prompt},
+        ], format='json')
+        return json.loads(self._extract_json(response['message']['content']))
+
+    def _generate_counter_argument(self, argument_type: str, topic: str, primary_claim: str,
+                                   transcript: str) -> Optional[CounterArgument]:
+        """Generates a single counter-argument of the given type."""
+        user_prompt = f"""
+Topic: {topic}
+Primary Claim: {primary_claim}
+
+Transcript excerpt:
+{transcript[:4000]}
+
+Write the '{argument_type}' counter-argument following the mandatory JSON structure.
+"""
+        try:
+            response = self._chat("analysis", messages=[
+                {'role': 'system', 'content': COUNTER_ARGUMENT_SYSTEM_PROMPT},
+                {'role': 'user', 'content': user_prompt},
+            ], format='json')
+            data = json.loads(self._extract_json(response['message']['content']))
+            if isinstance(data, dict):
+                data["type"] = argument_type
+            return self._build_counter_argument(data)
+        except Exception as e:
+            log.error("Counter-argument generation failed",
+                      extra={"data": {"mode": "parallel", "type": argument_type, "error": str(e)}})
+            return None
+
+    def stream_parallel_analysis(self, transcript: str, video_url: str,
+                                 argument_types: Optional[List[str]] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Parallel variant of generate_analysis.
+        Extracts topic and claim with a short prompt, then generates the Ethical, Empirical
+        and Logical counter-arguments (or only `argument_types`) as concurrent requests, so
+        total time is roughly that of the longest single argument. Yields the same events
+        as stream_analysis, with counter-arguments in completion order and the final
+        result in type order.
+        """
+        argument_types = argument_types or COUNTER_ARGUMENT_TYPES
+        try:
+            log.info("Requesting topic extraction", extra={"data": {"mode": "parallel", "model": self.models["extraction"]}})
+            data = self._apply_field_fallbacks(self._extract_topic_and_claim(transcript, video_url))
+        except Exception as e:
+            log.error("Critical LLM error", extra={"data": {"mode": "parallel", "error": str(e)}})
+            yield ("result", self._error_result(str(e)))
+            return
+
+        yield ("topic", data["topic"])
+        yield ("primary_claim", data["primary_claim"])
+
+        futures = {
+            self._executor.submit(
+                in_context(self._generate_counter_argument), argument_type, data["topic"], data["primary_claim"], transcript
+            ): argument_type
+            for argument_type in argument_types
+        }
+        by_type: Dict[str, CounterArgument] = {}
+        for future in as_completed(futures):
+            argument = future.result()
+            if argument:
+                by_type[futures[future]] = argument
+                yield ("counter_argument", argument)
+
+        data.pop("counter_arguments", None)
+        try:
+            result = AnalysisResult(
+                **data,
+                counter_arguments=[by_type[t] for t in argument_types if t in by_type]
+            )
+        except ValidationError as e:
+            log.error("Invalid analysis fields", extra={"data": {"mode": "parallel", "error": str(e)}})
+            result = self._error_result(str(e))
+            result.counter_arguments = [by_type[t] for t in argument_types if t in by_type]
+        missing = [t for t in argument_types if t not in by_type]
+        if missing and not result.error:
+            result.error = f"Counter-argument generation failed for: {', '.join(missing)}"
+        yield ("result", result)
+
+    def verify_relevance(self, counter_argument_content: str, video_title: str, video_description: str = "") -> dict:
         """
         Verifies if a found YouTube video is truly relevant to the counter-argument.
+        Runs on the "verification" model tier, which can be a small 1-3B model.
         """
-        # Note: video_data is usually a VideoSuggestion object
-        video_title = getattr(video_data, 'title', 'Unknown')
-        video_desc = getattr(video_data, 'description', '')
+        video_desc = video_description or ''
 
-        verification_prompt = f"""
-Check if this video is a valid COUNTER-PERSPECTIVE for the argument below.
+        # Argument first, video last: every video checked against the same argument
+        # shares the system prompt + argument prefix with the previous call.
+        verification_prompt = f"""Target Argument: {counter_argument_content}
 
-Target Argument: {argument_content}
 Video Title: {video_title}
 Video Description: {video_desc[:300]}
-
-Return JSON:
-{{
-  "score": 0.0 to 1.0,
-  "verdict": "accept" or "reject",
-  "reason": "1 sentence explanation"
-}}
 """
 
         try:
-            response = ollama.chat(model=self.model, messages=[
-                {'role': 'user', 'content': verification_prompt}
-            ], format='json')
+            response = self._chat(
+                "verification",
+                prefix_key=f"verification:{hash(counter_argument_content)}",
+                messages=[
+                    {'role': 'system', 'content': VERIFICATION_SYSTEM_PROMPT},
+                    {'role': 'user', 'content': verification_prompt}
+                ],
+                format='json'
+            )
             
             result = json.loads(self._extract_json(response['message']['content']))
             return result
         except Exception:
             # Fallback: Accept with a medium score to avoid empty results
-            return {"score": 0.7, "verdict": "accept", "reason": "Default acceptance"}
\ No newline at end of file
+            return {"score": 0.7, "verdict": "accept", "reason": "Default acceptance", "fallback": True}
\ No newline at end of file
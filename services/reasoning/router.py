@@ -0,0 +1,165 @@
+import time
+import threading
+import ollama
+from typing import Any, Dict, Iterator, List, Optional
+from core.config import Config
+from core.tracing import Span, start_span
+
+
+class LLMBackend:
+    """One Ollama instance plus the load and health statistics used for routing."""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.client = ollama.Client(host=url, timeout=timeout)
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None  # Seconds, smoothed over recent calls
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self.total_requests = 0
+        self.total_failures = 0
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.unhealthy_until
+
+    def load_score(self, default_latency: float) -> float:
+        """Expected wait if we add one more request: queue depth times recent latency."""
+        latency = self.latency_ewma if self.latency_ewma is not None else default_latency
+        return (self.in_flight + 1) * latency
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.is_healthy(time.monotonic()),
+            "in_flight": self.in_flight,
+            "latency_ewma_s": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "total_requests": self.total_requests,
+            "total_failures": self.total_failures,
+        }
+
+
+class LLMRouter:
+    """
+    Spreads ollama.chat calls across several Ollama backends.
+    Each call goes to the healthy backend with the lowest expected wait
+    (in-flight requests weighted by recent latency). A backend that times out
+    or errors is put on cooldown and the call is retried on another one.
+    """
+
+    def __init__(self, backend_urls: Optional[List[str]] = None,
+                 timeout: float = Config.OLLAMA_TIMEOUT,
+                 cooldown: float = Config.OLLAMA_BACKEND_COOLDOWN,
+                 max_attempts: Optional[int] = None):
+        urls = backend_urls or Config.OLLAMA_BACKENDS
+        self.backends = [LLMBackend(url, timeout) for url in urls]
+        self.cooldown = cooldown
+        self.max_attempts = max_attempts or len(self.backends)
+        self._lock = threading.Lock()
+        self._alpha = 0.3  # EWMA weight of the newest latency sample
+        # Prompt-prefix key -> backend that last served it (its KV cache holds that prefix)
+        self._affinity: Dict[str, LLMBackend] = {}
+        self._affinity_limit = 1024
+
+    def _acquire(self, tried: List[LLMBackend], prefix_key: Optional[str] = None) -> LLMBackend:
+        with self._lock:
+            now = time.monotonic()
+            candidates = [b for b in self.backends if b not in tried] or list(self.backends)
+            healthy = [b for b in candidates if b.is_healthy(now)]
+            if healthy:
+                # Backends without samples yet are assumed to be as fast as the average one
+                measured = [b.latency_ewma for b in self.backends if b.latency_ewma is not None]
+                default_latency = sum(measured) / len(measured) if measured else 1.0
+                backend = min(healthy, key=lambda b: b.load_score(default_latency))
+                # Stay on the backend that already cached this prefix unless it is
+                # clearly busier than the best alternative.
+                preferred = self._affinity.get(prefix_key) if prefix_key else None
+                if preferred in healthy and \
+                        preferred.load_score(default_latency) <= 2 * backend.load_score(default_latency):
+                    backend = preferred
+            else:
+                # Everything is cooling down: try the one that recovers first
+                backend = min(candidates, key=lambda b: b.unhealthy_until)
+            backend.in_flight += 1
+            backend.total_requests += 1
+            if prefix_key:
+                if len(self._affinity) >= self._affinity_limit and prefix_key not in self._affinity:
+                    self._affinity.pop(next(iter(self._affinity)))
+                self._affinity[prefix_key] = backend
+            return backend
+
+    def _release(self, backend: LLMBackend, started: float, ok: bool):
+        with self._lock:
+            backend.in_flight -= 1
+            if ok:
+                elapsed = time.monotonic() - started
+                if backend.latency_ewma is None:
+                    backend.latency_ewma = elapsed
+                else:
+                    backend.latency_ewma = self._alpha * elapsed + (1 - self._alpha) * backend.latency_ewma
+                backend.consecutive_failures = 0
+                backend.unhealthy_until = 0.0
+            else:
+                backend.consecutive_failures += 1
+                backend.total_failures += 1
+                # Back off harder on backends that keep failing
+                penalty = self.cooldown * min(2 ** (backend.consecutive_failures - 1), 8)
+                backend.unhealthy_until = time.monotonic() + penalty
+
+    def chat(self, prefix_key: Optional[str] = None, **kwargs) -> Any:
+        """
+        Drop-in replacement for ollama.chat.
+        With stream=True the first chunk is awaited before returning, so a backend
+        that fails to start streaming is still retried on another backend.
+        Calls with the same `prefix_key` prefer the same backend to reuse its prompt cache.
+        """
+        tried: List[LLMBackend] = []
+        last_error: Optional[Exception] = None
+
+        for _ in range(self.max_attempts):
+            backend = self._acquire(tried, prefix_key)
+            tried.append(backend)
+            started = time.monotonic()
+            # Streamed responses keep the span open until the stream is consumed
+            span = start_span("ollama.chat", model=kwargs.get('model'), backend=backend.url,
+                              stream=bool(kwargs.get('stream')))
+            try:
+                response = backend.client.chat(**kwargs)
+                if not kwargs.get('stream'):
+                    self._release(backend, started, ok=True)
+                    if span:
+                        span.end()
+                    return response
+                stream = iter(response)
+                first = next(stream, None)
+            except Exception as e:
+                self._release(backend, started, ok=False)
+                if span:
+                    span.end(e)
+                print(f"⚠️ LLM backend {backend.url} failed ({type(e).__name__}: {e}). Retrying elsewhere.")
+                last_error = e
+                continue
+            return self._track_stream(backend, started, first, stream, span)
+
+        raise last_error or RuntimeError("No LLM backend available")
+
+    def _track_stream(self, backend: LLMBackend, started: float, first: Any, stream: Iterator,
+                      span: Optional[Span] = None) -> Iterator:
+        ok = False
+        try:
+            if first is not None:
+                yield first
+            for chunk in stream:
+                yield chunk
+            ok = True
+        except GeneratorExit:
+            # The consumer stopped reading; that says nothing about backend health
+            ok = True
+            raise
+        finally:
+            self._release(backend, started, ok=ok)
+            if span:
+                span.end(None if ok else RuntimeError("stream failed"))
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [b.stats() for b in self.backends]
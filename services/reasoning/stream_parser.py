@@ -0,0 +1,120 @@
+import json
+from typing import Any, List, NamedTuple, Optional
+
+
+class ParseEvent(NamedTuple):
+    """A value that became syntactically complete while streaming."""
+    kind: str            # "field" for top-level keys, "item" for objects inside a top-level array
+    key: str
+    value: Any
+    index: Optional[int] = None
+
+
+class IncrementalJSONParser:
+    """
+    Scans a JSON object as it is streamed token by token.
+
+    Top-level fields are reported as soon as their value is closed, and objects
+    inside top-level arrays (e.g. each counter-argument) are reported as soon as
+    their closing brace arrives, long before the whole document is finished.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._in_value = False
+        self._value_start: Optional[int] = None
+        self._value_is_array = False
+        self._item_start: Optional[int] = None
+        self._item_index = 0
+        self.done = False
+
+    def feed(self, chunk: str) -> List[ParseEvent]:
+        """Consumes the next chunk of model output and returns newly completed values."""
+        events: List[ParseEvent] = []
+        if not chunk or self.done:
+            return events
+
+        self.text += chunk
+        text = self.text
+
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = self._loads(text[self._key_start:i + 1])
+                        self._key_start = None
+                continue
+
+            # Ignore any conversational filler before the root object
+            if self._depth == 0:
+                if ch == '{':
+                    self._depth = 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if not self._in_value:
+                        self._key_start = i
+                    elif self._value_start is None:
+                        self._value_start = i
+            elif ch in '{[':
+                if self._depth == 1 and self._in_value and self._value_start is None:
+                    self._value_start = i
+                    self._value_is_array = ch == '['
+                elif self._depth == 2 and self._value_is_array and ch == '{':
+                    self._item_start = i
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 2 and self._item_start is not None:
+                    item = self._loads(text[self._item_start:i + 1])
+                    if item is not None:
+                        events.append(ParseEvent("item", self._key, item, self._item_index))
+                    self._item_index += 1
+                    self._item_start = None
+                elif self._depth == 0:
+                    self._finish_field(text, i, events)
+                    self.done = True
+                    self._pos = i + 1
+                    return events
+            elif self._depth == 1:
+                if ch == ':':
+                    self._in_value = True
+                elif ch == ',':
+                    self._finish_field(text, i, events)
+                elif not ch.isspace() and self._in_value and self._value_start is None:
+                    self._value_start = i
+
+        self._pos = len(text)
+        return events
+
+    def _finish_field(self, text: str, end: int, events: List[ParseEvent]):
+        if self._key is not None and self._value_start is not None:
+            value = self._loads(text[self._value_start:end].strip())
+            events.append(ParseEvent("field", self._key, value))
+        self._key = None
+        self._in_value = False
+        self._value_start = None
+        self._value_is_array = False
+        self._item_index = 0
+
+    @staticmethod
+    def _loads(raw: str) -> Any:
+        try:
+            return json.loads(raw)
+        except (json.JSONDecodeError, ValueError):
+            return None
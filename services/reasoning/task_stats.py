@@ -0,0 +1,71 @@
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+class TaskLatencyStats:
+    """Rolling latency samples per LLM task, so model tiers can be compared."""
+
+    def __init__(self, window: int = 200):
+        self._window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Prompt evaluation: tokens/char and ns/token are learned from full (uncached) evaluations
+        self._tokens_per_char: Optional[float] = None
+        self._ns_per_token: Optional[float] = None
+        self._prompt_eval: Dict[str, Dict[str, float]] = {}
+
+    def record(self, task: str, seconds: float, ok: bool = True):
+        with self._lock:
+            self._samples.setdefault(task, deque(maxlen=self._window)).append(seconds)
+            self._counts[task] = self._counts.get(task, 0) + 1
+            if not ok:
+                self._errors[task] = self._errors.get(task, 0) + 1
+
+    def record_prompt_eval(self, task: str, prompt_chars: int, eval_count: int, eval_ns: int):
+        """
+        Records Ollama's prompt_eval_count/prompt_eval_duration for one call and estimates
+        the prompt-eval time saved by KV-cache prefix reuse: tokens the prompt should have
+        cost minus tokens actually evaluated, priced at the learned per-token cost.
+        """
+        with self._lock:
+            if prompt_chars > 0 and eval_count > 0:
+                ratio = eval_count / prompt_chars
+                # The highest ratio seen comes from a cold call that evaluated the whole prompt
+                if self._tokens_per_char is None or ratio > self._tokens_per_char:
+                    self._tokens_per_char = ratio
+            if eval_count >= 32 and eval_ns > 0:
+                per_token = eval_ns / eval_count
+                self._ns_per_token = per_token if self._ns_per_token is None \
+                    else 0.2 * per_token + 0.8 * self._ns_per_token
+
+            saved_ms = 0.0
+            if self._tokens_per_char and self._ns_per_token:
+                expected_tokens = prompt_chars * self._tokens_per_char
+                saved_ms = max(0.0, expected_tokens - eval_count) * self._ns_per_token / 1e6
+
+            stats = self._prompt_eval.setdefault(task, {"calls": 0, "eval_ms": 0.0, "saved_ms": 0.0})
+            stats["calls"] += 1
+            stats["eval_ms"] += eval_ns / 1e6
+            stats["saved_ms"] += saved_ms
+
+    def snapshot(self, models: Dict[str, str]) -> Dict[str, Any]:
+        with self._lock:
+            report = {}
+            for task, model in models.items():
+                samples = sorted(self._samples.get(task, ()))
+                report[task] = {
+                    "model": model,
+                    "calls": self._counts.get(task, 0),
+                    "errors": self._errors.get(task, 0),
+                    "p50_s": round(samples[len(samples) // 2], 3) if samples else None,
+                    "p95_s": round(samples[min(int(len(samples) * 0.95), len(samples) - 1)], 3) if samples else None,
+                    "mean_s": round(sum(samples) / len(samples), 3) if samples else None,
+                }
+                prompt = self._prompt_eval.get(task)
+                if prompt and prompt["calls"]:
+                    report[task]["prompt_eval_ms_per_call"] = round(prompt["eval_ms"] / prompt["calls"], 1)
+                    report[task]["est_prompt_eval_saved_ms_per_call"] = round(prompt["saved_ms"] / prompt["calls"], 1)
+            return report
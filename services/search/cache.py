@@ -0,0 +1,158 @@
+import os
+import re
+import time
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Union
+from core.config import Config
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical cache key for a search query: lowercased, punctuation stripped and
+    tokens de-duplicated and sorted, so '"Carbon tax: critique of"' and
+    'critique of carbon tax' share one cache entry.
+    """
+    return " ".join(sorted(set(_TOKEN_RE.findall((query or "").lower()))))
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a fixed TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class SharedTTLCache:
+    """
+    TTLCache with the same interface, kept in a SQLite file so every API worker
+    process on the box reads and fills the same entries. Values are pickled; keys
+    are namespaced, so several caches can share one file. Hit/miss counters are
+    per process. A hit only writes (to refresh its LRU position) when the entry was
+    last used more than `touch_interval` seconds ago, so reads stay reads.
+    """
+
+    def __init__(self, path: str, namespace: str, max_entries: int, ttl_seconds: float,
+                 touch_interval: float = 60.0):
+        self.namespace = namespace
+        self.touch_interval = touch_interval
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        db_dir = os.path.dirname(path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        # WAL: readers in other processes do not block the writer
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                used_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, used_at FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, repr(key)),
+            ).fetchone()
+            if row is None or row[1] < now:
+                self.misses += 1
+                return None
+            if now - row[2] > self.touch_interval:
+                self._conn.execute(
+                    "UPDATE cache SET used_at = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, repr(key)),
+                )
+                self._conn.commit()
+            self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key: Hashable, value: Any):
+        now = time.time()
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            print(f"DEBUG: Not caching {self.namespace} entry {key!r}: {e}")
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, repr(key), data, now + self.ttl_seconds, now),
+            )
+            # Expired entries first, then the least recently used beyond max_entries
+            self._conn.execute("DELETE FROM cache WHERE namespace = ? AND expires_at < ?", (self.namespace, now))
+            self._conn.execute(
+                """
+                DELETE FROM cache WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache WHERE namespace = ? ORDER BY used_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.namespace, self.namespace, self.max_entries),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+
+def make_cache(namespace: str, max_entries: int, ttl_seconds: float) -> Union[TTLCache, SharedTTLCache]:
+    """A cache shared between worker processes when SHARED_CACHE_PATH is set, else an in-process one."""
+    if Config.SHARED_CACHE_PATH:
+        return SharedTTLCache(Config.SHARED_CACHE_PATH, namespace, max_entries, ttl_seconds)
+    return TTLCache(max_entries, ttl_seconds)
@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Optional, Tuple
+from core.config import Config
+
+
+class ChannelRecord:
+    """In-memory view of one row of the channel index."""
+    __slots__ = ("channel_id", "name", "category", "prior", "accepted", "rejected")
+
+    def __init__(self, channel_id: str, name: str, category: Optional[str], prior: float,
+                 accepted: int = 0, rejected: int = 0):
+        self.channel_id = channel_id
+        self.name = name
+        self.category = category
+        self.prior = prior
+        self.accepted = accepted
+        self.rejected = rejected
+
+    def score(self, prior_weight: float) -> float:
+        """Prior blended with the observed verification acceptance rate."""
+        observed = self.accepted + self.rejected
+        return (self.prior * prior_weight + self.accepted) / (prior_weight + observed)
+
+
+class ChannelAuthorityIndex:
+    """
+    Persistent channel ID -> (authority score, category) index.
+
+    Rows live in SQLite and are mirrored in dicts, so scoring a search result is an
+    O(1) lookup. Priors come from the seed file (by channel ID or exact name) or,
+    for unseeded channels, from the heuristic score when the channel is first seen;
+    every relevance verification then moves the score towards the channel's real
+    acceptance rate. Several worker processes may share the file: verdicts are
+    counted in SQL, and each process re-reads the table every `reload_interval`
+    seconds to pick up the others' verdicts.
+    """
+
+    def __init__(self, db_path: str = Config.CHANNEL_INDEX_PATH,
+                 seed_path: Optional[str] = Config.CHANNEL_SEED_PATH,
+                 prior_weight: float = Config.CHANNEL_PRIOR_WEIGHT, reload_interval: float = 60.0):
+        self.prior_weight = prior_weight
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._by_id: Dict[str, ChannelRecord] = {}
+        self._seeds_by_name: Dict[str, Tuple[float, Optional[str]]] = {}
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS channels (
+                channel_id TEXT PRIMARY KEY,
+                name TEXT,
+                category TEXT,
+                prior REAL NOT NULL,
+                accepted INTEGER NOT NULL DEFAULT 0,
+                rejected INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL
+            )
+        """)
+        self._conn.commit()
+
+        self._reload()
+        self._load_seeds(seed_path)
+
+    def _reload(self):
+        for row in self._conn.execute(
+                "SELECT channel_id, name, category, prior, accepted, rejected FROM channels"):
+            self._by_id[row[0]] = ChannelRecord(*row)
+        self._loaded_at = time.monotonic()
+
+    def _load_seeds(self, seed_path: Optional[str]):
+        if not seed_path or not os.path.exists(seed_path):
+            return
+        try:
+            with open(seed_path, 'r', encoding='utf-8') as f:
+                seeds = json.load(f).get("channels", [])
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load channel seeds from {seed_path}: {e}")
+            return
+
+        for seed in seeds:
+            score, category = float(seed.get("score", 0.5)), seed.get("category")
+            if seed.get("channel_id"):
+                # Seeds override the prior but keep the observed counts
+                record = self._by_id.get(seed["channel_id"])
+                if record:
+                    record.prior, record.category = score, category
+                else:
+                    record = ChannelRecord(seed["channel_id"], seed.get("name", ""), category, score)
+                    self._by_id[record.channel_id] = record
+                self._persist(record)
+            if seed.get("name"):
+                self._seeds_by_name[seed["name"].strip().lower()] = (score, category)
+
+    def _persist(self, record: ChannelRecord, accepted: int = 0, rejected: int = 0):
+        """
+        Writes name, category and prior and adds `accepted`/`rejected` to the stored
+        counts (never overwrites them, so concurrent writers lose no verdicts), then
+        refreshes `record` from the row.
+        """
+        self._conn.execute(
+            """
+            INSERT INTO channels (channel_id, name, category, prior, accepted, rejected, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(channel_id) DO UPDATE SET
+                name = excluded.name, category = excluded.category, prior = excluded.prior,
+                accepted = accepted + excluded.accepted, rejected = rejected + excluded.rejected,
+                updated_at = excluded.updated_at
+            """,
+            (record.channel_id, record.name, record.category, record.prior, accepted, rejected, time.time()),
+        )
+        self._conn.commit()
+        record.accepted, record.rejected = self._conn.execute(
+            "SELECT accepted, rejected FROM channels WHERE channel_id = ?", (record.channel_id,)
+        ).fetchone()
+
+    def lookup(self, channel_id: Optional[str], channel_name: Optional[str] = None) -> Optional[Tuple[float, Optional[str]]]:
+        """Returns (authority score, category) for a known channel, else None."""
+        if time.monotonic() - self._loaded_at > self.reload_interval:
+            with self._lock:
+                self._reload()
+        record = self._by_id.get(channel_id) if channel_id else None
+        if record:
+            return record.score(self.prior_weight), record.category
+        seed = self._seeds_by_name.get((channel_name or "").strip().lower())
+        return seed
+
+    def record_verification(self, channel_id: Optional[str], channel_name: Optional[str],
+                            accepted: bool, heuristic_prior: float):
+        """Updates a channel's acceptance counts after an LLM relevance verification."""
+        if not channel_id:
+            return
+        with self._lock:
+            record = self._by_id.get(channel_id)
+            if record is None:
+                seed = self._seeds_by_name.get((channel_name or "").strip().lower())
+                prior, category = seed if seed else (heuristic_prior, None)
+                record = ChannelRecord(channel_id, channel_name or "", category, prior)
+                self._by_id[channel_id] = record
+            self._persist(record, accepted=int(accepted), rejected=int(not accepted))
+
+    def __len__(self) -> int:
+        return len(self._by_id)
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Iterable, List, Optional
+from core.config import Config
+from services.search.cache import normalize_query
+
+# Query tokens shorter than this carry no signal for BM25 ("of", "vs", ...)
+MIN_TOKEN_LENGTH = 3
+
+
+class LocalCorpus:
+    """
+    Full-text index (SQLite FTS5, BM25 ranking) over videos this service has already
+    analyzed: title, channel, description and transcript. Searches return the same
+    entry dicts as yt-dlp, so SearchService can treat local hits like YouTube results.
+    """
+
+    def __init__(self, db_path: str = Config.LOCAL_CORPUS_PATH,
+                 min_match: float = Config.LOCAL_CORPUS_MIN_MATCH):
+        self.min_match = min_match
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                title TEXT,
+                channel_name TEXT,
+                channel_id TEXT,
+                description TEXT,
+                thumbnail TEXT,
+                duration INTEGER,
+                view_count INTEGER,
+                categories TEXT,
+                added_at REAL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+                video_id UNINDEXED, title, channel_name, description, transcript,
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+        """)
+        self._conn.commit()
+
+    def add_video(self, metadata: dict, transcript: str):
+        """Adds (or replaces) an analyzed video and its transcript."""
+        video_id = metadata.get('video_id')
+        if not video_id:
+            return
+        row = (
+            video_id,
+            metadata.get('webpage_url') or f"https://www.youtube.com/watch?v={video_id}",
+            metadata.get('title'),
+            metadata.get('channel'),
+            metadata.get('channel_id'),
+            metadata.get('description') or '',
+            metadata.get('thumbnail'),
+            metadata.get('duration'),
+            metadata.get('view_count'),
+            json.dumps(metadata.get('categories') or []),
+            time.time(),
+        )
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+            self._conn.execute("DELETE FROM videos_fts WHERE video_id = ?", (video_id,))
+            self._conn.execute(
+                "INSERT INTO videos_fts (video_id, title, channel_name, description, transcript) VALUES (?, ?, ?, ?, ?)",
+                (video_id, row[2] or '', row[3] or '', row[5], transcript or ''),
+            )
+            self._conn.commit()
+
+    def search(self, query: str, limit: int, exclude_ids: Optional[Iterable[str]] = None) -> List[dict]:
+        """
+        BM25-ranked videos matching at least `min_match` of the query's terms, as
+        yt-dlp style entry dicts. Titles weigh most, transcripts least.
+        """
+        terms = [t for t in normalize_query(query).split() if len(t) >= MIN_TOKEN_LENGTH]
+        if not terms or limit <= 0:
+            return []
+        exclude = set(exclude_ids or ())
+        required = max(1, round(len(terms) * self.min_match))
+        match = " OR ".join(f'"{t}"' for t in terms)
+
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT v.video_id, v.url, v.title, v.channel_name, v.channel_id, v.description,
+                       v.thumbnail, v.duration, v.view_count, v.categories,
+                       lower(f.title || ' ' || f.channel_name || ' ' || f.description || ' ' || f.transcript)
+                FROM videos_fts f JOIN videos v ON v.video_id = f.video_id
+                WHERE videos_fts MATCH ?
+                ORDER BY bm25(videos_fts, 0.0, 10.0, 2.0, 4.0, 1.0)
+                LIMIT ?
+                """,
+                (match, (limit + len(exclude)) * 4),
+            ).fetchall()
+
+        entries = []
+        for row in rows:
+            if row[0] in exclude:
+                continue
+            # OR-matching ranks well but is loose; require enough distinct query terms
+            text = set(normalize_query(row[10]).split())
+            if sum(t in text for t in terms) < required:
+                continue
+            entries.append({
+                'id': row[0],
+                'webpage_url': row[1],
+                'title': row[2],
+                'uploader': row[3],
+                'channel_id': row[4],
+                'description': row[5],
+                'thumbnail': row[6],
+                'duration': row[7],
+                'view_count': row[8],
+                'categories': json.loads(row[9] or '[]'),
+            })
+            if len(entries) >= limit:
+                break
+        return entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
@@ -0,0 +1,58 @@
+import math
+import threading
+from typing import Dict, Optional
+from core.config import Config
+
+
+class OverfetchTuner:
+    """
+    Learns how many raw search results to request to end up with `limit` good ones.
+
+    Keeps an EWMA of the quality-filter rejection rate per query type (the counter-
+    argument type, e.g. "Ethical"), and over-fetches by the expected number of raw
+    results per surviving one, plus some headroom, clamped to [min_factor, max_factor].
+    """
+
+    HEADROOM = 1.25
+    DEFAULT_TYPE = "default"
+
+    def __init__(self, initial: float = Config.SEARCH_OVERFETCH_INITIAL,
+                 min_factor: float = Config.SEARCH_OVERFETCH_MIN,
+                 max_factor: float = Config.SEARCH_OVERFETCH_MAX,
+                 alpha: float = Config.SEARCH_OVERFETCH_ALPHA):
+        self.initial = initial
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+        self.alpha = alpha
+        self._rejection: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def factor(self, query_type: Optional[str] = None) -> float:
+        with self._lock:
+            rate = self._rejection.get(query_type or self.DEFAULT_TYPE)
+        if rate is None:
+            return self.initial
+        wanted = self.HEADROOM / max(1.0 - rate, 1.0 / self.max_factor)
+        return min(self.max_factor, max(self.min_factor, wanted))
+
+    def count(self, query_type: Optional[str], limit: int) -> int:
+        """Raw results to request for `limit` survivors."""
+        return max(limit, math.ceil(limit * self.factor(query_type)))
+
+    def record(self, query_type: Optional[str], seen: int, rejected: int):
+        """Feeds back how many of `seen` raw results the quality filter rejected."""
+        if seen <= 0:
+            return
+        rate = rejected / seen
+        key = query_type or self.DEFAULT_TYPE
+        with self._lock:
+            previous = self._rejection.get(key)
+            self._rejection[key] = rate if previous is None else previous + self.alpha * (rate - previous)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            rates = dict(self._rejection)
+        return {
+            key: {"rejection_rate": round(rate, 3), "factor": round(self.factor(key), 2)}
+            for key, rate in rates.items()
+        }
@@ -0,0 +1,195 @@
+import time
+import random
+import asyncio
+import threading
+import yt_dlp
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from core.config import Config
+from core.tracing import in_context, span
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """yt-dlp surfaces throttling as a DownloadError/HTTPError mentioning HTTP 429."""
+    message = str(error)
+    return '429' in message or 'Too Many Requests' in message
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SearchPool:
+    """
+    Shared worker pool for all yt-dlp search and metadata calls.
+
+    - Concurrency adapts between 1 and `max_workers`: halved on every HTTP 429,
+      raised by one after a run of successful calls (AIMD).
+    - A token bucket caps the request rate towards YouTube.
+    - Throttled calls are retried with exponential backoff and jitter; the backoff
+      pauses the whole pool, since YouTube throttles per client IP.
+    - Each worker thread keeps one YoutubeDL instance per option profile instead of
+      building a new one for every query.
+    """
+
+    def __init__(self, max_workers: int = Config.SEARCH_MAX_CONCURRENCY,
+                 rate_per_second: float = Config.SEARCH_RATE_PER_SECOND,
+                 burst: int = Config.SEARCH_RATE_BURST,
+                 max_retries: int = Config.SEARCH_MAX_RETRIES,
+                 backoff_base: float = Config.SEARCH_BACKOFF_BASE):
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="yt-search")
+        self._bucket = TokenBucket(rate_per_second, burst)
+        self._local = threading.local()
+
+        self._cond = threading.Condition()
+        self._limit = max_workers
+        self._active = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self.throttled = 0
+
+    def _get_ydl(self, profile: str, opts: Dict[str, Any]) -> yt_dlp.YoutubeDL:
+        instances = getattr(self._local, 'instances', None)
+        if instances is None:
+            instances = self._local.instances = {}
+        ydl = instances.get(profile)
+        if ydl is None:
+            ydl = instances[profile] = yt_dlp.YoutubeDL(opts)
+        return ydl
+
+    def _enter(self):
+        with self._cond:
+            while self._active >= self._limit:
+                self._cond.wait()
+            self._active += 1
+
+    def _exit(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+    def _wait_for_pause(self):
+        while True:
+            with self._cond:
+                remaining = self._paused_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def _on_success(self):
+        with self._cond:
+            self._successes += 1
+            if self._limit < self.max_workers and self._successes >= 10 * self._limit:
+                self._limit += 1
+                self._successes = 0
+                self._cond.notify()
+
+    def _on_throttled(self, attempt: int):
+        with self._cond:
+            self.throttled += 1
+            self._successes = 0
+            self._limit = max(1, self._limit // 2)
+            delay = self.backoff_base * (2 ** attempt) + random.uniform(0, self.backoff_base)
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        print(f"⚠️ YouTube throttling (HTTP 429). Concurrency -> {self._limit}, backing off {delay:.1f}s")
+
+    def _run(self, profile: str, opts: Dict[str, Any], url: str) -> Optional[dict]:
+        self._enter()
+        try:
+            for attempt in range(self.max_retries + 1):
+                self._wait_for_pause()
+                self._bucket.acquire()
+                try:
+                    with span("yt-dlp extract", profile=profile, url=url, attempt=attempt):
+                        info = self._get_ydl(profile, opts).extract_info(url, download=False)
+                except Exception as e:
+                    if not _is_rate_limited(e) or attempt == self.max_retries:
+                        raise
+                    self._on_throttled(attempt)
+                    continue
+                self._on_success()
+                return info
+        finally:
+            self._exit()
+
+    def _run_until(self, profile: str, opts: Dict[str, Any], url: str,
+                   keep: Callable[[dict], bool], need: int) -> Tuple[List[dict], List[dict]]:
+        self._enter()
+        try:
+            for attempt in range(self.max_retries + 1):
+                self._wait_for_pause()
+                self._bucket.acquire()
+                kept, seen = [], []
+                try:
+                    # process=False leaves 'entries' as yt-dlp's lazy generator: result
+                    # pages are only requested while we keep iterating
+                    with span("yt-dlp search", profile=profile, url=url, attempt=attempt) as current:
+                        info = self._get_ydl(profile, opts).extract_info(url, download=False, process=False)
+                        for entry in (info or {}).get('entries') or ():
+                            if not entry:
+                                continue
+                            seen.append(entry)
+                            if keep(entry):
+                                kept.append(entry)
+                                if len(kept) >= need:
+                                    break
+                        if current:
+                            current.set("seen", len(seen))
+                            current.set("kept", len(kept))
+                except Exception as e:
+                    if not _is_rate_limited(e) or attempt == self.max_retries:
+                        raise
+                    self._on_throttled(attempt)
+                    continue
+                self._on_success()
+                return kept, seen
+        finally:
+            self._exit()
+
+    async def extract(self, profile: str, opts: Dict[str, Any], url: str) -> Optional[dict]:
+        """Runs ydl.extract_info(url, download=False) on a pool worker."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, in_context(self._run), profile, opts, url)
+
+    async def extract_until(self, profile: str, opts: Dict[str, Any], url: str,
+                            keep: Callable[[dict], bool], need: int) -> Tuple[List[dict], List[dict]]:
+        """
+        Iterates the entries of a search/playlist URL as yt-dlp yields them and stops
+        as soon as `need` of them pass `keep`. Returns (kept, every entry seen).
+        `keep` runs on the pool worker thread.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, in_context(self._run_until), profile, opts, url, keep, need
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "concurrency_limit": self._limit,
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "throttled": self.throttled,
+            }
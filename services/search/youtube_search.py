@@ -1,129 +1,430 @@
 import asyncio
-import yt_dlp
-from typing import List
-from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from core.config import Config
+from core.metrics import skip_sample
 from models.analysis_result import VideoSuggestion
+from services.search.cache import make_cache, normalize_query
+from services.search.channel_index import ChannelAuthorityIndex
+from services.search.local_corpus import LocalCorpus
+from services.search.overfetch import OverfetchTuner
+from services.search.pool import SearchPool
+from services.search.quality import QualityRules
+
+YDL_HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-us,en;q=0.5',
+}
+
+# Phase 1: one results page with IDs, titles and channel names, no per-video fetches
+FLAT_SEARCH_OPTS = {
+    'quiet': True,
+    'default_search': 'ytsearch',
+    'noplaylist': True,
+    'skip_download': True,
+    'extract_flat': 'in_playlist',
+    'http_headers': YDL_HTTP_HEADERS,
+}
+
+# Legacy single pass: full metadata for every hit
+FULL_SEARCH_OPTS = {
+    'quiet': True,
+    'default_search': 'ytsearch',
+    'noplaylist': True,
+    'skip_download': True,  # Don't download, just extract metadata
+    'format': 'bestaudio/best',
+    'extract_flat': False,  # Get full metadata
+    'http_headers': YDL_HTTP_HEADERS,
+}
+
+# Phase 2: full metadata (categories, description, thumbnail) for a single video
+DETAIL_OPTS = {
+    'quiet': True,
+    'noplaylist': True,
+    'skip_download': True,
+    'format': 'bestaudio/best',
+    'http_headers': YDL_HTTP_HEADERS,
+}
+
+# Bulky yt-dlp fields we never read; dropped before caching metadata
+_UNCACHED_INFO_KEYS = (
+    'formats', 'requested_formats', 'thumbnails', 'automatic_captions',
+    'subtitles', 'heatmap', 'chapters', 'http_headers',
+)
+
+def _compact_info(info: dict) -> dict:
+    return {k: v for k, v in info.items() if k not in _UNCACHED_INFO_KEYS}
+
+def _assign_by_rank(results: List[List[VideoSuggestion]], limit: int,
+                    claimed: Set[str]) -> List[List[VideoSuggestion]]:
+    """
+    Hands out videos rank by rank across the queries: each query takes its
+    best-ranked video not yet in `claimed` until it has `limit`. A video found by
+    several queries thus goes to the one ranking it highest (earlier query on ties).
+    Adds every assigned video to `claimed`.
+    """
+    assigned: List[List[VideoSuggestion]] = [[] for _ in results]
+    for rank in range(max(map(len, results), default=0)):
+        for qi, videos in enumerate(results):
+            if rank >= len(videos) or len(assigned[qi]) >= limit:
+                continue
+            key = videos[rank].video_id or videos[rank].url
+            if key not in claimed:
+                claimed.add(key)
+                assigned[qi].append(videos[rank])
+    return assigned
 
 class SearchService:
     def __init__(self):
-        self._executor = ThreadPoolExecutor(max_workers=2)
+        # All yt-dlp calls share one rate-limited pool with reusable YoutubeDL instances
+        self._pool = SearchPool()
+        # Clickbait and authority rules, compiled once from SEARCH_RULES_PATH
+        self._rules = QualityRules.load(Config.SEARCH_RULES_PATH)
+        # Learned per-channel authority; the rules above only score unknown channels
+        self._channels = ChannelAuthorityIndex()
+        # Raw search entries by normalized query, and full metadata by video ID.
+        # The metadata cache is shared by all queries that return the same video.
+        self._query_cache = make_cache("search_queries", Config.SEARCH_CACHE_SIZE, Config.SEARCH_CACHE_TTL)
+        self._video_cache = make_cache("search_videos", Config.VIDEO_METADATA_CACHE_SIZE, Config.VIDEO_METADATA_CACHE_TTL)
+        # Already-analyzed videos, answered from SQLite FTS5 before going to YouTube
+        self._corpus = LocalCorpus() if Config.LOCAL_CORPUS_ENABLED else None
+        # Raw results to request per wanted result, learned per query type
+        self._overfetch = OverfetchTuner()
     
     def _is_quality_title(self, title: str) -> bool:
         """Check if video title meets quality standards (not clickbait)."""
-        if not title:
-            return False
-        
-        # Reject clickbait indicators
-        clickbait_terms = ['SHOCKING', 'YOU WON\'T BELIEVE', 'MUST WATCH', 'GONE WRONG']
-        title_upper = title.upper()
-        
-        for term in clickbait_terms:
-            if term in title_upper:
-                return False
-        
-        # Reject excessive emoji or all caps
-        emoji_count = sum(1 for c in title if ord(c) > 0x1F300)
-        if emoji_count > 3:
-            return False
-        
-        caps_ratio = sum(1 for c in title if c.isupper()) / max(len(title), 1)
-        if caps_ratio > 0.7 and len(title) > 10:  # More than 70% caps
-            return False
-        
-        return True
+        return self._rules.check_titles([title])[0]
     
+    def _check_titles(self, entries: List[dict], verdicts: Dict[str, bool]) -> List[bool]:
+        """
+        Title quality verdicts for the entries, in one batch. `verdicts` holds the
+        verdicts of one search by video ID; titles judged before are not checked again.
+        """
+        keys = [entry.get('id') or entry.get('title') for entry in entries]
+        unjudged = {key: entry.get('title') for key, entry in zip(keys, entries) if key not in verdicts}
+        if unjudged:
+            verdicts.update(zip(unjudged, self._rules.check_titles(list(unjudged.values()))))
+        return [verdicts[key] for key in keys]
+
     def _calculate_authority_score(self, entry: dict) -> float:
         """Calculate source authority score based on category and metadata."""
-        score = 0.5  # Base score
-        
-        # Boost for educational categories
-        categories = entry.get('categories', [])
-        if categories:
-            if any(cat in ['News', 'Education', 'Documentary', 'Science & Technology'] for cat in categories):
-                score += 0.3
-        
-        # Boost for certain channel indicators
-        uploader = (entry.get('uploader') or entry.get('channel') or '').lower()
-        if any(term in uploader for term in ['university', 'institute', 'news', 'academy', 'research']):
-            score += 0.2
-        
-        return min(score, 1.0)
-        
-    async def search_videos(self, query: str, limit: int = 5) -> List[VideoSuggestion]:
+        return self._authority_scores([entry])[0]
+
+    def _authority_scores(self, entries: List[dict]) -> List[float]:
+        """Channel index lookup per entry; heuristic rules only for channels it doesn't know."""
+        scores = [None] * len(entries)
+        unknown = []
+        for i, entry in enumerate(entries):
+            known = self._channels.lookup(entry.get('channel_id'), entry.get('uploader') or entry.get('channel'))
+            if known:
+                scores[i] = known[0]
+            else:
+                unknown.append(i)
+        if unknown:
+            heuristic = self._rules.authority_scores([entries[i] for i in unknown])
+            for i, score in zip(unknown, heuristic):
+                scores[i] = score
+        return scores
+
+    def record_verification(self, video: VideoSuggestion, accepted: bool, authority: float):
+        """Feeds a relevance verdict back into the channel index."""
+        self._channels.record_verification(video.channel_id, video.channel_name, accepted, authority)
+
+    async def _flat_search(self, query: str, count: int) -> List[dict]:
+        """Phase 1: a single search-page request returning lightweight entries."""
+        cache_key = ("flat", normalize_query(query))
+        cached = self._query_cache.get(cache_key)
+        if cached and cached[0] >= count:
+            print(f"DEBUG: Search cache hit for '{query}'")
+            skip_sample()
+            return cached[1]
+
+        result = await self._pool.extract("flat", FLAT_SEARCH_OPTS, f"ytsearch{count}:{query}")
+        entries = [e for e in ((result or {}).get('entries') or []) if e]
+        self._query_cache.set(cache_key, (count, entries))
+        return entries
+
+    async def _full_search(self, query: str, count: int) -> List[dict]:
+        """Legacy single pass: every hit is fully extracted by yt-dlp."""
+        cache_key = ("full", normalize_query(query))
+        cached = self._query_cache.get(cache_key)
+        if cached and cached[0] >= count:
+            skip_sample()
+            return cached[1]
+
+        # ytsearchN:query returns a dictionary with 'entries'
+        result = await self._pool.extract("full", FULL_SEARCH_OPTS, f"ytsearch{count}:{query}")
+        entries = [_compact_info(e) for e in ((result or {}).get('entries') or []) if e]
+
+        for entry in entries:
+            if entry.get('id'):
+                self._video_cache.set(entry['id'], entry)
+        self._query_cache.set(cache_key, (count, entries))
+        return entries
+
+    async def _fetch_details(self, entry: dict) -> dict:
+        """Phase 2: full metadata for one video, falling back to the flat entry on failure."""
+        video_id = entry.get('id')
+        cached = self._video_cache.get(video_id) if video_id else None
+        if cached:
+            return {**entry, **cached}
+
+        url = entry.get('url') or f"https://www.youtube.com/watch?v={video_id}"
+        try:
+            info = await self._pool.extract("detail", DETAIL_OPTS, url)
+            if not info:
+                return entry
+            info = _compact_info(info)
+            self._video_cache.set(info.get('id') or video_id, info)
+            return {**entry, **info}
+        except Exception as e:
+            print(f"DEBUG: Metadata fetch failed for {url}: {e}")
+            return entry
+
+    async def _flat_search_streaming(self, query: str, count: int, need: int,
+                                     keep: Callable[[dict], bool]) -> Tuple[List[dict], List[dict]]:
+        """
+        Phase 1, streamed: consumes up to `count` search entries as yt-dlp yields them
+        and stops as soon as `need` of them pass `keep`. Returns (kept, seen).
+        """
+        cache_key = ("flat", normalize_query(query))
+        cached = self._query_cache.get(cache_key)
+        if cached:
+            kept, seen = [], []
+            for entry in cached[1]:
+                seen.append(entry)
+                if keep(entry):
+                    kept.append(entry)
+                    if len(kept) >= need:
+                        break
+            # Enough survivors, or the cached page already covers everything we'd fetch
+            if len(kept) >= need or cached[0] >= count:
+                print(f"DEBUG: Search cache hit for '{query}'")
+                skip_sample()
+                return kept, seen
+
+        kept, seen = await self._pool.extract_until("flat", FLAT_SEARCH_OPTS, f"ytsearch{count}:{query}", keep, need)
+        # An early stop only stands for the first len(seen) results of the search
+        covered = len(seen) if len(kept) >= need else count
+        if not cached or covered > cached[0]:
+            self._query_cache.set(cache_key, (covered, seen))
+        return kept, seen
+
+    async def _two_phase_search(self, query: str, limit: int, exclude: Set[str] = frozenset(),
+                                query_type: Optional[str] = None,
+                                verdicts: Optional[Dict[str, bool]] = None) -> Tuple[List[dict], bool]:
+        """
+        Flat search first, quality-filter on titles, then fetch full metadata in
+        parallel only for the survivors instead of for every hit.
+        The flat page size follows the learned over-fetch factor for `query_type`, plus
+        room for the excluded videos; with SEARCH_STREAMING the page is consumed lazily
+        and abandoned after `limit` survivors.
+        Title verdicts are recorded in `verdicts` (see _check_titles).
+        Returns (entries, exhausted): `exhausted` when YouTube had no more results.
+        """
+        count = self._overfetch.count(query_type, limit) + len(exclude)
+        verdicts = {} if verdicts is None else verdicts
+
+        if Config.SEARCH_STREAMING:
+            def keep(entry: dict) -> bool:
+                return entry.get('id') not in exclude and self._check_titles([entry], verdicts)[0]
+            survivors, seen = await self._flat_search_streaming(query, count, limit, keep)
+        else:
+            seen = await self._flat_search(query, count)
+            survivors = []
+            passed = self._check_titles(seen, verdicts)
+            for entry, ok in zip(seen, passed):
+                if ok and entry.get('id') not in exclude:
+                    survivors.append(entry)
+                    if len(survivors) >= limit:
+                        break
+
+        # Excluded videos take page slots but say nothing about the rejection rate
+        candidates = [entry for entry in seen if entry.get('id') not in exclude]
+        passed = self._check_titles(candidates, verdicts)
+        for entry, ok in zip(candidates, passed):
+            if not ok:
+                print(f"DEBUG: Rejected low-quality title: {entry.get('title')}")
+        self._overfetch.record(query_type, len(candidates), passed.count(False))
+
+        exhausted = len(survivors) < limit and len(seen) < count
+        return await asyncio.gather(*(self._fetch_details(entry) for entry in survivors)), exhausted
+
+    def add_to_corpus(self, metadata: dict, transcript: str):
+        """Makes an analyzed video searchable from the local corpus."""
+        if self._corpus is not None:
+            self._corpus.add_video(metadata, transcript)
+
+    async def search_videos(self, query: str, limit: int = 5,
+                            exclude_ids: Optional[Iterable[str]] = None,
+                            query_type: Optional[str] = None) -> List[VideoSuggestion]:
         """
-        Searches YouTube using the native yt_dlp Python class in a thread pool.
+        Searches the local corpus of analyzed videos first, then YouTube (native yt_dlp
+        class on the shared search pool) for the remaining slots.
         Extracts comprehensive metadata and filters for quality.
+        With SEARCH_FLAT_EXTRACTION (default) only the quality survivors are resolved
+        to full metadata; otherwise every hit is fully extracted up front.
+        Videos in `exclude_ids` (e.g. the analyzed video itself) are never returned.
+        `query_type` (the counter-argument type) selects the learned over-fetch factor.
         """
+        videos, _ = await self._search(query, limit, exclude_ids, query_type)
+        return videos
+
+    async def _search(self, query: str, limit: int, exclude_ids: Optional[Iterable[str]] = None,
+                      query_type: Optional[str] = None) -> Tuple[List[VideoSuggestion], bool]:
+        """search_videos, also telling whether the search ran out of results (see search_many)."""
         # Ensure query is clean
         query = query.strip("'\"\\ ")
-        
-        ydl_opts = {
-            'quiet': True,
-            'default_search': 'ytsearch',
-            'noplaylist': True,
-            'skip_download': True,  # Don't download, just extract metadata
-            'format': 'bestaudio/best',
-            'extract_flat': False,  # Get full metadata
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-us,en;q=0.5',
-            }
-        }
-
-        loop = asyncio.get_running_loop()
-
-        def _search():
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # ytsearchN:query returns a dictionary with 'entries'
-                # Request more than needed to account for filtering
-                search_query = f"ytsearch{limit * 2}:{query}"
-                result = ydl.extract_info(search_query, download=False)
-                return result.get('entries', [])
+        exclude = set(exclude_ids or ())
+        # Each title is checked once per search, however many filters it passes through
+        verdicts: Dict[str, bool] = {}
 
         try:
-            print(f"DEBUG: Searching YT for keywords: {query}")
-            entries = await loop.run_in_executor(self._executor, _search)
-            
-            results = []
-            for entry in entries:
-                if not entry:
+            local_entries = []
+            if self._corpus is not None:
+                local_entries = self._corpus.search(query, limit, exclude)
+                passed = self._check_titles(local_entries, verdicts)
+                local_entries = [entry for entry, ok in zip(local_entries, passed) if ok]
+                if local_entries:
+                    print(f"DEBUG: {len(local_entries)} local corpus hit(s) for '{query}'")
+
+            remaining = limit - len(local_entries)
+            # Local hits must not come back from YouTube as well
+            seen = exclude | {entry['id'] for entry in local_entries}
+            entries = []
+            exhausted = False
+            if remaining <= 0:
+                skip_sample()
+            else:
+                print(f"DEBUG: Searching YT for keywords: {query}")
+                if Config.SEARCH_FLAT_EXTRACTION:
+                    entries, exhausted = await self._two_phase_search(query, remaining, seen, query_type, verdicts)
+                else:
+                    # Request more than needed to account for filtering and exclusions
+                    count = self._overfetch.count(query_type, remaining) + len(seen)
+                    entries = await self._full_search(query, count)
+                    exhausted = len(entries) < count
+
+            # Apply quality filter to the whole batch in one pass
+            entries = [entry for entry in entries if entry and entry.get('id') not in seen]
+            passed = self._check_titles(entries, verdicts)
+            if not Config.SEARCH_FLAT_EXTRACTION:
+                self._overfetch.record(query_type, len(entries), passed.count(False))
+            quality_entries = []
+            for entry, ok in zip(entries, passed):
+                if not ok:
+                    print(f"DEBUG: Rejected low-quality title: {entry.get('title')}")
                     continue
-                
+                quality_entries.append(entry)
+            # Results cut off here are still to come
+            exhausted = exhausted and len(quality_entries) <= remaining
+            quality_entries = local_entries + quality_entries[:remaining]
+
+            # Calculate base authority scores (will be updated by relevance check)
+            authority_scores = self._authority_scores(quality_entries)
+
+            results = []
+            for entry, authority in zip(quality_entries, authority_scores):
                 title = entry.get('title', 'Unknown Title')
                 
-                # Apply quality filter
-                if not self._is_quality_title(title):
-                    print(f"DEBUG: Rejected low-quality title: {title}")
-                    continue
-                
                 # Extract metadata
                 duration = entry.get('duration')  # In seconds
                 channel_name = entry.get('uploader') or entry.get('channel')
-                view_count = entry.get('view_count', 0)
-                description = entry.get('description', '')[:500]  # Limit to 500 chars
-                
-                # Calculate base authority score (will be updated by relevance check)
-                authority = self._calculate_authority_score(entry)
+                view_count = str(entry.get('view_count') or 0)  # VideoSuggestion stores it as a string
+                description = (entry.get('description') or '')[:500]  # Limit to 500 chars
                 
                 results.append(VideoSuggestion(
                     title=title,
-                    url=entry.get('url') or entry.get('webpage_url', ''),
-                    thumbnail=entry.get('thumbnail'),
+                    # Prefer the watch page: after full extraction 'url' is the media stream
+                    url=entry.get('webpage_url') or entry.get('url', ''),
+                    video_id=entry.get('id'),
+                    thumbnail=entry.get('thumbnail') or (entry.get('thumbnails') or [{}])[-1].get('url'),
                     duration=duration,
                     channel_name=channel_name,
+                    channel_id=entry.get('channel_id'),
                     view_count=view_count,
                     description=description,
                     relevance_score=authority  # Initial score, will be refined by verification
                 ))
-                
-                # Stop once we have enough quality results
-                if len(results) >= limit:
-                    break
             
             print(f"DEBUG: Found {len(results)} quality videos after filtering")
-            return results
+            return results, exhausted
 
         except Exception as e:
             print(f"Exception during YouTube search for '{query}': {e}")
-            return []
+            return [], True
+
+    async def search_unclaimed(self, query: str, limit: int, claimed: Set[str],
+                               query_type: Optional[str] = None) -> List[VideoSuggestion]:
+        """
+        Up to `limit` results that are not in `claimed`, which are then added to it.
+        `claimed` is shared by concurrent searches of one analysis, so each video goes
+        to one query and is verified once; when other queries claimed some of this
+        query's results meanwhile, the search is repeated (up to SEARCH_REFILL_ROUNDS
+        times) for the next ones, until YouTube has no more.
+        """
+        videos: List[VideoSuggestion] = []
+        for _ in range(1 + Config.SEARCH_REFILL_ROUNDS):
+            wanted = limit - len(videos)
+            found, exhausted = await self._search(query, wanted, claimed, query_type)
+            fresh = [v for v in found if (v.video_id or v.url) not in claimed][:wanted]
+            claimed.update(v.video_id or v.url for v in fresh)
+            videos += fresh
+            if len(videos) >= limit or exhausted:
+                break
+        return videos
+
+    async def search_many(self, queries: List[str], limit: int = 5,
+                          exclude_ids: Optional[Iterable[str]] = None,
+                          query_types: Optional[List[str]] = None) -> List[List[VideoSuggestion]]:
+        """
+        Runs all queries of one analysis concurrently and deduplicates the results by
+        video ID, so each video is verified once: a video returned for several queries
+        goes to the query where it ranks highest (the earlier query on ties), and the
+        other queries take their next unique results instead, searching again (up to
+        SEARCH_REFILL_ROUNDS times) while YouTube has more.
+        Returns one list of up to `limit` videos per query, in query order; empty
+        queries get an empty list.
+        """
+        query_types = query_types or [None] * len(queries)
+        exclude = set(exclude_ids or ())
+
+        async def _search(qi: int, count: int) -> Tuple[List[VideoSuggestion], bool]:
+            if not queries[qi]:
+                return [], True
+            return await self._search(queries[qi], count, exclude | claimed, query_types[qi])
+
+        claimed: Set[str] = set()
+        searched = await asyncio.gather(*(_search(qi, limit) for qi in range(len(queries))))
+        results = [videos for videos, _ in searched]
+        exhausted = [done for _, done in searched]
+        assigned = _assign_by_rank(results, limit, claimed)
+
+        # Queries that lost videos to others search on past everything claimed so far
+        # (refills can still collide with each other, hence the rounds)
+        for _ in range(Config.SEARCH_REFILL_ROUNDS):
+            short = [qi for qi, videos in enumerate(assigned) if len(videos) < limit and not exhausted[qi]]
+            if not short:
+                break
+            refills = await asyncio.gather(*(_search(qi, limit - len(assigned[qi])) for qi in short))
+            for qi, (videos, done) in zip(short, refills):
+                # No new videos either: a bigger page would not help this query
+                exhausted[qi] = done or not videos
+            gained = _assign_by_rank([videos for videos, _ in refills], limit, claimed)
+            for qi, videos in zip(short, gained):
+                assigned[qi] += videos[:limit - len(assigned[qi])]
+
+        duplicates = sum(map(len, results)) - len({v.video_id or v.url for videos in results for v in videos})
+        if duplicates:
+            print(f"DEBUG: {duplicates} duplicate video(s) across {len(queries)} queries, each kept for one query")
+        return assigned
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the query and per-video metadata caches."""
+        return {"queries": self._query_cache.stats(), "videos": self._video_cache.stats(),
+                "known_channels": len(self._channels),
+                "local_corpus_videos": len(self._corpus) if self._corpus is not None else 0}
+
+    def pool_stats(self) -> dict:
+        """Current adaptive concurrency and throttling counters of the search pool."""
+        return {**self._pool.stats(), "overfetch": self._overfetch.stats()}
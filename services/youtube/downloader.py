@@ -1,13 +1,36 @@
 import os
+import re
+import json
+import uuid
+import shutil
+import urllib.request
 import yt_dlp
-from typing import Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 from yt_dlp.utils import download_range_func
+from core.config import Config
+from core.tracing import span
+from services.search.cache import make_cache
+
+# Only the start of each video is downloaded and transcribed
+AUDIO_WINDOW_SECONDS = 300
+_VTT_TAG_RE = re.compile(r'<[^>]+>')
+
+_VIDEO_ID_RE = re.compile(r'(?:v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})')
+
+def extract_video_id(url: str) -> Optional[str]:
+    """YouTube video ID from the common watch/short/embed URL forms."""
+    match = _VIDEO_ID_RE.search(url or '')
+    return match.group(1) if match else None
 
 class YouTubeDownloader:
-    def __init__(self, output_dir: str = "temp_audio"):
+    def __init__(self, output_dir: str = "temp_audio", audio_cache_dir: str = Config.AUDIO_CACHE_DIR):
         self.output_dir = output_dir
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
+        self.audio_cache_dir = audio_cache_dir
+        for directory in (self.output_dir, self.audio_cache_dir):
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+        # Raw yt-dlp info by video ID; its stream URLs expire, hence the short TTL
+        self._info_cache = make_cache("video_info", Config.PREFETCH_INFO_CACHE_SIZE, Config.PREFETCH_INFO_TTL)
 
     def _get_ffmpeg_path(self):
         """Locates ffmpeg executable in the project root."""
@@ -41,20 +64,16 @@ class YouTubeDownloader:
             return date_str
         return f"{date_str[6:8]}.{date_str[4:6]}.{date_str[0:4]}"
 
-    def download_audio_with_metadata(self, url: str) -> Tuple[str, Dict[str, Any]]:
-        """
-        Downloads audio and returns the file path along with video metadata.
-        Renamed to match main.py expectations.
-        """
+    def _ydl_opts(self, output_dir: str, max_seconds: int = AUDIO_WINDOW_SECONDS) -> Dict[str, Any]:
         ffmpeg_location = self._get_ffmpeg_path()
         
         ydl_opts = {
             'format': 'bestaudio/best',
-            'outtmpl': os.path.join(self.output_dir, '%(id)s.%(ext)s'),
+            'outtmpl': os.path.join(output_dir, '%(id)s.%(ext)s'),
             'quiet': True,
             'no_warnings': True,
-            # Limit download to first 5 minutes (300s) for performance
-            'download_ranges': download_range_func(None, [(0, 300)]),
+            # Limit download to the first 5 minutes (or less under a deadline) for performance
+            'download_ranges': download_range_func(None, [(0, max_seconds)]),
             'force_keyframes_at_cuts': True,
             'postprocessors': [{
                 'key': 'FFmpegExtractAudio',
@@ -65,35 +84,179 @@ class YouTubeDownloader:
 
         if ffmpeg_location:
             ydl_opts['ffmpeg_location'] = ffmpeg_location
+        return ydl_opts
 
-        try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+    def _build_metadata(self, info: Dict[str, Any], url: str) -> Dict[str, Any]:
+        """Prepare metadata dictionary for the UI"""
+        return {
+            "title": info.get('title', 'Unknown Title'),
+            "channel": info.get('uploader') or info.get('channel', 'Unknown'),
+            "duration_formatted": self._format_duration(info.get('duration', 0)),
+            "view_count_formatted": self._format_views(info.get('view_count', 0)),
+            "upload_date": self._format_date(info.get('upload_date', '')),
+            "thumbnail": info.get('thumbnail', None),
+            "description": (info.get('description') or '')[:500],
+            "view_count": info.get('view_count', 0),
+            "duration": info.get('duration', 0),
+            # Identifiers for the local search corpus and channel index
+            "video_id": info.get('id'),
+            "webpage_url": info.get('webpage_url') or url,
+            "channel_id": info.get('channel_id'),
+            "categories": info.get('categories') or []
+        }
+
+    def _download(self, url: str, output_dir: str, info: Optional[Dict[str, Any]] = None,
+                  max_seconds: int = AUDIO_WINDOW_SECONDS) -> Tuple[str, Dict[str, Any]]:
+        """Downloads the audio into output_dir; a previously extracted `info` skips extraction."""
+        with yt_dlp.YoutubeDL(self._ydl_opts(output_dir, max_seconds)) as ydl:
+            if info is not None:
+                with span("yt-dlp download", url=url, prefetched_info=True):
+                    ydl.process_ie_result(info, download=True)
+            else:
                 # Extract info and download
-                info = ydl.extract_info(url, download=True)
-                video_id = info.get('id')
-                
-                # After post-processing, the file will be .wav
-                final_path = os.path.abspath(os.path.join(self.output_dir, f"{video_id}.wav"))
-                
-                if not os.path.exists(final_path):
-                    raise FileNotFoundError(f"Audio file could not be created: {final_path}")
-
-                # Prepare metadata dictionary for the UI
-                metadata = {
-                    "title": info.get('title', 'Unknown Title'),
-                    "channel": info.get('uploader') or info.get('channel', 'Unknown'),
-                    "duration_formatted": self._format_duration(info.get('duration', 0)),
-                    "view_count_formatted": self._format_views(info.get('view_count', 0)),
-                    "upload_date": self._format_date(info.get('upload_date', '')),
-                    "thumbnail": info.get('thumbnail', None),
-                    "description": info.get('description', '')[:500],
-                    "view_count": info.get('view_count', 0),
-                    "duration": info.get('duration', 0)
-                }
-
-                print(f"Successfully downloaded: {metadata['title']}")
-                return final_path, metadata
+                with span("yt-dlp download", url=url, prefetched_info=False):
+                    info = ydl.extract_info(url, download=True)
+        video_id = info.get('id')
+
+        # After post-processing, the file will be .wav
+        final_path = os.path.abspath(os.path.join(output_dir, f"{video_id}.wav"))
+        if not os.path.exists(final_path):
+            raise FileNotFoundError(f"Audio file could not be created: {final_path}")
+        return final_path, info
+
+    def _cached_audio_path(self, video_id: Optional[str]) -> Optional[str]:
+        if not video_id:
+            return None
+        path = os.path.abspath(os.path.join(self.audio_cache_dir, f"{video_id}.wav"))
+        return path if os.path.exists(path) else None
+
+    def _evict_audio_cache(self):
+        files = sorted(
+            (entry for entry in os.scandir(self.audio_cache_dir) if entry.name.endswith('.wav')),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in files[:max(0, len(files) - Config.AUDIO_CACHE_MAX_FILES)]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def fetch_info(self, url: str) -> Dict[str, Any]:
+        """Video info without downloading, cached by video ID for PREFETCH_INFO_TTL."""
+        video_id = extract_video_id(url)
+        info = self._info_cache.get(video_id) if video_id else None
+        if info is None:
+            with yt_dlp.YoutubeDL(self._ydl_opts(self.output_dir)) as ydl, span("yt-dlp info", url=url):
+                info = ydl.extract_info(url, download=False)
+            self._info_cache.set(info.get('id') or video_id, info)
+        return info
+
+    def prefetch(self, url: str, audio: bool = False) -> Optional[str]:
+        """
+        Warms the info cache (and with `audio`, the audio cache) for a video a user is
+        likely to analyze next. Returns the cached audio path, if any.
+        """
+        info = self.fetch_info(url)
+        if not audio:
+            return None
+        cached = self._cached_audio_path(info.get('id'))
+        if cached:
+            return cached
+        path, _ = self._download(url, self.audio_cache_dir, info)
+        self._evict_audio_cache()
+        return path
+
+    def download_audio_with_metadata(self, url: str, max_seconds: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Downloads audio and returns the file path along with video metadata.
+        Renamed to match main.py expectations.
+        Prefetched videos start warm: cached info skips extraction, and cached audio is
+        linked (or copied) to a new file in output_dir instead of being downloaded again.
+        `max_seconds` shortens the downloaded window (cached audio is used as is).
+        """
+        try:
+            video_id = extract_video_id(url)
+            info = self._info_cache.get(video_id) if video_id else None
+            cached_audio = self._cached_audio_path(video_id) if info else None
+
+            if cached_audio:
+                print(f"DEBUG: Using prefetched audio for {video_id}")
+                # A path of this request's own: the caller deletes it when done, and other
+                # requests for the same video may still be reading theirs
+                final_path = os.path.abspath(os.path.join(self.output_dir, f"{video_id}-{uuid.uuid4().hex}.wav"))
+                try:
+                    os.link(cached_audio, final_path)
+                except OSError:
+                    shutil.copyfile(cached_audio, final_path)
+            else:
+                final_path, info = self._download(url, self.output_dir, info, max_seconds or AUDIO_WINDOW_SECONDS)
+                self._info_cache.set(info.get('id'), info)
+
+            metadata = self._build_metadata(info, url)
+            print(f"Successfully downloaded: {metadata['title']}")
+            return final_path, metadata
 
         except Exception as e:
             print(f"Download Error: {str(e)}")
-            raise e
\ No newline at end of file
+            raise e
+
+    def _caption_track(self, info: Dict[str, Any], languages: List[str]) -> Optional[Dict[str, Any]]:
+        """Best caption track: uploaded subtitles before automatic ones, json3 before vtt."""
+        languages = languages + [info['language']] if info.get('language') else languages
+        for source in (info.get('subtitles') or {}, info.get('automatic_captions') or {}):
+            for language in languages:
+                for key, tracks in source.items():
+                    if key != language and not key.startswith(f"{language}-"):
+                        continue
+                    by_ext = {track.get('ext'): track for track in tracks or [] if track.get('url')}
+                    track = by_ext.get('json3') or by_ext.get('vtt')
+                    if track:
+                        return track
+        return None
+
+    def _caption_text(self, track: Dict[str, Any], max_seconds: int) -> str:
+        with urllib.request.urlopen(track['url'], timeout=10) as response:
+            body = response.read().decode('utf-8', errors='replace')
+
+        if track.get('ext') == 'json3':
+            words = [
+                seg.get('utf8', '')
+                for event in json.loads(body).get('events', [])
+                if event.get('tStartMs', 0) < max_seconds * 1000
+                for seg in event.get('segs') or []
+            ]
+            return " ".join(" ".join(words).split())
+
+        # WebVTT: drop the header and cue timings; automatic captions repeat each line
+        lines = []
+        for line in body.splitlines():
+            line = _VTT_TAG_RE.sub('', line).strip()
+            if not line or '-->' in line or line.startswith(('WEBVTT', 'Kind:', 'Language:')):
+                continue
+            if not lines or lines[-1] != line:
+                lines.append(line)
+        return " ".join(lines)
+
+    def fetch_captions(self, url: str, languages: Optional[List[str]] = None,
+                       max_seconds: int = AUDIO_WINDOW_SECONDS) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        The video's own captions as a transcript (first `max_seconds` where timestamps
+        allow) plus its metadata, without downloading audio. Text is None when the
+        video has no captions in `languages` (default CAPTION_LANGUAGES).
+        """
+        info = self.fetch_info(url)
+        metadata = self._build_metadata(info, url)
+        track = self._caption_track(info, languages or Config.CAPTION_LANGUAGES)
+        if track is None:
+            return None, metadata
+        try:
+            with span("captions", url=url, ext=track.get('ext')):
+                text = self._caption_text(track, max_seconds)
+        except Exception as e:
+            print(f"DEBUG: Caption download failed, falling back to audio: {e}")
+            return None, metadata
+        return text or None, metadata
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the yt-dlp info cache."""
+        return self._info_cache.stats()
@@ -0,0 +1,91 @@
+import queue
+import threading
+from typing import Iterable, Optional
+from core.config import Config
+from services.youtube.downloader import YouTubeDownloader, extract_video_id
+
+
+class Prefetcher:
+    """
+    Low-priority background warm-up for videos a user is likely to analyze next.
+
+    URLs go into a bounded queue (new ones are dropped when it is full) and
+    `concurrency` daemon threads work through it, alongside foreground analyses, so
+    that steady load does not starve it. Depending on configuration it warms the
+    downloader's info cache, the audio cache and the transcript cache; transcripts
+    compete with analyses for Whisper, so they are only prefetched while no analysis
+    is running.
+    """
+
+    def __init__(self, downloader: YouTubeDownloader, transcriber=None,
+                 max_queue: int = Config.PREFETCH_QUEUE_SIZE,
+                 audio: bool = Config.PREFETCH_AUDIO,
+                 transcribe: bool = Config.PREFETCH_TRANSCRIPT,
+                 concurrency: int = Config.PREFETCH_CONCURRENCY):
+        self.downloader = downloader
+        self.transcriber = transcriber
+        self.transcribe = transcribe and transcriber is not None
+        self.audio = audio or self.transcribe  # Transcripts need the audio first
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=max_queue)
+        self._pending = set()
+        self._foreground = 0
+        self._cond = threading.Condition()
+        self.stats_counters = {"queued": 0, "dropped": 0, "done": 0, "failed": 0}
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"prefetch-{i}", daemon=True)
+            for i in range(max(1, concurrency))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def enter_foreground(self):
+        """Marks a user-facing request in progress; transcripts are not prefetched until none are."""
+        with self._cond:
+            self._foreground += 1
+
+    def exit_foreground(self):
+        with self._cond:
+            self._foreground -= 1
+            self._cond.notify_all()
+
+    def submit(self, urls: Iterable[Optional[str]]):
+        """Queues videos for prefetching; skips duplicates and drops overflow."""
+        for url in urls:
+            video_id = extract_video_id(url or "")
+            if not video_id:
+                continue
+            with self._cond:
+                if video_id in self._pending:
+                    continue
+                try:
+                    self._queue.put_nowait(url)
+                except queue.Full:
+                    self.stats_counters["dropped"] += 1
+                    continue
+                self._pending.add(video_id)
+                self.stats_counters["queued"] += 1
+
+    def _idle(self) -> bool:
+        with self._cond:
+            return not self._foreground
+
+    def _worker(self):
+        while True:
+            url = self._queue.get()
+            video_id = extract_video_id(url)
+            try:
+                audio_path = self.downloader.prefetch(url, audio=self.audio)
+                if self.transcribe and audio_path and self._idle():
+                    self.transcriber.prefetch_file(audio_path, video_id)
+                self.stats_counters["done"] += 1
+                print(f"DEBUG: Prefetched {video_id}")
+            except Exception as e:
+                self.stats_counters["failed"] += 1
+                print(f"DEBUG: Prefetch failed for {url}: {e}")
+            finally:
+                with self._cond:
+                    self._pending.discard(video_id)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {**self.stats_counters, "pending": self._queue.qsize(), "foreground": self._foreground}
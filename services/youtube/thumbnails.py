@@ -0,0 +1,192 @@
+import io
+import os
+import hashlib
+import threading
+import urllib.request
+from concurrent.futures import Future
+from urllib.parse import urlparse
+from typing import Dict, Tuple
+from core.config import Config
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional: without it thumbnails are cached at original size
+    Image = None
+
+# Only YouTube's image CDNs are proxied. Anything broader (e.g. googleusercontent.com,
+# which serves arbitrary user content) would turn the endpoint into an open proxy
+ALLOWED_HOST_SUFFIXES = (".ytimg.com", ".ggpht.com")
+ALLOWED_HOSTS = ("img.youtube.com",)
+MAX_SOURCE_BYTES = 5 * 1024 * 1024
+
+
+def _media_type(data: bytes) -> str:
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"
+
+
+class ThumbnailError(Exception):
+    """Raised when a thumbnail URL is not allowed or cannot be fetched."""
+
+
+def is_allowed_thumbnail_url(url: str) -> bool:
+    parsed = urlparse(url or "")
+    host = (parsed.hostname or "").lower()
+    return parsed.scheme in ("http", "https") and (
+        host in ALLOWED_HOSTS or host.endswith(ALLOWED_HOST_SUFFIXES)
+    )
+
+
+class _AllowedRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Follows redirects only within the allowed image hosts."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if not is_allowed_thumbnail_url(newurl):
+            raise ThumbnailError(f"Redirect to a disallowed host: {newurl}")
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+class ThumbnailCache:
+    """
+    Disk cache of card-sized video thumbnails.
+
+    Each remote image is fetched once, resized to `width` (when Pillow is installed)
+    and stored under a hash of its URL. The directory is capped at `max_bytes`;
+    the least recently served files are evicted first.
+    """
+
+    def __init__(self, cache_dir: str = Config.THUMBNAIL_CACHE_DIR,
+                 width: int = Config.THUMBNAIL_WIDTH,
+                 max_bytes: int = Config.THUMBNAIL_CACHE_MAX_MB * 1024 * 1024,
+                 timeout: float = 10):
+        self.cache_dir = cache_dir
+        self.width = width
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._etags: Dict[str, str] = {}
+        # Fetches in progress by cache path; concurrent misses for one URL share them
+        self._inflight: Dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self._opener = urllib.request.build_opener(_AllowedRedirectHandler)
+
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(cache_dir) if entry.is_file())
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(f"{self.width}:{url}".encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{key}.img")
+
+    def _fetch(self, url: str) -> bytes:
+        request = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0 EchoBreaker thumbnail cache'})
+        try:
+            with self._opener.open(request, timeout=self.timeout) as response:
+                data = response.read(MAX_SOURCE_BYTES + 1)
+        except ThumbnailError:
+            raise
+        except Exception as e:
+            raise ThumbnailError(f"Could not fetch thumbnail: {e}") from e
+        if len(data) > MAX_SOURCE_BYTES:
+            raise ThumbnailError("Thumbnail too large")
+        return data
+
+    def _resize(self, data: bytes) -> bytes:
+        if Image is None:
+            return data
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                if image.width <= self.width:
+                    return data
+                height = round(image.height * self.width / image.width)
+                resized = image.convert("RGB").resize((self.width, height), Image.LANCZOS)
+                out = io.BytesIO()
+                resized.save(out, format="JPEG", quality=85, optimize=True)
+                return out.getvalue()
+        except Exception as e:
+            print(f"DEBUG: Thumbnail resize failed, keeping original: {e}")
+            return data
+
+    def _evict(self):
+        with self._lock:
+            if self._total_bytes <= self.max_bytes:
+                return
+            files = sorted(
+                (entry for entry in os.scandir(self.cache_dir) if entry.is_file()),
+                key=lambda entry: entry.stat().st_mtime,
+            )
+            for entry in files:
+                if self._total_bytes <= self.max_bytes * 0.9:
+                    break
+                size = entry.stat().st_size
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    continue
+                self._total_bytes -= size
+                self._etags.pop(entry.path, None)
+
+    def get(self, url: str) -> Tuple[bytes, str, str]:
+        """Returns (image bytes, media type, strong ETag) for a thumbnail URL, fetching it on a miss."""
+        if not is_allowed_thumbnail_url(url):
+            raise ThumbnailError("Thumbnail host not allowed")
+
+        path = self._path(url)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # Mark as recently used for eviction
+            with self._lock:
+                self.hits += 1
+        except FileNotFoundError:
+            data = self._fetch_once(url, path)
+
+        with self._lock:
+            etag = self._etags.get(path)
+            if etag is None:
+                etag = self._etags[path] = f'"{hashlib.sha1(data).hexdigest()}"'
+        return data, _media_type(data), etag
+
+    def _fetch_once(self, url: str, path: str) -> bytes:
+        """
+        Fetches, resizes and stores a missing thumbnail. Concurrent misses for the same
+        URL wait for the first one's fetch instead of fetching (and counting) it again.
+        """
+        with self._lock:
+            pending = self._inflight.get(path)
+            if pending is None:
+                pending = self._inflight[path] = Future()
+                self.misses += 1
+                leader = True
+            else:
+                leader = False
+        if not leader:
+            return pending.result()
+
+        try:
+            data = self._resize(self._fetch(url))
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            with self._lock:
+                # Replacing a file that is already counted only adds the difference
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(tmp_path, path)
+                self._total_bytes += len(data) - previous
+            pending.set_result(data)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[path]
+        self._evict()
+        return data
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "bytes": self._total_bytes}
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the packages from the repository root, as `uvicorn api.main:app` does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
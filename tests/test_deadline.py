@@ -0,0 +1,65 @@
+import asyncio
+import time
+import pytest
+from core import metrics
+from core.config import Config
+from core.deadline import Deadline
+from api.planning import argument_count, audio_window, gather_within
+
+
+@pytest.fixture(autouse=True)
+def default_durations(monkeypatch):
+    """Plan with STAGE_DEFAULT_SECONDS: download 20, transcribe 60, analyze 60, search 8, verify 4."""
+    monkeypatch.setattr(metrics, "_recent_seconds", {})
+    monkeypatch.setattr(Config, "DEADLINE_MIN_AUDIO_SECONDS", 30)
+
+
+def test_a_generous_deadline_changes_nothing():
+    deadline = Deadline(600)
+    assert audio_window(deadline) is None
+    assert argument_count(deadline) == 3
+    assert deadline.degradations == []
+
+
+def test_the_audio_window_shrinks_to_fit_the_later_stages():
+    # About 8.5s spare after download, analyze, search and verify: 8.5/60 of the 300s window
+    deadline = Deadline(100.5)
+    assert audio_window(deadline) == 42
+    assert argument_count(deadline) == 3
+    assert deadline.degradations == ["shortened_audio_42s"]
+
+
+def test_the_audio_window_never_drops_below_the_minimum():
+    deadline = Deadline(10)
+    assert audio_window(deadline) == 30
+
+
+@pytest.mark.parametrize("seconds, count", [(65, 2), (50, 1)])
+def test_fewer_arguments_when_analysis_and_search_do_not_fit(seconds, count):
+    deadline = Deadline(seconds)
+    assert argument_count(deadline) == count
+    assert deadline.degradations == ["fewer_counter_arguments"]
+
+
+def test_recent_durations_replace_the_defaults(monkeypatch):
+    monkeypatch.setattr(metrics, "_recent_seconds", {"analyze": 5, "search": 1, "verify": 1})
+    assert argument_count(Deadline(10)) == 3
+
+
+def test_gather_within_cancels_what_is_still_running():
+    async def run():
+        deadline = Deadline(0.05)
+        fast = asyncio.create_task(asyncio.sleep(0))
+        slow = asyncio.create_task(asyncio.sleep(10))
+        await gather_within([fast, slow], deadline)
+        return deadline, fast, slow
+
+    deadline, fast, slow = asyncio.run(run())
+    assert fast.done() and not fast.cancelled()
+    assert slow.cancelled()
+    assert deadline.degradations == ["partial_search"]
+
+
+def test_a_job_deadline_counts_from_submission():
+    deadline = Deadline.since(30, time.time() - 10)
+    assert 19 < deadline.remaining() <= 20
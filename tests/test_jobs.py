@@ -0,0 +1,195 @@
+import sys
+import time
+import asyncio
+import subprocess
+import pytest
+from api.admission import Overloaded
+from api.jobs import JobStore, SharedJobStore
+from models.analysis_result import AnalysisResult
+
+
+async def _runner(video_url, emit, refresh, deadline):
+    emit("stage", {"stage": "download"} if deadline is None else {"stage": "download", "deadline": deadline.remaining()})
+    await asyncio.sleep(0.05)
+    if "fail" in video_url:
+        raise RuntimeError("boom")
+    return AnalysisResult(topic=video_url, primary_claim="claim")
+
+
+def _stores(tmp_path, count=2, **kwargs):
+    """Several stores on one database file, as in several worker processes."""
+    kwargs.setdefault("poll_interval", 0.01)
+    return [SharedJobStore(_runner, str(tmp_path / "jobs.sqlite"), **kwargs) for _ in range(count)]
+
+
+async def _until_finished(store, job_id):
+    job = await store.get(job_id)
+    while not job.finished:
+        await job.wait_for_events(len(job.events), timeout=0.1)
+    return job
+
+
+async def _stop(*stores):
+    for store in stores:
+        for task in store._tasks:
+            task.cancel()
+        await asyncio.gather(*store._tasks, return_exceptions=True)
+
+
+def test_jobs_are_claimed_once_across_stores(tmp_path):
+    async def run():
+        first, second = _stores(tmp_path, workers=2)
+        await first.start()
+        await second.start()
+        submitted = [await first.submit(f"https://youtu.be/{index:011d}") for index in range(6)]
+        jobs = await asyncio.wait_for(
+            asyncio.gather(*(_until_finished(second, job.job_id) for job in submitted)), timeout=10
+        )
+        await _stop(first, second)
+        return jobs, second.stats()
+
+    jobs, stats = asyncio.run(run())
+    assert [job.status for job in jobs] == ["done"] * 6
+    # Every job ran exactly once: one stage event, then the final result event
+    assert all([name for name, _ in job.events] == ["stage", "result"] for job in jobs)
+    assert stats["done"] == 6 and stats["queued"] == stats["running"] == 0
+
+
+def test_final_event_and_status_are_consistent(tmp_path):
+    async def run():
+        (store,) = _stores(tmp_path, count=1)
+        await store.start()
+        ok = await store.submit("https://youtu.be/aaaaaaaaaaa")
+        failed = await store.submit("https://youtu.be/fail0000000")
+        observations = []
+        for job_id in (ok.job_id, failed.job_id):
+            job = await store.get(job_id)
+            while not job.finished:
+                await job.refresh_state()
+                # Whoever sees the final event also sees the final status
+                if job.events and job.events[-1][0] in ("result", "error"):
+                    observations.append(job.finished)
+            observations.append(job.events[-1][0])
+        done, failed = await store.get(ok.job_id), await store.get(failed.job_id)
+        await _stop(store)
+        return observations, done, failed
+
+    observations, done, failed = asyncio.run(run())
+    assert False not in observations
+    assert done.result.topic == "https://youtu.be/aaaaaaaaaaa"
+    assert failed.status == "failed" and failed.error == "boom"
+
+
+def test_submitting_an_active_video_returns_its_job(tmp_path):
+    async def run():
+        first, second = _stores(tmp_path)
+        job = await first.submit("https://youtu.be/aaaaaaaaaaa")
+        again = await second.submit("https://www.youtube.com/watch?v=aaaaaaaaaaa")
+        return job.job_id, again.job_id
+
+    job_id, again_id = asyncio.run(run())
+    assert job_id == again_id
+
+
+def test_full_queue_is_overloaded(tmp_path):
+    async def run():
+        (store,) = _stores(tmp_path, count=1, max_queued=2)
+        for index in range(2):
+            await store.submit(f"https://youtu.be/{index:011d}")
+        with pytest.raises(Overloaded):
+            await store.submit("https://youtu.be/bbbbbbbbbbb")
+        return store.stats()
+
+    assert asyncio.run(run())["rejected"] == 1
+
+
+def test_deadline_reaches_the_runner(tmp_path):
+    async def run():
+        (store,) = _stores(tmp_path, count=1)
+        await store.start()
+        with_deadline = await store.submit("https://youtu.be/aaaaaaaaaaa", deadline_seconds=30)
+        without = await store.submit("https://youtu.be/bbbbbbbbbbb")
+        jobs = [await _until_finished(store, job.job_id) for job in (with_deadline, without)]
+        await _stop(store)
+        return [job.events[0][1] for job in jobs]
+
+    with_deadline, without = asyncio.run(run())
+    assert 0 < with_deadline["deadline"] <= 30
+    assert "deadline" not in without
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _orphan(store, job_id):
+    """Makes the job look claimed by a worker process that has since died."""
+    store._conn.execute(
+        "UPDATE jobs SET status = 'running', started_at = ?, worker_pid = ? WHERE job_id = ?",
+        (time.time(), _dead_pid(), job_id),
+    )
+
+
+def test_resubmitting_a_video_of_a_dead_worker_runs_it_again(tmp_path):
+    async def run():
+        first, second = _stores(tmp_path)
+        orphan = await first.submit("https://youtu.be/aaaaaaaaaaa")
+        _orphan(first, orphan.job_id)
+        again = await second.submit("https://youtu.be/aaaaaaaaaaa")
+        await second.start()
+        rerun = await asyncio.wait_for(_until_finished(second, again.job_id), timeout=10)
+        await _stop(second)
+        return orphan.job_id, await second.get(orphan.job_id), rerun
+
+    orphan_id, orphan, rerun = asyncio.run(run())
+    assert rerun.job_id != orphan_id and rerun.status == "done"
+    assert orphan.status == "failed" and orphan.events[-1][0] == "error"
+
+
+def test_running_stores_fail_jobs_of_dead_workers(tmp_path):
+    async def run():
+        first, second = _stores(tmp_path)
+        await second.start()
+        # A job claimed by a worker that died after `second` started
+        first._conn.execute(
+            "INSERT INTO jobs (job_id, video_key, video_url, refresh, status, created_at, worker_pid) "
+            "VALUES ('orphan', 'aaaaaaaaaaa', 'https://youtu.be/aaaaaaaaaaa', 0, 'running', ?, ?)",
+            (time.time(), _dead_pid()),
+        )
+        job = await asyncio.wait_for(_until_finished(second, "orphan"), timeout=10)
+        await _stop(second)
+        return job
+
+    job = asyncio.run(run())
+    assert job.status == "failed" and job.error == "The worker running this job stopped."
+
+
+def test_in_process_stats_can_be_read_from_another_thread():
+    async def run():
+        store = JobStore(_runner, workers=4, max_jobs=8, max_queued=1000)
+        await store.start()
+        loop = asyncio.get_running_loop()
+        reading = True
+
+        def read_stats():
+            reads = 0
+            while reading:
+                store.stats()
+                reads += 1
+            return reads
+
+        reader = loop.run_in_executor(None, read_stats)
+        for index in range(200):
+            await store.submit(f"https://youtu.be/{index:011d}")
+            await asyncio.sleep(0)
+        reading = False
+        reads = await reader
+        for task in store._tasks:
+            task.cancel()
+        await asyncio.gather(*store._tasks, return_exceptions=True)
+        return reads
+
+    # Jobs were added and evicted throughout without breaking the reader
+    assert asyncio.run(run()) > 0
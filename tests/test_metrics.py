@@ -0,0 +1,30 @@
+import asyncio
+import time
+from core.metrics import expected_seconds, skip_sample, timed
+
+
+def test_timed_updates_the_expected_duration():
+    with timed("test-stage"):
+        time.sleep(0.02)
+    assert 0.02 <= expected_seconds("test-stage", 99) < 1
+
+
+def test_skipped_samples_leave_the_expectation_alone():
+    with timed("test-cached"):
+        skip_sample()
+    assert expected_seconds("test-cached", 99) == 99
+
+
+def test_skip_applies_to_the_innermost_block_across_tasks():
+    async def cached_search():
+        with timed("test-inner"):
+            await asyncio.sleep(0)
+            skip_sample()
+
+    async def analysis():
+        with timed("test-outer"):
+            await asyncio.create_task(cached_search())
+
+    asyncio.run(analysis())
+    assert expected_seconds("test-inner", 99) == 99
+    assert expected_seconds("test-outer", 99) < 99
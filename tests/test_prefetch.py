@@ -0,0 +1,41 @@
+import time
+from services.youtube.prefetch import Prefetcher
+
+
+class FakeDownloader:
+    def __init__(self):
+        self.prefetched = []
+
+    def prefetch(self, url, audio=False):
+        self.prefetched.append(url)
+        return f"/cache/{url[-11:]}.wav"
+
+
+class FakeTranscriber:
+    def __init__(self):
+        self.transcribed = []
+
+    def prefetch_file(self, audio_path, video_id):
+        self.transcribed.append(video_id)
+
+
+def _until(condition, timeout=2.0):
+    give_up_at = time.monotonic() + timeout
+    while not condition() and time.monotonic() < give_up_at:
+        time.sleep(0.01)
+
+
+def test_prefetches_while_analyses_run():
+    downloader, transcriber = FakeDownloader(), FakeTranscriber()
+    prefetcher = Prefetcher(downloader, transcriber, audio=True, transcribe=True, concurrency=2)
+    prefetcher.enter_foreground()
+    prefetcher.submit(["https://youtu.be/aaaaaaaaaaa", "https://youtu.be/bbbbbbbbbbb"])
+    _until(lambda: prefetcher.stats()["done"] == 2)
+    assert sorted(downloader.prefetched) == ["https://youtu.be/aaaaaaaaaaa", "https://youtu.be/bbbbbbbbbbb"]
+    # Whisper is busy with the foreground analysis: no transcripts
+    assert transcriber.transcribed == []
+
+    prefetcher.exit_foreground()
+    prefetcher.submit(["https://youtu.be/ccccccccccc"])
+    _until(lambda: prefetcher.stats()["done"] == 3)
+    assert transcriber.transcribed == ["ccccccccccc"]
@@ -0,0 +1,22 @@
+import os
+from services.youtube.downloader import YouTubeDownloader
+
+VIDEO_ID = "abcdefghijk"
+URL = f"https://www.youtube.com/watch?v={VIDEO_ID}"
+
+
+def test_prefetched_audio_gets_a_path_per_request(tmp_path):
+    downloader = YouTubeDownloader(output_dir=str(tmp_path / "temp"), audio_cache_dir=str(tmp_path / "cache"))
+    cached = tmp_path / "cache" / f"{VIDEO_ID}.wav"
+    cached.write_bytes(b"RIFF audio")
+    downloader._info_cache.set(VIDEO_ID, {"id": VIDEO_ID, "title": "Prefetched"})
+
+    first, metadata = downloader.download_audio_with_metadata(URL)
+    second, _ = downloader.download_audio_with_metadata(URL)
+    assert metadata["video_id"] == VIDEO_ID
+    assert first != second
+
+    # Cleaning up after one request leaves the other's file and the cache alone
+    os.remove(first)
+    assert open(second, "rb").read() == b"RIFF audio"
+    assert cached.exists()
@@ -0,0 +1,56 @@
+import time
+from api.results import ResultStore, is_storable
+from models.analysis_result import AnalysisResult, CounterArgument, VideoSuggestion
+
+
+def _result(**overrides) -> AnalysisResult:
+    argument = CounterArgument(
+        type="Ethical", title="t", content="c", youtube_query="q",
+        suggested_videos=[VideoSuggestion(title="v", url="https://youtu.be/aaaaaaaaaaa", video_id="aaaaaaaaaaa")],
+    )
+    fields = {"topic": "Topic", "primary_claim": "Claim", "counter_arguments": [argument]}
+    fields.update(overrides)
+    return AnalysisResult(**fields)
+
+
+def _store(tmp_path, **kwargs) -> ResultStore:
+    return ResultStore(str(tmp_path / "results.sqlite"), **kwargs)
+
+
+def test_complete_result_is_stored_and_returned(tmp_path):
+    store = _store(tmp_path, ttl=0)
+    store.put("vid", "https://youtu.be/vid", _result())
+    assert store.get("vid").topic == "Topic"
+    assert store.stats()["hits"] == 1
+
+
+def test_incomplete_results_are_not_storable():
+    assert is_storable(_result())
+    assert not is_storable(_result(error="LLM down"))
+    assert not is_storable(_result(degradations=["partial_search"]))
+    assert not is_storable(_result(counter_arguments=[]))
+    no_videos = _result()
+    no_videos.counter_arguments[0].suggested_videos = []
+    assert not is_storable(no_videos)
+
+
+def test_failed_result_already_in_the_store_is_a_miss(tmp_path):
+    store = _store(tmp_path, ttl=0)
+    store.put("vid", "https://youtu.be/vid", _result(topic="Error in Analysis", counter_arguments=[]))
+    assert store.get("vid") is None
+    assert store.stats()["misses"] == 1
+
+
+def test_pipeline_version_and_model_config_invalidate(tmp_path):
+    _store(tmp_path, ttl=0, pipeline_version="1").put("vid", "https://youtu.be/vid", _result())
+    assert _store(tmp_path, ttl=0, pipeline_version="2").get("vid") is None
+    assert _store(tmp_path, ttl=0, pipeline_version="1").get("vid") is not None
+    other_models = {"analysis_model": "something-else"}
+    assert _store(tmp_path, ttl=0, pipeline_version="1", model_config=other_models).get("vid") is None
+
+
+def test_expired_result_is_a_miss(tmp_path):
+    store = _store(tmp_path, ttl=0.001)
+    store.put("vid", "https://youtu.be/vid", _result())
+    time.sleep(0.01)
+    assert store.get("vid") is None
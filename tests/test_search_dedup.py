@@ -0,0 +1,124 @@
+import asyncio
+import re
+import pytest
+from core.config import Config
+from services.search.cache import TTLCache
+from services.search.overfetch import OverfetchTuner
+from services.search.youtube_search import SearchService
+
+# Ranked YouTube results per query; the first results overlap heavily
+RANKED = {
+    "ethics": ["a", "b", "c", "d", "e", "f", "m", "n"],
+    "evidence": ["a", "b", "c", "g", "h", "i", "o", "p"],
+    "logic": ["b", "a", "c", "j", "k", "l", "q", "r"],
+    "scarce": ["a", "b", "c", "s"],
+}
+
+
+def _entry(video_id: str) -> dict:
+    return {"id": video_id, "title": f"Video {video_id}", "url": f"https://youtu.be/{video_id}"}
+
+
+class FakePool:
+    """Answers ytsearchN:query with the first N entries of RANKED[query], like yt-dlp."""
+
+    def __init__(self):
+        self.searches = []
+
+    def _page(self, url: str):
+        count, query = re.match(r"ytsearch(\d+):(.*)", url).groups()
+        self.searches.append((query, int(count)))
+        return [_entry(video_id) for video_id in RANKED[query][:int(count)]]
+
+    async def extract(self, profile, opts, url):
+        await asyncio.sleep(0)
+        if profile == "detail":
+            return _entry(url.rsplit("/", 1)[-1])
+        return {"entries": self._page(url)}
+
+    async def extract_until(self, profile, opts, url, keep, need):
+        await asyncio.sleep(0)
+        kept, seen = [], []
+        for entry in self._page(url):
+            seen.append(entry)
+            if keep(entry):
+                kept.append(entry)
+                if len(kept) >= need:
+                    break
+        return kept, seen
+
+
+class AcceptAll:
+    def check_titles(self, titles):
+        return [True] * len(titles)
+
+    def authority_scores(self, entries):
+        return [0.5] * len(entries)
+
+
+class NoChannels:
+    def lookup(self, channel_id, channel_name=None):
+        return None
+
+
+@pytest.fixture(params=["streaming", "flat", "full"])
+def service(request, monkeypatch):
+    """The real SearchService on a fake pool, in each search configuration."""
+    monkeypatch.setattr(Config, "SEARCH_FLAT_EXTRACTION", request.param != "full")
+    monkeypatch.setattr(Config, "SEARCH_STREAMING", request.param == "streaming")
+    service = SearchService.__new__(SearchService)
+    service._pool = FakePool()
+    service._rules = AcceptAll()
+    service._channels = NoChannels()
+    service._query_cache = TTLCache(64, 60)
+    service._video_cache = TTLCache(64, 60)
+    service._corpus = None
+    service._overfetch = OverfetchTuner(initial=2.0)
+    return service
+
+
+def _ids(videos):
+    return [video.video_id for video in videos]
+
+
+def test_search_many_keeps_every_query_full_and_unique(service):
+    batches = asyncio.run(service.search_many(["ethics", "evidence", "logic"], limit=3))
+    assert [len(videos) for videos in batches] == [3, 3, 3]
+    all_ids = [video_id for videos in batches for video_id in _ids(videos)]
+    assert len(all_ids) == len(set(all_ids))
+    # Shared videos go to the query ranking them highest, the earlier one on ties
+    assert _ids(batches[0])[0] == "a"
+    assert _ids(batches[2])[0] == "b"
+
+
+def test_search_many_respects_exclusions_and_empty_queries(service):
+    batches = asyncio.run(service.search_many(["ethics", "", "logic"], limit=2, exclude_ids=["a"]))
+    assert batches[1] == []
+    assert "a" not in _ids(batches[0]) + _ids(batches[2])
+    assert len(set(_ids(batches[0]) + _ids(batches[2]))) == 4
+
+
+def test_search_many_stops_when_youtube_runs_out(service):
+    batches = asyncio.run(service.search_many(["ethics", "scarce"], limit=3))
+    assert _ids(batches[0]) == ["a", "b", "c"]
+    # Only "s" is left for the scarce query, however often it searches
+    assert _ids(batches[1]) == ["s"]
+
+
+def test_search_unclaimed_refills_after_concurrent_claims(service):
+    claimed = set()
+
+    async def run():
+        return await asyncio.gather(
+            service.search_unclaimed("ethics", 3, claimed),
+            service.search_unclaimed("evidence", 3, claimed),
+            service.search_unclaimed("logic", 3, claimed),
+        )
+
+    batches = asyncio.run(run())
+    assert [len(videos) for videos in batches] == [3, 3, 3]
+    all_ids = [video_id for videos in batches for video_id in _ids(videos)]
+    assert len(all_ids) == len(set(all_ids)) == len(claimed)
+    # The later searches lost videos to the first one and searched again, on a bigger page
+    assert len(service._pool.searches) > 3
+    assert max(count for _, count in service._pool.searches) > 6
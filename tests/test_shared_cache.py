@@ -0,0 +1,48 @@
+import time
+from services.search.cache import SharedTTLCache
+
+
+def _cache(tmp_path, namespace="search", max_entries=3, ttl=60.0, **kwargs) -> SharedTTLCache:
+    return SharedTTLCache(str(tmp_path / "cache.sqlite"), namespace, max_entries, ttl, **kwargs)
+
+
+def test_entries_are_shared_between_instances_of_a_namespace(tmp_path):
+    writer, reader, other = _cache(tmp_path), _cache(tmp_path), _cache(tmp_path, namespace="videos")
+    writer.set(("flat", "carbon tax"), (5, [{"id": "a"}]))
+    assert reader.get(("flat", "carbon tax")) == (5, [{"id": "a"}])
+    assert other.get(("flat", "carbon tax")) is None
+    assert reader.stats() == {"entries": 1, "hits": 1, "misses": 0}
+
+
+def test_entries_expire(tmp_path):
+    cache = _cache(tmp_path, ttl=0.01)
+    cache.set("key", "value")
+    time.sleep(0.02)
+    assert cache.get("key") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = _cache(tmp_path, touch_interval=0)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+        time.sleep(0.001)
+    assert cache.get("a") == "a"
+    cache.set("d", "d")
+    assert len(cache) == 3
+    assert cache.get("b") is None
+    assert cache.get("a") == "a"
+
+
+def test_hits_only_write_after_the_touch_interval(tmp_path):
+    cache = _cache(tmp_path, touch_interval=3600)
+    cache.set("key", "value")
+    cache.get("key")
+    # No write transaction was started by the hit
+    assert not cache._conn.in_transaction
+    assert cache._conn.total_changes == 1
+
+
+def test_unpicklable_values_are_skipped(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("key", lambda: None)
+    assert cache.get("key") is None
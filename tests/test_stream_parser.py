@@ -0,0 +1,66 @@
+import json
+from services.reasoning.stream_parser import IncrementalJSONParser
+
+DOCUMENT = {
+    "topic": "Remote work",
+    "primary_claim": "Offices are {obsolete}, \"clearly\"",
+    "counter_arguments": [
+        {"type": "Ethical", "title": "Who pays?", "tags": ["cost", "care"]},
+        {"type": "Empirical", "title": "Output data \\ trends"},
+    ],
+    "confidence_score": 0.8,
+}
+
+
+def _feed(parser, text, size):
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    return events
+
+
+def test_reports_every_field_and_item_in_order():
+    text = "Sure! Here is the analysis:\n" + json.dumps(DOCUMENT, indent=2)
+    parser = IncrementalJSONParser()
+    events = _feed(parser, text, 1)
+    assert parser.done
+    assert [(e.kind, e.key) for e in events] == [
+        ("field", "topic"),
+        ("field", "primary_claim"),
+        ("item", "counter_arguments"),
+        ("item", "counter_arguments"),
+        ("field", "counter_arguments"),
+        ("field", "confidence_score"),
+    ]
+    assert events[1].value == DOCUMENT["primary_claim"]
+    assert [e.value for e in events[2:4]] == DOCUMENT["counter_arguments"]
+    assert [e.index for e in events[2:4]] == [0, 1]
+    assert events[4].value == DOCUMENT["counter_arguments"]
+    assert events[5].value == 0.8
+
+
+def test_items_arrive_before_the_array_closes():
+    text = json.dumps(DOCUMENT)
+    first_item_end = text.index('"care"]}') + len('"care"]}')
+    parser = IncrementalJSONParser()
+    events = parser.feed(text[:first_item_end])
+    assert [(e.kind, e.key) for e in events] == [
+        ("field", "topic"), ("field", "primary_claim"), ("item", "counter_arguments")
+    ]
+    assert events[-1].value == DOCUMENT["counter_arguments"][0]
+    assert not parser.done
+
+
+def test_chunk_boundaries_do_not_matter():
+    text = json.dumps(DOCUMENT)
+    whole = IncrementalJSONParser().feed(text)
+    for size in (2, 3, 7, 16):
+        assert _feed(IncrementalJSONParser(), text, size) == whole
+
+
+def test_an_unfinished_stream_is_not_done():
+    parser = IncrementalJSONParser()
+    events = parser.feed('{"topic": "Remote work", "counter_arguments": [{"type": "Eth')
+    assert [e.key for e in events] == ["topic"]
+    assert not parser.done
+    assert parser.text.startswith('{"topic"')
@@ -0,0 +1,58 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from services.youtube.thumbnails import ThumbnailCache, ThumbnailError, is_allowed_thumbnail_url
+
+
+def test_youtube_image_hosts_are_allowed():
+    assert is_allowed_thumbnail_url("https://i.ytimg.com/vi/abc/hqdefault.jpg")
+    assert is_allowed_thumbnail_url("https://yt3.ggpht.com/avatar.jpg")
+    assert is_allowed_thumbnail_url("https://img.youtube.com/vi/abc/0.jpg")
+
+
+def test_other_hosts_are_refused():
+    assert not is_allowed_thumbnail_url("https://lh3.googleusercontent.com/anything")
+    assert not is_allowed_thumbnail_url("https://example.com/i.ytimg.com.jpg")
+    assert not is_allowed_thumbnail_url("https://ytimg.com.example.com/x.jpg")
+    assert not is_allowed_thumbnail_url("file:///etc/passwd")
+
+
+def test_concurrent_misses_fetch_and_count_once(tmp_path):
+    cache = ThumbnailCache(cache_dir=str(tmp_path), max_bytes=1024 * 1024)
+    fetches = []
+
+    def fetch(url):
+        fetches.append(url)
+        time.sleep(0.05)
+        return b"\xff\xd8 thumbnail"
+
+    cache._fetch = fetch
+    url = "https://i.ytimg.com/vi/abc/hqdefault.jpg"
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: cache.get(url), range(8)))
+
+    assert fetches == [url]
+    assert len({etag for _, _, etag in results}) == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["hits"] + stats["misses"] <= 8
+    assert stats["bytes"] == len(b"\xff\xd8 thumbnail")
+
+
+def test_a_failed_fetch_reaches_every_waiting_request(tmp_path):
+    cache = ThumbnailCache(cache_dir=str(tmp_path))
+
+    def fetch(url):
+        time.sleep(0.05)
+        raise ThumbnailError("Could not fetch thumbnail")
+
+    cache._fetch = fetch
+    url = "https://i.ytimg.com/vi/abc/hqdefault.jpg"
+
+    def get(_):
+        try:
+            cache.get(url)
+        except ThumbnailError:
+            return "failed"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert list(pool.map(get, range(4))) == ["failed"] * 4
+    assert cache._inflight == {}
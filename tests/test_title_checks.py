@@ -0,0 +1,81 @@
+import asyncio
+from core.config import Config
+from services.search.cache import TTLCache
+from services.search.overfetch import OverfetchTuner
+from services.search.youtube_search import SearchService
+
+PAGE = [
+    {"id": "a", "title": "A lecture on ethics"},
+    {"id": "b", "title": "YOU WON'T BELIEVE THIS"},
+    {"id": "c", "title": "The evidence, reviewed"},
+    {"id": "d", "title": "A debate on logic"},
+]
+
+
+class CountingRules:
+    """Quality rules that reject shouted titles and count every title checked."""
+
+    def __init__(self):
+        self.checked = []
+
+    def check_titles(self, titles):
+        self.checked.extend(titles)
+        return [not title.isupper() for title in titles]
+
+    def authority_scores(self, entries):
+        return [0.5] * len(entries)
+
+
+class FakePool:
+    async def extract(self, profile, opts, url):
+        return {"entries": list(PAGE)}
+
+    async def extract_until(self, profile, opts, url, keep, need):
+        kept, seen = [], []
+        for entry in PAGE:
+            seen.append(entry)
+            if keep(entry):
+                kept.append(entry)
+                if len(kept) >= need:
+                    break
+        return kept, seen
+
+
+class NoChannels:
+    def lookup(self, channel_id, channel_name=None):
+        return None
+
+
+def _service() -> SearchService:
+    service = SearchService.__new__(SearchService)
+    service._pool = FakePool()
+    service._rules = CountingRules()
+    service._channels = NoChannels()
+    service._query_cache = TTLCache(16, 60)
+    service._video_cache = TTLCache(16, 60)
+    service._corpus = None
+    service._overfetch = OverfetchTuner(initial=2.0)
+    for entry in PAGE:
+        # Full metadata is cached already, so no detail fetches are made
+        service._video_cache.set(entry["id"], entry)
+    return service
+
+
+def _search(monkeypatch, streaming: bool):
+    monkeypatch.setattr(Config, "SEARCH_FLAT_EXTRACTION", True)
+    monkeypatch.setattr(Config, "SEARCH_STREAMING", streaming)
+    service = _service()
+    videos = asyncio.run(service.search_videos("ethics", limit=3))
+    return service._rules.checked, [video.video_id for video in videos]
+
+
+def test_each_title_is_checked_once(monkeypatch):
+    checked, ids = _search(monkeypatch, streaming=False)
+    assert ids == ["a", "c", "d"]
+    assert sorted(checked) == sorted(entry["title"] for entry in PAGE)
+
+
+def test_each_title_is_checked_once_when_streaming(monkeypatch):
+    checked, ids = _search(monkeypatch, streaming=True)
+    assert ids == ["a", "c", "d"]
+    assert len(checked) == len(set(checked)) == len(PAGE)